@@ -0,0 +1,315 @@
+from collections.abc import Sequence
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Select, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from api.archive import STATUS_CODES, TelemetryArchive
+from api.metrics import execute_driver
+from api.models import StatusState, Telemetry
+from api.queries import filter_telemetries
+from api.schemas import OutlierFilter, TelemetryRange
+from api.stats import METRICS
+
+# column -> function sending its values in binary, and their NumPy type;
+# a binary value is the big-endian number, with no length or separator
+COLUMNS = {
+    'id': ('int4send', '>i4'),
+    'route_id': ('int4send', '>i4'),
+    **dict.fromkeys(METRICS, ('float8send', '>f8')),
+    'failed': ('boolsend', '?'),
+}
+THRESHOLDS = {'zscore': 3.0, 'iqr': 1.5}
+
+
+def columns_query(filter: TelemetryRange) -> Select:
+    """One row holding each column as the concatenation of its values.
+
+    A single row comes back as one message, where a row per telemetry
+    costs a round of driver work per row, which dominates at millions.
+    Every aggregate reads the same rows in the same order, so the
+    columns line up.
+    """
+    expressions = {
+        'id': Telemetry.id,
+        'route_id': Telemetry.route_id,
+        **{metric: getattr(Telemetry, metric) for metric in METRICS},
+        'failed': Telemetry.status == StatusState.failed,
+    }
+    return filter_telemetries(
+        select(
+            *(
+                func.string_agg(
+                    getattr(func, send)(expressions[name]), literal(b'')
+                ).label(name)
+                for name, (send, _) in COLUMNS.items()
+            )
+        ),
+        filter,
+    )
+
+
+def parse_columns(row: Sequence[bytes | None]) -> dict[str, np.ndarray]:
+    """NumPy arrays, in native byte order, from a `columns_query` row."""
+    return {
+        name: np.frombuffer(data or b'', dtype=dtype).astype(
+            np.dtype(dtype).newbyteorder('=')
+        )
+        for (name, (_, dtype)), data in zip(COLUMNS.items(), row)
+    }
+
+
+async def fetch_columns(
+    conn: AsyncConnection, archive: TelemetryArchive, filter: TelemetryRange
+) -> dict[str, np.ndarray]:
+    """Telemetry columns matching `filter`, from Postgres and the archive.
+
+    The arrays are built in a thread, NumPy releases the GIL for most
+    of it and the event loop goes on serving other requests.
+    """
+    query = columns_query(filter).compile(dialect=conn.dialect)
+    raw = await conn.get_raw_connection()
+
+    # binary results, so bytea arrives as is rather than hex-encoded,
+    # which SQLAlchemy's cursors cannot ask for
+    async with raw.driver_connection.cursor(binary=True) as cursor:
+        await execute_driver(cursor, str(query), query.params)
+        row = await cursor.fetchone()
+
+    return await run_in_threadpool(_merge_columns, row, archive, filter)
+
+
+def _merge_columns(
+    row: Sequence[bytes | None],
+    archive: TelemetryArchive,
+    filter: TelemetryRange,
+) -> dict[str, np.ndarray]:
+    columns = parse_columns(row)
+    archived = archive.columns(
+        filter, [name for name in COLUMNS if name != 'failed'] + ['status']
+    )
+    archived['failed'] = archived.pop('status') == STATUS_CODES['failed']
+
+    return {
+        name: np.concatenate((values, archived[name]))
+        for name, values in columns.items()
+    }
+
+
+def energy_per_meter(columns: dict[str, np.ndarray]) -> np.ndarray:
+    distance = columns['distance_traveled']
+    return np.divide(
+        columns['energy_consumed'],
+        distance,
+        out=np.full(len(distance), np.nan),
+        where=distance > 0,
+    )
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    return np.divide(
+        numerator,
+        denominator,
+        out=np.full(len(numerator), np.nan),
+        where=denominator > 0,
+    )
+
+
+def _correlation(
+    group: np.ndarray, groups: int, x: np.ndarray, y: np.ndarray
+) -> np.ndarray:
+    """Pearson correlation of x and y within each group."""
+    count = np.bincount(group, minlength=groups)
+    dx = x - _ratio(np.bincount(group, x, groups), count)[group]
+    dy = y - _ratio(np.bincount(group, y, groups), count)[group]
+
+    return _ratio(
+        np.bincount(group, dx * dy, groups),
+        np.sqrt(
+            np.bincount(group, dx * dx, groups)
+            * np.bincount(group, dy * dy, groups)
+        ),
+    )
+
+
+def _nullable(values: np.ndarray) -> list[float | None]:
+    return [
+        None if missing else value
+        for value, missing in zip(values.tolist(), np.isnan(values).tolist())
+    ]
+
+
+def efficiency(columns: dict[str, np.ndarray]) -> dict:
+    """Energy per meter, failure rate and speed/current correlation.
+
+    Per route and for the whole fleet, energy per meter is the energy of
+    all runs over their distance, so long runs weigh more.
+    """
+    route_id = columns['route_id']
+    # route ids index the sums directly, no sort or hash per row
+    groups = int(route_id.max()) + 1 if len(route_id) else 0
+    fleet = np.zeros(len(route_id), dtype=np.intp)
+
+    def metrics(group: np.ndarray, groups: int) -> dict[str, np.ndarray]:
+        count = np.bincount(group, minlength=groups)
+        return {
+            'count': count,
+            'failure_rate': _ratio(
+                np.bincount(group, columns['failed'], groups), count
+            ),
+            'energy_per_meter': _ratio(
+                np.bincount(group, columns['energy_consumed'], groups),
+                np.bincount(group, columns['distance_traveled'], groups),
+            ),
+            'speed_current_correlation': _correlation(
+                group,
+                groups,
+                columns['average_speed'],
+                columns['average_current'],
+            ),
+        }
+
+    routes = metrics(route_id, groups)
+    present = np.flatnonzero(routes['count'])
+    routes = {name: values[present] for name, values in routes.items()}
+    total = metrics(fleet, 1)
+
+    return {
+        'fleet': {
+            'count': len(route_id),
+            'routes': len(present),
+            **{
+                name: _nullable(values)[0]
+                for name, values in total.items()
+                if name != 'count'
+            },
+        },
+        'routes': [
+            dict(zip(('route_id', *routes), row))
+            for row in zip(
+                present.tolist(),
+                routes['count'].tolist(),
+                *(
+                    _nullable(values)
+                    for name, values in routes.items()
+                    if name != 'count'
+                ),
+            )
+        ],
+    }
+
+
+def zscores(values: np.ndarray, group: np.ndarray, groups: int) -> np.ndarray:
+    """Distance from the group mean in standard deviations."""
+    valid = np.isfinite(values)
+    clean = np.where(valid, values, 0)
+    count = np.bincount(group, valid, groups)
+    deviation = clean - _ratio(np.bincount(group, clean, groups), count)[group]
+    std = np.sqrt(
+        _ratio(np.bincount(group, valid * deviation**2, groups), count)
+    )[group]
+
+    return np.divide(
+        deviation,
+        std,
+        out=np.zeros(len(values)),
+        where=valid & (std > 0),
+    )
+
+
+def iqr_scores(
+    values: np.ndarray, group: np.ndarray, groups: int
+) -> np.ndarray:
+    """Distance past the group's quartiles in interquartile ranges.
+
+    Zero between the quartiles, negative below the first one.
+    """
+    if not len(values):
+        return np.zeros(0)
+
+    valid = np.isfinite(values)
+    # sorted by group then value, NaNs sort last within their group
+    order = np.lexsort((values, group))
+    sorted_values = values[order]
+    offset = np.concatenate(([0], np.cumsum(np.bincount(group, None, groups))))
+    count = np.bincount(group, valid, groups).astype(np.intp)
+
+    def quantile(q: float) -> np.ndarray:
+        position = offset[:-1] + q * np.maximum(count - 1, 0)
+        low = np.floor(position).astype(np.intp)
+        high = np.ceil(position).astype(np.intp)
+        # empty groups point one past the end, they are masked below
+        low, high = (
+            np.minimum(index, len(values) - 1) for index in (low, high)
+        )
+        return sorted_values[low] + (position - low) * (
+            sorted_values[high] - sorted_values[low]
+        )
+
+    q1, q3 = quantile(0.25)[group], quantile(0.75)[group]
+    iqr = q3 - q1
+    past = np.where(values > q3, values - q3, np.minimum(values - q1, 0))
+
+    return np.divide(
+        past, iqr, out=np.zeros(len(values)), where=valid & (iqr > 0)
+    )
+
+
+def outliers(columns: dict[str, np.ndarray], filter: OutlierFilter) -> dict:
+    values = (
+        energy_per_meter(columns)
+        if filter.metric == 'energy_per_meter'
+        else columns[filter.metric]
+    )
+    if filter.scope == 'route':
+        group = columns['route_id']
+        groups = int(group.max()) + 1 if len(group) else 0
+    else:
+        group, groups = np.zeros(len(values), dtype=np.intp), 1
+
+    score = (zscores if filter.method == 'zscore' else iqr_scores)(
+        values, group, groups
+    )
+    threshold = (
+        THRESHOLDS[filter.method]
+        if filter.threshold is None
+        else filter.threshold
+    )
+    flagged = np.flatnonzero(np.abs(score) > threshold)
+
+    # the strongest outliers first, without sorting all of them
+    top = flagged
+    if len(flagged) > filter.limit:
+        top = flagged[
+            np.argpartition(-np.abs(score[flagged]), filter.limit - 1)[
+                : filter.limit
+            ]
+        ]
+    top = top[np.argsort(-np.abs(score[top]), kind='stable')]
+
+    failed = columns['failed']
+    return {
+        'metric': filter.metric,
+        'method': filter.method,
+        'scope': filter.scope,
+        'threshold': threshold,
+        'count': len(values),
+        'outlier_count': len(flagged),
+        'failure_rate': {
+            'all': float(failed.mean()) if len(failed) else None,
+            'outliers': float(failed[flagged].mean())
+            if len(flagged)
+            else None,
+        },
+        'outliers': [
+            dict(zip(('id', 'route_id', 'value', 'score', 'failed'), row))
+            for row in zip(
+                columns['id'][top].tolist(),
+                columns['route_id'][top].tolist(),
+                values[top].tolist(),
+                score[top].tolist(),
+                failed[top].tolist(),
+            )
+        ],
+    }
@@ -1,8 +1,118 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from api.broadcast import CHANNEL, deliver, listen
+from api.cache import INVALIDATION_CHANNEL, forget_notified_route
+from api.database import get_engine, get_replicas
+from api.ingest import TelemetryIngestQueue
+from api.leaderboard import load_leaderboards, maintain_leaderboards
+from api.metrics import MetricsMiddleware
+from api.metrics import router as metrics_router
+from api.partitions import maintain_partitions
+from api.routers import analytics, leaderboard, route, system, telemetry
+from api.settings import Settings, get_settings
+from api.warmup import warm_up
+
+logger = logging.getLogger(__name__)
+
+
+def _notification_handlers(settings: Settings) -> dict:
+    handlers = {}
+    if settings.LIVE_NOTIFY_ENABLED:
+        handlers[CHANNEL] = deliver
+    # the other workers cache the routes this one writes
+    if settings.WORKERS != 1 and settings.ROUTE_CACHE_SIZE > 0:
+        handlers[INVALIDATION_CHANNEL] = forget_notified_route
+
+    return handlers
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    engine = get_engine()
+    app.state.ingest_queue = None
+
+    if settings.DATABASE_POOL_WARMUP > 0 or settings.ROUTE_CACHE_WARMUP > 0:
+        try:
+            await warm_up(engine, settings)
+        except (SQLAlchemyError, OSError):
+            # a cold worker still serves, only slower at first
+            logger.exception('Warmup failed')
+
+    if settings.LEADERBOARD_SIZE > 0:
+        try:
+            await load_leaderboards(engine)
+        except (SQLAlchemyError, OSError):
+            # the boards fill in as routes are written, or at the refresh
+            logger.exception('Leaderboard rebuild failed')
 
-from api.routers import route, telemetry
+    if settings.INGEST_QUEUE_ENABLED:
+        app.state.ingest_queue = TelemetryIngestQueue(
+            async_sessionmaker(engine, expire_on_commit=False),
+            maxsize=settings.INGEST_QUEUE_SIZE,
+            batch_size=settings.INGEST_BATCH_SIZE,
+            flush_interval=settings.INGEST_FLUSH_INTERVAL,
+            put_timeout=settings.INGEST_PUT_TIMEOUT,
+            retries=settings.INGEST_FLUSH_RETRIES,
+            retry_backoff=settings.INGEST_RETRY_BACKOFF,
+        )
+        app.state.ingest_queue.start()
 
-app = FastAPI(title='API Projeto Integrador de Engenharia I')
+    handlers = _notification_handlers(settings)
+    listener = None
+    if handlers:
+        listener = asyncio.create_task(listen(settings.DATABASE_URL, handlers))
+
+    maintenance = None
+    if settings.TELEMETRY_PARTITION_INTERVAL > 0:
+        maintenance = asyncio.create_task(
+            maintain_partitions(
+                engine,
+                settings.TELEMETRY_PARTITION_MONTHS_AHEAD,
+                settings.TELEMETRY_RETENTION_MONTHS,
+                settings.TELEMETRY_PARTITION_INTERVAL,
+            )
+        )
+
+    refresh = None
+    if settings.LEADERBOARD_SIZE > 0 and settings.LEADERBOARD_REFRESH_INTERVAL:
+        refresh = asyncio.create_task(
+            maintain_leaderboards(
+                engine, settings.LEADERBOARD_REFRESH_INTERVAL
+            )
+        )
+
+    yield
+
+    if app.state.ingest_queue is not None:
+        await app.state.ingest_queue.stop()
+        app.state.ingest_queue = None
+
+    for task in (listener, maintenance, refresh):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+    await get_replicas().dispose()
+    await engine.dispose()
+
+
+app = FastAPI(
+    title='API Projeto Integrador de Engenharia I', lifespan=lifespan
+)
 
 app.include_router(route.router)
 app.include_router(telemetry.router)
+app.include_router(system.router)
+app.include_router(analytics.router)
+app.include_router(leaderboard.router)
+app.include_router(metrics_router)
+
+app.add_middleware(MetricsMiddleware)
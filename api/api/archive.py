@@ -0,0 +1,603 @@
+import argparse
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import shutil
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Select, column, delete, func, select, table, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from api.database import get_engine
+from api.export import CHUNK_SIZE, KEYS
+from api.models import StatusState, Telemetry
+from api.partitions import (
+    DEFAULT_PARTITION,
+    TABLE,
+    add_months,
+    month_bounds,
+    partition_name,
+    partition_table,
+    partitions,
+)
+from api.schemas import (
+    TelemetryAggregate,
+    TelemetryConditions,
+    TelemetryRange,
+)
+from api.settings import get_settings
+from api.stats import METRICS, forget_rows, forget_telemetries
+
+logger = logging.getLogger(__name__)
+
+# column -> dtype of its .npy file, in export order
+DTYPES = {
+    'id': np.int64,
+    'route_id': np.int32,
+    'average_speed': np.float64,
+    'distance_traveled': np.float64,
+    'energy_consumed': np.float64,
+    'average_current': np.float64,
+    'status': np.uint8,
+    'created_at': 'datetime64[us]',
+}
+STATUSES = list(StatusState)
+STATUS_CODES = {status.value: code for code, status in enumerate(STATUSES)}
+INDEX = 'index.json'
+# flocked by whoever rewrites months, in any worker or process
+LOCK = '.lock'
+# positions of the rows sorted by id, for binary searching an id
+ID_ORDER = 'id_order'
+BUCKETS = {'hour': 'datetime64[h]', 'day': 'datetime64[D]'}
+
+
+class ArchivedTelemetry(NamedTuple):
+    id: int
+    route_id: int
+    average_speed: float
+    distance_traveled: float
+    energy_consumed: float
+    average_current: float
+    status: StatusState
+    created_at: datetime
+
+
+class ArchiveMonth:
+    """Memory-mapped columns of one archived month.
+
+    Rows are sorted by (created_at, id), like the export.
+    """
+
+    def __init__(self, path: Path, index: dict):
+        self.path = path
+        self.index = index
+        self._columns: dict[str, np.ndarray] = {}
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        if column not in self._columns:
+            self._columns[column] = np.load(
+                self.path / f'{column}.npy', mmap_mode='r'
+            )
+        return self._columns[column]
+
+    def find(self, telemetry_id: int) -> int | None:
+        if not self.index['min_id'] <= telemetry_id <= self.index['max_id']:
+            return None
+
+        order = self[ID_ORDER]
+        ids = self['id']
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            if ids[order[middle]] < telemetry_id:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low < len(order) and ids[order[low]] == telemetry_id:
+            return int(order[low])
+        return None
+
+    def select(self, filter: TelemetryRange) -> np.ndarray | slice:
+        """Positions of the rows matching `filter`."""
+        created_at = self['created_at']
+        start = (
+            np.searchsorted(created_at, _datetime64(filter.start), 'left')
+            if filter.start is not None
+            else 0
+        )
+        end = (
+            np.searchsorted(created_at, _datetime64(filter.end), 'left')
+            if filter.end is not None
+            else len(created_at)
+        )
+
+        if filter.route_id is None:
+            return slice(start, end)
+
+        return start + np.flatnonzero(
+            self['route_id'][start:end] == filter.route_id
+        )
+
+
+class TelemetryArchive:
+    """Read side of the cold telemetry archive.
+
+    One directory per month (YYYY-MM) holds a .npy file per column and a
+    small JSON index. Columns are memory-mapped, so scans and aggregates
+    run over the page cache without building Python objects per row.
+    """
+
+    def __init__(self, directory: str | Path | None):
+        self.directory = Path(directory) if directory else None
+        self._months: dict[str, tuple[int, ArchiveMonth]] = {}
+
+    def months(self) -> list[ArchiveMonth]:
+        if self.directory is None or not self.directory.is_dir():
+            return []
+
+        months = []
+        for entry in sorted(os.scandir(self.directory), key=lambda e: e.name):
+            index = Path(entry.path) / INDEX
+            # dot directories are months being staged or swapped out
+            if (
+                entry.name.startswith('.')
+                or not entry.is_dir()
+                or not index.exists()
+            ):
+                continue
+
+            # the archiver swaps whole directories, so a new index means
+            # new column files
+            mtime = index.stat().st_mtime_ns
+            cached = self._months.get(entry.name)
+            if cached is None or cached[0] != mtime:
+                cached = self._months[entry.name] = (
+                    mtime,
+                    ArchiveMonth(
+                        Path(entry.path),
+                        json.loads(index.read_text(encoding='utf-8')),
+                    ),
+                )
+            months.append(cached[1])
+
+        return months
+
+    def get(self, telemetry_id: int) -> ArchivedTelemetry | None:
+        for month in self.months():
+            position = month.find(telemetry_id)
+            if position is not None:
+                return _rows(month, slice(position, position + 1))[0]
+
+        return None
+
+    def export(self, filter: TelemetryRange) -> Iterator[list]:
+        """Chunks of archived rows ordered by (created_at, id)."""
+        for month in self._matching(filter):
+            positions = month.select(filter)
+            total = _count(positions)
+
+            for offset in range(0, total, CHUNK_SIZE):
+                yield _rows(month, _chunk(positions, offset))
+
+    def aggregate(self, filter: TelemetryAggregate) -> list[dict]:
+        buckets = []
+
+        for month in self._matching(filter):
+            positions = month.select(filter)
+            if _count(positions) == 0:
+                continue
+
+            keys = _buckets(month['created_at'][positions], filter.bucket)
+            # rows are sorted by created_at, so buckets are contiguous
+            starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+            counts = np.diff(np.append(starts, len(keys)))
+            metrics = {}
+            for metric in METRICS:
+                values = np.asarray(month[metric][positions])
+                metrics[metric] = (
+                    np.add.reduceat(values, starts),
+                    np.minimum.reduceat(values, starts),
+                    np.maximum.reduceat(values, starts),
+                )
+
+            for n, start in enumerate(starts):
+                count = int(counts[n])
+                bucket = {'bucket': keys[start].item(), 'count': count}
+                for metric, (total, low, high) in metrics.items():
+                    bucket[metric] = {
+                        'total': float(total[n]),
+                        'mean': float(total[n]) / count,
+                        'min': float(low[n]),
+                        'max': float(high[n]),
+                    }
+                buckets.append(bucket)
+
+        return buckets
+
+    def columns(
+        self, filter: TelemetryRange, keys: list[str]
+    ) -> dict[str, np.ndarray]:
+        """Columns of the archived rows matching `filter`, in one array."""
+        parts = {key: [] for key in keys}
+
+        for month in self._matching(filter):
+            positions = month.select(filter)
+            for key in keys:
+                parts[key].append(month[key][positions])
+
+        return {
+            key: np.concatenate(values) if values else np.empty(0, DTYPES[key])
+            for key, values in parts.items()
+        }
+
+    async def delete(self, filter: TelemetryConditions) -> int:
+        """Remove the archived rows matching `filter`, returns how many.
+
+        Each month holding some is rewritten without them, in a thread
+        and under the archive lock.
+        """
+        return await self._locked(self._delete, filter)
+
+    async def delete_id(self, telemetry_id: int) -> bool:
+        return await self._locked(self._delete_id, telemetry_id)
+
+    async def _locked(self, function, *args):
+        if self.directory is None or not self.directory.is_dir():
+            return function(*args)
+
+        async with lock_archive(self.directory):
+            return await run_in_threadpool(function, *args)
+
+    def _delete(self, filter: TelemetryConditions) -> int:
+        deleted = 0
+
+        for month in self._matching(filter):
+            matched = np.zeros(month.index['rows'], dtype=bool)
+            matched[month.select(filter)] = True
+            if filter.status is not None:
+                matched &= month['status'] == STATUS_CODES[filter.status]
+            for metric in METRICS:
+                low = getattr(filter, f'min_{metric}')
+                high = getattr(filter, f'max_{metric}')
+                if low is not None:
+                    matched &= month[metric] >= low
+                if high is not None:
+                    matched &= month[metric] <= high
+
+            deleted += self._remove(month, matched)
+
+        return deleted
+
+    def _delete_id(self, telemetry_id: int) -> bool:
+        for month in self.months():
+            position = month.find(telemetry_id)
+            if position is not None:
+                matched = np.zeros(month.index['rows'], dtype=bool)
+                matched[position] = True
+                return self._remove(month, matched) > 0
+
+        return False
+
+    def _remove(self, month: ArchiveMonth, matched: np.ndarray) -> int:
+        count = int(matched.sum())
+        if count:
+            _save_month(
+                month.path,
+                {key: np.asarray(month[key])[~matched] for key in DTYPES},
+            )
+            self._months.pop(month.path.name, None)
+            logger.info(
+                'Deleted %s archived telemetries of %s', count, month.path.name
+            )
+
+        return count
+
+    def stats(self) -> dict:
+        months = self.months()
+        return {
+            'months': [month.path.name for month in months],
+            'rows': sum(month.index['rows'] for month in months),
+            'bytes': sum(
+                file.stat().st_size
+                for month in months
+                for file in month.path.iterdir()
+            ),
+        }
+
+    def _matching(self, filter: TelemetryRange) -> list[ArchiveMonth]:
+        start = _datetime64(filter.start) if filter.start else None
+        end = _datetime64(filter.end) if filter.end else None
+
+        return [
+            month
+            for month in self.months()
+            if (start is None or np.datetime64(month.index['end']) >= start)
+            and (end is None or np.datetime64(month.index['start']) < end)
+        ]
+
+
+def _datetime64(value: datetime) -> np.datetime64:
+    # created_at is stored as naive UTC, like the timestamp column
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(value, 'us')
+
+
+def _count(positions: np.ndarray | slice) -> int:
+    if isinstance(positions, slice):
+        return positions.stop - positions.start
+    return len(positions)
+
+
+def _chunk(positions: np.ndarray | slice, offset: int) -> np.ndarray | slice:
+    if isinstance(positions, slice):
+        start = positions.start + offset
+        return slice(start, min(start + CHUNK_SIZE, positions.stop))
+    return positions[offset : offset + CHUNK_SIZE]
+
+
+def _rows(month: ArchiveMonth, positions) -> list[ArchivedTelemetry]:
+    columns = [month[key][positions].tolist() for key in KEYS]
+    columns[KEYS.index('status')] = [
+        STATUSES[code] for code in columns[KEYS.index('status')]
+    ]
+    return [ArchivedTelemetry(*row) for row in zip(*columns)]
+
+
+def _buckets(created_at: np.ndarray, bucket: str) -> np.ndarray:
+    if bucket == 'week':
+        # date_trunc('week') starts on Monday, 1970-01-01 was a Thursday
+        days = created_at.astype('datetime64[D]').astype(np.int64)
+        keys = (days - (days + 3) % 7).astype('datetime64[D]')
+    else:
+        keys = created_at.astype(BUCKETS[bucket])
+
+    # back to microseconds, so .item() gives a datetime like date_trunc
+    return keys.astype('datetime64[us]')
+
+
+def merge_buckets(*bucket_lists: list[dict]) -> list[dict]:
+    """Combine aggregate buckets from Postgres and the archive."""
+    merged: dict[datetime, dict] = {}
+
+    for bucket in (bucket for buckets in bucket_lists for bucket in buckets):
+        current = merged.get(bucket['bucket'])
+        if current is None:
+            merged[bucket['bucket']] = bucket
+            continue
+
+        current['count'] += bucket['count']
+        for metric in METRICS:
+            a, b = current[metric], bucket[metric]
+            total = a['total'] + b['total']
+            current[metric] = {
+                'total': total,
+                'mean': total / current['count'],
+                'min': min(a['min'], b['min']),
+                'max': max(a['max'], b['max']),
+            }
+
+    return [merged[key] for key in sorted(merged)]
+
+
+@lru_cache
+def get_archive() -> TelemetryArchive:
+    return TelemetryArchive(get_settings().TELEMETRY_ARCHIVE_DIR)
+
+
+@asynccontextmanager
+async def lock_archive(directory: Path) -> AsyncIterator[None]:
+    """Hold the archive's file lock, waiting for it in a thread."""
+    directory.mkdir(parents=True, exist_ok=True)
+
+    # closing the file releases the lock
+    with open(directory / LOCK, 'a', encoding='utf-8') as lock:
+        await run_in_threadpool(fcntl.flock, lock, fcntl.LOCK_EX)
+        yield
+
+
+def _stage_new_month(
+    directory: Path, month: date, columns: dict[str, list]
+) -> Path:
+    path = directory / f'{month:%Y-%m}'
+    arrays = {
+        key: np.asarray(values, dtype=DTYPES[key])
+        for key, values in columns.items()
+    }
+
+    if (path / INDEX).exists():
+        # rows archived by an interrupted run are replaced by the new copy
+        keep = ~np.isin(np.load(path / 'id.npy'), arrays['id'])
+        arrays = {
+            key: np.concatenate((np.load(path / f'{key}.npy')[keep], values))
+            for key, values in arrays.items()
+        }
+
+    _stage_month(path, arrays)
+    return path
+
+
+def _save_month(path: Path, arrays: dict[str, np.ndarray]):
+    _stage_month(path, arrays)
+    _swap_month(path)
+
+
+def _staging(path: Path) -> Path:
+    return path.parent / f'.{path.name}.new'
+
+
+def _stage_month(path: Path, arrays: dict[str, np.ndarray]):
+    # written aside, `_swap_month` puts it in place
+    staging = _staging(path)
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    if not len(arrays['id']):
+        return
+
+    order = np.lexsort((arrays['id'], arrays['created_at']))
+    arrays = {key: values[order] for key, values in arrays.items()}
+    arrays[ID_ORDER] = np.argsort(arrays['id'], kind='stable')
+
+    for key, values in arrays.items():
+        np.save(staging / f'{key}.npy', values)
+    (staging / INDEX).write_text(
+        json.dumps({
+            'rows': len(arrays['id']),
+            'min_id': int(arrays['id'].min()),
+            'max_id': int(arrays['id'].max()),
+            'start': str(arrays['created_at'][0]),
+            'end': str(arrays['created_at'][-1]),
+        }),
+        encoding='utf-8',
+    )
+
+
+def _swap_month(path: Path):
+    # readers see the old or the new directory, never a mix of both,
+    # a staged month without rows removes it
+    staging = _staging(path)
+    previous = path.parent / f'.{path.name}.old'
+
+    if path.exists():
+        path.rename(previous)
+    if (staging / INDEX).exists():
+        staging.rename(path)
+    shutil.rmtree(staging, ignore_errors=True)
+    shutil.rmtree(previous, ignore_errors=True)
+
+
+async def _read_month(conn: AsyncConnection, query: Select) -> dict:
+    columns = {key: [] for key in KEYS}
+    result = await conn.stream(query.execution_options(yield_per=CHUNK_SIZE))
+
+    async for rows in result.partitions():
+        for key, values in zip(KEYS, zip(*rows)):
+            columns[key].extend(values)
+
+    columns['status'] = [STATUS_CODES[status] for status in columns['status']]
+    return columns
+
+
+async def archive_months(
+    engine: AsyncEngine,
+    archive: TelemetryArchive,
+    keep_months: int,
+    today: date | None = None,
+) -> dict[str, int]:
+    """Move telemetries older than `keep_months` into the archive.
+
+    A month with its own partition is detached and dropped once written,
+    rows in the default partition are deleted. Either way they are taken
+    out of route_stats, which only describes telemetries in Postgres.
+    Month files are staged first and swapped in once Postgres commits,
+    a failed month stays in Postgres only.
+    """
+    cutoff = add_months((today or date.today()).replace(day=1), -keep_months)
+    archived = {}
+
+    async with engine.connect() as conn:
+        months = (
+            await conn.scalars(
+                select(
+                    func.date_trunc('month', Telemetry.created_at).distinct()
+                ).where(Telemetry.created_at < cutoff)
+            )
+        ).all()
+
+    async with lock_archive(archive.directory):
+        for month in sorted(value.date() for value in months):
+            rows = await _archive_month(engine, archive.directory, month)
+            archived[f'{month:%Y-%m}'] = rows
+            logger.info('Archived %s telemetries of %s', rows, month)
+
+    return archived
+
+
+async def _archive_month(
+    engine: AsyncEngine, directory: Path, month: date
+) -> int:
+    bounds = month_bounds(month)
+    staged = None
+
+    try:
+        async with engine.begin() as conn:
+            if month in await partitions(conn):
+                source = partition_name(month)
+                await conn.execute(
+                    text(f'ALTER TABLE {TABLE} DETACH PARTITION {source}')
+                )
+            else:
+                source = DEFAULT_PARTITION
+                # blocks writes to the rows being moved, reads go on
+                await conn.execute(
+                    text(f'LOCK TABLE {source} IN EXCLUSIVE MODE')
+                )
+
+            columns = await _read_month(
+                conn,
+                select(*(column(key) for key in KEYS))
+                .select_from(table(source))
+                .where(text(bounds)),
+            )
+
+            if columns['id']:
+                staged = await run_in_threadpool(
+                    _stage_new_month, directory, month, columns
+                )
+
+            async with AsyncSession(bind=conn) as session:
+                if source == DEFAULT_PARTITION:
+                    await forget_telemetries(
+                        session, delete(Telemetry).where(text(bounds))
+                    )
+                else:
+                    # the detached partition holds only this month
+                    await forget_rows(session, partition_table(source))
+                    await conn.execute(text(f'DROP TABLE {source}'))
+    except BaseException:
+        if staged is not None:
+            shutil.rmtree(_staging(staged), ignore_errors=True)
+        raise
+
+    if staged is not None:
+        _swap_month(staged)
+
+    return len(columns['id'])
+
+
+async def main(args):
+    archive = get_archive()
+    if archive.directory is None:
+        raise SystemExit('TELEMETRY_ARCHIVE_DIR is not set')
+
+    engine = get_engine()
+
+    archived = await archive_months(engine, archive, args.keep_months)
+    for month, rows in archived.items():
+        print(f'{month}: {rows} rows')
+
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Move old telemetries into the columnar archive'
+    )
+    parser.add_argument(
+        '--keep-months',
+        type=int,
+        required=True,
+        help='months of telemetries kept in Postgres',
+    )
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,214 @@
+import asyncio
+import logging
+from collections import defaultdict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from functools import lru_cache
+
+import psycopg
+from sqlalchemy import make_url, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.schemas import TelemetryPublic
+from api.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'telemetries'
+# bytes a NOTIFY payload may carry, Postgres rejects 8000 and above
+NOTIFY_PAYLOAD_LIMIT = 7999
+# seconds between the listener's reconnection attempts, at most
+LISTEN_RETRY_MAX = 30
+
+
+class Subscription:
+    def __init__(self, maxsize: int):
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def push(self, message: str):
+        # a slow client loses its oldest samples instead of blocking ingest
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+
+        self._queue.put_nowait(message)
+
+    async def get(self) -> str:
+        return await self._queue.get()
+
+
+class Broadcaster:
+    def __init__(self, buffer_size: int):
+        self.buffer_size = buffer_size
+        self._subscriptions: defaultdict[int, set[Subscription]] = defaultdict(
+            set
+        )
+        self.published = self.delivered = 0
+
+    @contextmanager
+    def subscribe(self, route_id: int) -> Iterator[Subscription]:
+        subscription = Subscription(self.buffer_size)
+        self._subscriptions[route_id].add(subscription)
+
+        try:
+            yield subscription
+        finally:
+            subscriptions = self._subscriptions[route_id]
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[route_id]
+
+    def has_subscribers(self, route_id: int) -> bool:
+        return route_id in self._subscriptions
+
+    def publish(self, route_id: int, message: str):
+        self.published += 1
+
+        for subscription in self._subscriptions.get(route_id, ()):
+            subscription.push(message)
+            self.delivered += 1
+
+    def stats(self) -> dict:
+        return {
+            'routes': len(self._subscriptions),
+            'subscribers': sum(map(len, self._subscriptions.values())),
+            'published': self.published,
+            'delivered': self.delivered,
+        }
+
+
+@lru_cache
+def get_broadcaster() -> Broadcaster:
+    return Broadcaster(get_settings().LIVE_BUFFER_SIZE)
+
+
+def _message(row: dict, telemetry_id: int) -> str:
+    return TelemetryPublic(**row, id=telemetry_id).model_dump_json()
+
+
+def _notify_payloads(lines: list[str]) -> list[str]:
+    # as few notifications as fit NOTIFY's payload limit, one line each
+    payloads, chunk, size = [], [], 0
+    for line in lines:
+        length = len(line.encode())
+        if chunk and size + 1 + length > NOTIFY_PAYLOAD_LIMIT:
+            payloads.append('\n'.join(chunk))
+            chunk, size = [], 0
+        size += length + bool(chunk)
+        chunk.append(line)
+
+    if chunk:
+        payloads.append('\n'.join(chunk))
+    return payloads
+
+
+async def notify_telemetries(
+    session: AsyncSession, rows: list[dict], ids: list[int]
+):
+    """NOTIFY every worker of telemetries written in this transaction.
+
+    Only with LIVE_NOTIFY_ENABLED, see `listen`. Postgres delivers the
+    notifications at commit, when the rows become visible, and drops
+    them on rollback. A write sends one notification, split only where
+    NOTIFY's limit needs it.
+    """
+    if not get_settings().LIVE_NOTIFY_ENABLED:
+        return
+
+    payloads = _notify_payloads([
+        f'{row["route_id"]}:{_message(row, telemetry_id)}'
+        for row, telemetry_id in zip(rows, ids)
+    ])
+    await session.execute(
+        text(
+            'SELECT pg_notify(:channel, payload) '
+            'FROM unnest(CAST(:payloads AS text[])) AS payload'
+        ),
+        {'channel': CHANNEL, 'payloads': payloads},
+    )
+
+
+def publish_telemetries(rows: list[dict], ids: list[int]):
+    """Push committed telemetries to this worker's live subscribers.
+
+    With LIVE_NOTIFY_ENABLED `notify_telemetries` already did it.
+    """
+    if get_settings().LIVE_NOTIFY_ENABLED:
+        return
+
+    broadcaster = get_broadcaster()
+    for row, telemetry_id in zip(rows, ids):
+        if broadcaster.has_subscribers(row['route_id']):
+            broadcaster.publish(row['route_id'], _message(row, telemetry_id))
+
+
+def deliver(payload: str):
+    """Publish the telemetries of a notification sent by another worker."""
+    broadcaster = get_broadcaster()
+    for line in payload.splitlines():
+        route_id, _, message = line.partition(':')
+        route_id = int(route_id)
+
+        if broadcaster.has_subscribers(route_id):
+            broadcaster.publish(route_id, message)
+
+
+async def live_events(subscription: Subscription, keepalive: float):
+    while True:
+        try:
+            message = await asyncio.wait_for(subscription.get(), keepalive)
+        except TimeoutError:
+            yield ': keepalive\n\n'
+            continue
+
+        yield f'data: {message}\n\n'
+
+
+async def listen(
+    database_url: str,
+    handlers: dict[str, Callable[[str], None]],
+    retry_interval: float = 1,
+):
+    """Pass the payload of every notification to the handler of its channel.
+
+    A handler raises ValueError on a payload it cannot parse, which is
+    logged and skipped, as is any other error of a handler. A failed
+    connection is retried, waiting twice as long after each attempt up
+    to LISTEN_RETRY_MAX seconds.
+    """
+    url = make_url(database_url).set(drivername='postgresql')
+    conninfo = url.render_as_string(hide_password=False)
+    delay = retry_interval
+
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(
+                conninfo, autocommit=True
+            ) as conn:
+                for channel in handlers:
+                    await conn.execute(f'LISTEN {channel}')
+                delay = retry_interval
+
+                async for notify in conn.notifies():
+                    _handle(handlers, notify.channel, notify.payload)
+        except Exception:
+            logger.warning(
+                'Lost the notification listener connection, '
+                'reconnecting in %s s',
+                delay,
+                exc_info=True,
+            )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, LISTEN_RETRY_MAX)
+
+
+def _handle(
+    handlers: dict[str, Callable[[str], None]], channel: str, payload: str
+):
+    try:
+        handlers[channel](payload)
+    except ValueError:
+        logger.warning('Skipped a malformed %s notification', channel)
+    except Exception:
+        logger.exception('Failed to handle a %s notification', channel)
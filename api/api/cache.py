@@ -0,0 +1,166 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.models import Route
+from api.schemas import RoutePublic
+from api.settings import get_settings
+
+# routes written by one worker, for the others to drop from their caches
+INVALIDATION_CHANNEL = 'route_cache'
+# generation counters of an LRUCache, keys share them by hash
+GENERATIONS = 1024
+
+
+class LRUCache:
+    """In-process LRU cache whose entries also expire after `ttl` seconds.
+
+    `pop` bumps the key's generation. Whoever loads a value on a miss
+    reads the generation first and skips storing the value if it has
+    changed, the key was popped meanwhile and the value may be stale.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._generations = [0] * GENERATIONS
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._data.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def generation(self, key: Hashable) -> int:
+        return self._generations[hash(key) % GENERATIONS]
+
+    def set(self, key: Hashable, value: Any) -> Any:
+        if self.maxsize <= 0:
+            return value
+
+        self._data[key] = (self._clock() + self.ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+        return value
+
+    def pop(self, key: Hashable):
+        self._data.pop(key, None)
+        self._generations[hash(key) % GENERATIONS] += 1
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+
+@lru_cache
+def get_route_cache() -> LRUCache:
+    """RoutePublic and ETag by route id."""
+    settings = get_settings()
+    return LRUCache(settings.ROUTE_CACHE_SIZE, settings.ROUTE_CACHE_TTL)
+
+
+@lru_cache
+def get_route_hash_cache() -> LRUCache:
+    """Route id by commands_hash, answers duplicate creates without the DB."""
+    settings = get_settings()
+    return LRUCache(settings.ROUTE_CACHE_SIZE, settings.ROUTE_CACHE_TTL)
+
+
+def _route_etag(route: Route) -> str:
+    return f'"{route.id}-{route.updated_at:%Y%m%d%H%M%S%f}"'
+
+
+def public_route(route: Route) -> tuple[RoutePublic, str]:
+    return RoutePublic.model_validate(route), _route_etag(route)
+
+
+def cache_route(
+    route: Route, generation: int | None = None
+) -> tuple[RoutePublic, str]:
+    """Store a route, unless it was invalidated since `generation`."""
+    route_cache = get_route_cache()
+    if generation is not None and generation != route_cache.generation(
+        route.id
+    ):
+        return public_route(route)
+
+    get_route_hash_cache().set(route.commands_hash, route.id)
+    return route_cache.set(route.id, public_route(route))
+
+
+async def warm_route_cache(session: AsyncSession, limit: int) -> int:
+    """Loads the `limit` most recent routes into the route cache."""
+    routes = await session.scalars(
+        select(Route).order_by(Route.id.desc()).limit(limit)
+    )
+    return len([cache_route(route) for route in routes])
+
+
+def forget_route(route_id: int, commands_hash: str):
+    get_route_cache().pop(route_id)
+    get_route_hash_cache().pop(commands_hash)
+
+
+def forget_notified_route(payload: str):
+    route_id, _, commands_hash = payload.partition(':')
+    forget_route(int(route_id), commands_hash)
+
+
+async def notify_route_change(
+    session: AsyncSession, route_id: int, commands_hash: str
+):
+    """Have the other workers drop the route once the write commits.
+
+    NOTIFY is sent at commit, a rolled back write invalidates nothing.
+    A single worker has no other caches to tell.
+    """
+    settings = get_settings()
+    if settings.WORKERS == 1 or settings.ROUTE_CACHE_SIZE <= 0:
+        return
+
+    await session.execute(
+        text('SELECT pg_notify(:channel, :payload)'),
+        {
+            'channel': INVALIDATION_CHANNEL,
+            'payload': f'{route_id}:{commands_hash}',
+        },
+    )
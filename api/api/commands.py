@@ -0,0 +1,82 @@
+import hashlib
+import math
+import re
+from enum import IntEnum
+
+_COMMAND = re.compile(
+    r'ANDAR (?P<distance>-?\d+) CM'
+    r'|GIRAR (?P<angle>\d+) GRAUS (?P<direction>DIREITA|ESQUERDA)'
+    r'|ENTREGAR'
+)
+
+
+class Opcode(IntEnum):
+    ANDAR = 1
+    GIRAR = 2
+    ENTREGAR = 3
+
+
+def normalize_commands(commands: str) -> str:
+    commands = re.sub(r'\s*,\s*', ', ', commands.strip())
+    return re.sub(r'\s+', ' ', commands).upper()
+
+
+def commands_hash(commands: str) -> str:
+    return hashlib.sha256(normalize_commands(commands).encode()).hexdigest()
+
+
+def parse_commands(commands: str) -> tuple[list[int], list[int]]:
+    opcodes, arguments = [], []
+
+    for command in normalize_commands(commands).split(', '):
+        match = _COMMAND.fullmatch(command)
+
+        if match is None:
+            raise ValueError(f'Invalid command: {command!r}')
+
+        if match['distance'] is not None:
+            opcodes.append(Opcode.ANDAR.value)
+            arguments.append(int(match['distance']))
+        elif match['angle'] is not None:
+            sign = 1 if match['direction'] == 'DIREITA' else -1
+            opcodes.append(Opcode.GIRAR.value)
+            arguments.append(sign * int(match['angle']))
+        else:
+            opcodes.append(Opcode.ENTREGAR.value)
+            arguments.append(0)
+
+    return opcodes, arguments
+
+
+def route_values(commands: str) -> dict:
+    """Parse `commands` into the columns stored on `Route`.
+
+    The pose starts at the origin facing +y; `GIRAR ... DIREITA` turns
+    clockwise (positive degrees) and distances are in centimeters.
+    """
+    opcodes, arguments = parse_commands(commands)
+
+    x = y = 0.0
+    heading = total_distance = total_rotation = 0
+
+    for opcode, argument in zip(opcodes, arguments):
+        if opcode == Opcode.ANDAR:
+            total_distance += abs(argument)
+            x += argument * math.sin(math.radians(heading))
+            y += argument * math.cos(math.radians(heading))
+        elif opcode == Opcode.GIRAR:
+            total_rotation += abs(argument)
+            heading = (heading + argument) % 360
+
+    return {
+        'commands': commands,
+        'commands_hash': commands_hash(commands),
+        'opcodes': opcodes,
+        'arguments': arguments,
+        'step_count': len(opcodes),
+        'total_distance': total_distance,
+        'total_rotation': total_rotation,
+        'final_x': round(x, 3),
+        'final_y': round(y, 3),
+        'final_heading': heading,
+    }
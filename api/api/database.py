@@ -1,10 +1,193 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import logging
+import time
+from functools import lru_cache
 
-from api.settings import Settings
+from fastapi import Request, Response
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
 
-engine = create_async_engine(Settings().DATABASE_URL)
+from api.settings import Settings, get_settings
 
+logger = logging.getLogger(__name__)
 
-async def get_session():  # pragma: no cover
-    async with AsyncSession(engine, expire_on_commit=False) as session:
+SAFE_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+# unix time until which the client's reads go to the primary
+STICKY_COOKIE = 'db_primary_until'
+
+
+def engine_options(settings: Settings) -> dict:
+    connect_args = {'prepare_threshold': settings.DATABASE_PREPARE_THRESHOLD}
+
+    if settings.DATABASE_STATEMENT_TIMEOUT:
+        connect_args['options'] = (
+            f'-c statement_timeout={settings.DATABASE_STATEMENT_TIMEOUT}'
+        )
+
+    return {
+        'pool_size': settings.DATABASE_POOL_SIZE,
+        'max_overflow': settings.DATABASE_MAX_OVERFLOW,
+        'pool_timeout': settings.DATABASE_POOL_TIMEOUT,
+        'pool_recycle': settings.DATABASE_POOL_RECYCLE,
+        'pool_pre_ping': settings.DATABASE_POOL_PRE_PING,
+        'connect_args': connect_args,
+    }
+
+
+def create_engine(settings: Settings) -> AsyncEngine:
+    return create_async_engine(
+        settings.DATABASE_URL, **engine_options(settings)
+    )
+
+
+def create_replica_engine(settings: Settings, url: str) -> AsyncEngine:
+    options = engine_options(settings)
+    # an unreachable replica should fail over quickly, not hang the request
+    options['connect_args']['connect_timeout'] = (
+        settings.DATABASE_REPLICA_CONNECT_TIMEOUT
+    )
+    return create_async_engine(url, **options)
+
+
+def pool_status(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+
+    return {
+        'size': pool.size(),
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        'overflow': pool.overflow(),
+    }
+
+
+class ReplicaSet:
+    """Round-robin over the read replicas, skipping the ones that failed."""
+
+    def __init__(self, engines: list[AsyncEngine], retry_interval: float):
+        self.engines = engines
+        self.retry_interval = retry_interval
+        self._next = 0
+        self._down_until: dict[AsyncEngine, float] = {}
+
+    def healthy(self) -> list[AsyncEngine]:
+        now = time.monotonic()
+        return [
+            engine
+            for engine in self.engines
+            if self._down_until.get(engine, 0) <= now
+        ]
+
+    def candidates(self) -> list[AsyncEngine]:
+        """Healthy replicas, starting one further at every call."""
+        healthy = self.healthy()
+        if not healthy:
+            return []
+
+        start = self._next % len(healthy)
+        self._next += 1
+        return healthy[start:] + healthy[:start]
+
+    def mark_down(self, engine: AsyncEngine):
+        self._down_until[engine] = time.monotonic() + self.retry_interval
+
+    async def connect(self) -> AsyncConnection | None:
+        for engine in self.candidates():
+            try:
+                return await engine.connect()
+            except (OperationalError, OSError):
+                logger.warning(
+                    'Replica %s is unavailable',
+                    engine.url.render_as_string(hide_password=True),
+                    exc_info=True,
+                )
+                self.mark_down(engine)
+
+        return None
+
+    async def dispose(self):
+        for engine in self.engines:
+            await engine.dispose()
+
+    def stats(self) -> list[dict]:
+        healthy = self.healthy()
+        return [
+            {
+                'url': engine.url.render_as_string(hide_password=True),
+                'healthy': engine in healthy,
+                **pool_status(engine),
+            }
+            for engine in self.engines
+        ]
+
+
+@lru_cache
+def get_engine() -> AsyncEngine:
+    """The primary engine, created on first use rather than at import."""
+    return create_engine(get_settings())
+
+
+@lru_cache
+def get_replicas() -> ReplicaSet:
+    settings = get_settings()
+    return ReplicaSet(
+        [
+            create_replica_engine(settings, url)
+            for url in settings.DATABASE_REPLICA_URLS
+        ],
+        settings.DATABASE_REPLICA_RETRY,
+    )
+
+
+def _sticky(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+async def get_session(request: Request, response: Response):
+    settings = get_settings()
+
+    if request.method not in SAFE_METHODS and get_replicas().engines:
+        # the client reads its own writes from the primary for a while,
+        # replicas may not have replayed them yet
+        response.set_cookie(
+            STICKY_COOKIE,
+            str(time.time() + settings.DATABASE_REPLICA_STICKINESS),
+            max_age=int(settings.DATABASE_REPLICA_STICKINESS) + 1,
+            httponly=True,
+        )
+
+    async with AsyncSession(get_engine(), expire_on_commit=False) as session:
         yield session
+
+
+async def get_read_session(request: Request):
+    """Session on a replica for read-only handlers, else on the primary.
+
+    Sessions on a replica have `session.info['replica']` set.
+    """
+    connection = None if _sticky(request) else await get_replicas().connect()
+
+    if connection is None:
+        async with AsyncSession(
+            get_engine(), expire_on_commit=False
+        ) as session:
+            yield session
+            # nothing to undo, and unlike the ROLLBACK of close() a COMMIT
+            # keeps psycopg's prepared statements on the connection
+            await session.commit()
+        return
+
+    try:
+        async with AsyncSession(
+            bind=connection, expire_on_commit=False, info={'replica': True}
+        ) as session:
+            yield session
+            await session.commit()
+    finally:
+        await connection.close()
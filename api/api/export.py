@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator, Iterable
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.models import Telemetry
+
+CHUNK_SIZE = 1_000
+
+EXPORT_COLUMNS = (
+    Telemetry.id,
+    Telemetry.route_id,
+    Telemetry.average_speed,
+    Telemetry.distance_traveled,
+    Telemetry.energy_consumed,
+    Telemetry.average_current,
+    Telemetry.status,
+    Telemetry.created_at,
+)
+
+MEDIA_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def export_query() -> Select:
+    return select(*EXPORT_COLUMNS).order_by(Telemetry.created_at, Telemetry.id)
+
+
+KEYS = [column.key for column in EXPORT_COLUMNS]
+
+
+def _values(row) -> list:
+    return [*row[:6], row.status.value, row.created_at.isoformat()]
+
+
+def _ndjson(rows) -> bytes:
+    lines = (json.dumps(dict(zip(KEYS, _values(row)))) for row in rows)
+    return ''.join(f'{line}\n' for line in lines).encode()
+
+
+def _csv(rows, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(KEYS)
+    writer.writerows(_values(row) for row in rows)
+    return buffer.getvalue().encode()
+
+
+async def stream_telemetries(
+    session: AsyncSession,
+    query: Select,
+    format: str,
+    archived: Iterable[list] = (),
+) -> AsyncIterator[bytes]:
+    encode = _csv if format == 'csv' else _ndjson
+
+    if format == 'csv':
+        yield _csv([], header=True)
+
+    # archived months are older than anything left in the table
+    for rows in archived:
+        yield encode(rows)
+
+    result = await session.stream(
+        query.execution_options(yield_per=CHUNK_SIZE)
+    )
+
+    try:
+        async for rows in result.partitions():
+            yield encode(rows)
+    finally:
+        await result.close()
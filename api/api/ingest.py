@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import time
+from contextlib import suppress
+
+from fastapi import Request
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from api.broadcast import notify_telemetries, publish_telemetries
+from api.models import Route, Telemetry
+from api.stats import record_telemetries
+
+logger = logging.getLogger(__name__)
+
+
+class IngestQueueFull(Exception):
+    pass
+
+
+async def insert_telemetries(session: AsyncSession, rows: list[dict]):
+    ids = await session.scalars(
+        insert(Telemetry).returning(
+            Telemetry.id, sort_by_parameter_order=True
+        ),
+        rows,
+    )
+    ids = ids.all()
+    await record_telemetries(session, rows)
+    await notify_telemetries(session, rows, ids)
+
+    return ids
+
+
+class TelemetryIngestQueue:
+    """Write-behind buffer for telemetries.
+
+    Rows are flushed in batches of up to `batch_size`, or whatever has
+    arrived `flush_interval` seconds after the first row of a batch. A
+    failed flush is retried `retries` times, waiting `retry_backoff`
+    seconds doubled after each attempt.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        maxsize: int,
+        batch_size: int,
+        flush_interval: float,
+        put_timeout: float,
+        *,
+        retries: int,
+        retry_backoff: float,
+    ):
+        self._session_factory = session_factory
+        self._queue: asyncio.Queue[dict] = asyncio.Queue(maxsize)
+        self._task: asyncio.Task | None = None
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+
+        self.enqueued = self.rejected = 0
+        self.flushed = self.dropped = self.failed = self.retried = 0
+        self.batches = self.batch_size_max = 0
+        self.flush_seconds = self.flush_seconds_last = 0.0
+        self.flush_seconds_max = 0.0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def put(self, row: dict):
+        try:
+            await asyncio.wait_for(self._queue.put(row), self.put_timeout)
+        except TimeoutError:
+            self.rejected += 1
+            raise IngestQueueFull
+
+        self.enqueued += 1
+
+    async def drain(self):
+        await self._queue.join()
+
+    async def stop(self):
+        await self.drain()
+
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self._queue.get(), timeout)
+                    )
+                except TimeoutError:
+                    break
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[dict]):
+        start = time.perf_counter()
+
+        try:
+            written = await self._write_with_retries(batch)
+            if written is not None:
+                rows, ids = written
+                self.flushed += len(ids)
+                self.dropped += len(batch) - len(ids)
+
+                publish_telemetries(rows, ids)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+        elapsed = time.perf_counter() - start
+        self.batches += 1
+        self.batch_size_max = max(self.batch_size_max, len(batch))
+        self.flush_seconds += elapsed
+        self.flush_seconds_last = elapsed
+        self.flush_seconds_max = max(self.flush_seconds_max, elapsed)
+
+    async def _write_with_retries(
+        self, batch: list[dict]
+    ) -> tuple[list[dict], list] | None:
+        """Write the batch, retrying with exponential backoff.
+
+        The rows were already answered with 202, so a transient database
+        error must not lose them. None once every retry failed.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                return await self._write(batch)
+            except Exception:
+                if attempt == self.retries:
+                    logger.exception(
+                        'Failed to flush %d telemetries after %d attempts',
+                        len(batch),
+                        attempt + 1,
+                    )
+                    self.failed += len(batch)
+                    return None
+
+                logger.warning(
+                    'Failed to flush %d telemetries, retrying',
+                    len(batch),
+                    exc_info=True,
+                )
+                self.retried += 1
+                await asyncio.sleep(self.retry_backoff * 2**attempt)
+
+    async def _write(self, rows: list[dict]) -> tuple[list[dict], list]:
+        ids = []
+
+        async with self._session_factory() as session:
+            try:
+                ids = await insert_telemetries(session, rows)
+            except IntegrityError:
+                # a route was deleted while its telemetries were queued
+                await session.rollback()
+
+                route_ids = set(
+                    await session.scalars(
+                        select(Route.id).where(
+                            Route.id.in_({row['route_id'] for row in rows})
+                        )
+                    )
+                )
+                rows = [row for row in rows if row['route_id'] in route_ids]
+
+                if rows:
+                    ids = await insert_telemetries(session, rows)
+
+            await session.commit()
+
+        return rows, ids
+
+    def stats(self) -> dict:
+        return {
+            'depth': self._queue.qsize(),
+            'maxsize': self._queue.maxsize,
+            'enqueued': self.enqueued,
+            'rejected': self.rejected,
+            'flushed': self.flushed,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'retried': self.retried,
+            'batches': self.batches,
+            'batch_size_mean': (
+                (self.flushed + self.dropped + self.failed) / self.batches
+                if self.batches
+                else 0
+            ),
+            'batch_size_max': self.batch_size_max,
+            'flush_seconds_mean': (
+                self.flush_seconds / self.batches if self.batches else 0
+            ),
+            'flush_seconds_last': self.flush_seconds_last,
+            'flush_seconds_max': self.flush_seconds_max,
+        }
+
+
+def get_ingest_queue(request: Request) -> TelemetryIngestQueue | None:
+    return getattr(request.app.state, 'ingest_queue', None)
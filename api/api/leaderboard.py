@@ -0,0 +1,348 @@
+import asyncio
+import logging
+from bisect import bisect_left, insort
+from collections.abc import Iterable
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy import (
+    Float,
+    Integer,
+    String,
+    case,
+    column,
+    delete,
+    func,
+    or_,
+    select,
+    tuple_,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from api.models import Route, RouteLeaderboard, RouteStats
+from api.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# board -> whether higher values rank first
+BOARDS = {
+    # energy per meter over every run of the route
+    'efficient': False,
+    'failure_rate': True,
+    'most_run': True,
+}
+# the route_stats columns the boards are computed from
+STATS_COLUMNS = (
+    RouteStats.route_id,
+    RouteStats.count,
+    RouteStats.failed_count,
+    RouteStats.energy_consumed_sum,
+    RouteStats.distance_traveled_sum,
+)
+
+
+class Leaderboard:
+    """Every route's value, kept sorted so the first N are a slice.
+
+    Moving a route is a binary search and a list insert, reading the
+    first N costs O(N) whatever the number of routes or telemetries.
+    """
+
+    def __init__(self, descending: bool):
+        self.descending = descending
+        self._values: dict[int, float] = {}
+        # (sort key, route id), ties go to the oldest route
+        self._ranking: list[tuple[float, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def _key(self, route_id: int, value: float) -> tuple[float, int]:
+        return (-value if self.descending else value, route_id)
+
+    def set(self, route_id: int, value: float | None):
+        """Place the route at `value`, None takes it off the board."""
+        current = self._values.pop(route_id, None)
+        if current is not None:
+            del self._ranking[
+                bisect_left(self._ranking, self._key(route_id, current))
+            ]
+
+        if value is not None:
+            self._values[route_id] = value
+            insort(self._ranking, self._key(route_id, value))
+
+    def load(self, values: dict[int, float]):
+        self._values = dict(values)
+        self._ranking = sorted(
+            self._key(route_id, value) for route_id, value in values.items()
+        )
+
+    def top(self, limit: int) -> list[tuple[int, float]]:
+        return [
+            (route_id, self._values[route_id])
+            for _, route_id in self._ranking[:limit]
+        ]
+
+
+class Leaderboards:
+    """The boards of one worker, fed with fresh route_stats rows.
+
+    The first `size` routes of each board are kept in the
+    route_leaderboards table, which every worker serves and writes;
+    `update` returns the rows to change there.
+    """
+
+    def __init__(self, size: int, min_runs: int):
+        self.size = size
+        self.min_runs = min_runs
+        self.boards = {
+            name: Leaderboard(descending)
+            for name, descending in BOARDS.items()
+        }
+        self.updates = self.rebuilds = 0
+
+    def values(self, stats: Any) -> dict[str, float | None]:
+        # rates of routes with fewer runs than min_runs are left out
+        rated = stats.count >= max(self.min_runs, 1)
+
+        return {
+            'efficient': stats.energy_consumed_sum
+            / stats.distance_traveled_sum
+            if rated and stats.distance_traveled_sum > 0
+            else None,
+            'failure_rate': stats.failed_count / stats.count
+            if rated
+            else None,
+            'most_run': stats.count if stats.count > 0 else None,
+        }
+
+    def entries(self) -> dict[tuple[str, int], float]:
+        """The rows route_leaderboards should hold."""
+        return {
+            (name, route_id): value
+            for name, board in self.boards.items()
+            for route_id, value in board.top(self.size)
+        }
+
+    def load(self, rows: Iterable[Any]):
+        loaded = {name: {} for name in self.boards}
+        for row in rows:
+            for name, value in self.values(row).items():
+                if value is not None:
+                    loaded[name][row.route_id] = value
+
+        for name, board in self.boards.items():
+            board.load(loaded[name])
+        self.rebuilds += 1
+
+    def update(
+        self, rows: Iterable[Any], removed: Iterable[int] = ()
+    ) -> tuple[dict[tuple[str, int], float], set[tuple[str, int]]]:
+        """Move the routes of `rows` and take `removed` off every board.
+
+        Returns the route_leaderboards rows to upsert and to delete. The
+        routes just written are always among them, their values are
+        fresh while another worker may have stored older ones.
+        """
+        before = self.entries()
+        route_ids = set(removed)
+
+        for row in rows:
+            for name, value in self.values(row).items():
+                self.boards[name].set(row.route_id, value)
+            route_ids.add(row.route_id)
+        for route_id in removed:
+            for board in self.boards.values():
+                board.set(route_id, None)
+        self.updates += 1
+
+        after = self.entries()
+        written = {
+            (name, route_id) for name in BOARDS for route_id in route_ids
+        }
+        return (
+            {
+                key: value
+                for key, value in after.items()
+                if key in written or before.get(key) != value
+            },
+            (written | before.keys()) - after.keys(),
+        )
+
+    def top(self, board: str, limit: int) -> list[dict]:
+        return [
+            {'rank': rank, 'route_id': route_id, 'value': value}
+            for rank, (route_id, value) in enumerate(
+                self.boards[board].top(limit), start=1
+            )
+        ]
+
+    def clear(self):
+        for board in self.boards.values():
+            board.load({})
+
+    def stats(self) -> dict:
+        return {
+            'size': self.size,
+            'min_runs': self.min_runs,
+            'routes': {
+                name: len(board) for name, board in self.boards.items()
+            },
+            'updates': self.updates,
+            'rebuilds': self.rebuilds,
+        }
+
+
+@lru_cache
+def get_leaderboards() -> Leaderboards:
+    settings = get_settings()
+    return Leaderboards(
+        settings.LEADERBOARD_SIZE, settings.LEADERBOARD_MIN_RUNS
+    )
+
+
+def ranking() -> tuple:
+    """ORDER BY of route_leaderboards rows within their board."""
+    descending = [name for name, higher in BOARDS.items() if higher]
+    return (
+        case(
+            (RouteLeaderboard.board.in_(descending), -RouteLeaderboard.value),
+            else_=RouteLeaderboard.value,
+        ),
+        RouteLeaderboard.route_id,
+    )
+
+
+async def _save(
+    session: AsyncSession,
+    upserts: dict[tuple[str, int], float],
+    deletes: set[tuple[str, int]],
+):
+    key = tuple_(RouteLeaderboard.board, RouteLeaderboard.route_id)
+    conditions = []
+
+    if deletes:
+        conditions.append(key.in_(sorted(deletes)))
+
+    if upserts:
+        await _upsert(session, upserts)
+
+        # workers with different views of the other routes can leave a
+        # board longer than `size`, its last rows are dropped
+        ranked = select(
+            RouteLeaderboard.board,
+            RouteLeaderboard.route_id,
+            func
+            .row_number()
+            .over(partition_by=RouteLeaderboard.board, order_by=ranking())
+            .label('rank'),
+        )
+        if deletes:
+            ranked = ranked.where(key.not_in(sorted(deletes)))
+        ranked = ranked.subquery()
+        conditions.append(
+            key.in_(
+                select(ranked.c.board, ranked.c.route_id).where(
+                    ranked.c.rank > get_leaderboards().size
+                )
+            )
+        )
+
+    if conditions:
+        await session.execute(delete(RouteLeaderboard).where(or_(*conditions)))
+
+
+async def _upsert(
+    session: AsyncSession, upserts: dict[tuple[str, int], float]
+):
+    entries = values(
+        column('board', String),
+        column('route_id', Integer),
+        column('value', Float),
+        name='entries',
+    ).data([(*key, value) for key, value in upserts.items()])
+    # routes deleted by another worker are skipped rather than failing
+    # the foreign key: committed deletes by the join, ones in progress
+    # by skipping their locked rows; rows are locked in a fixed order
+    # against deadlocks
+    query = insert(RouteLeaderboard).from_select(
+        ['board', 'route_id', 'value'],
+        select(entries)
+        .join(Route, Route.id == entries.c.route_id)
+        .order_by(entries.c.board, entries.c.route_id)
+        .with_for_update(key_share=True, skip_locked=True, of=Route),
+    )
+    await session.execute(
+        query.on_conflict_do_update(
+            index_elements=[RouteLeaderboard.board, RouteLeaderboard.route_id],
+            set_={'value': query.excluded.value},
+        )
+    )
+
+
+async def track_routes(
+    session: AsyncSession, rows: Iterable[Any], removed: Iterable[int] = ()
+):
+    """Move routes whose route_stats just changed, in the same transaction.
+
+    `rows` carry the STATS_COLUMNS as stored now, a rolled back write
+    leaves this worker ahead until the route's next write or rebuild.
+    """
+    leaderboards = get_leaderboards()
+    if leaderboards.size <= 0:
+        return
+
+    await _save(session, *leaderboards.update(rows, removed))
+
+
+async def refresh_routes(session: AsyncSession, route_ids: Iterable[int]):
+    """`track_routes` for routes changed by a bulk statement."""
+    if get_leaderboards().size <= 0:
+        return
+
+    route_ids = set(route_ids)
+    rows = (
+        await session.execute(
+            select(*STATS_COLUMNS).where(RouteStats.route_id.in_(route_ids))
+        )
+    ).all()
+    await track_routes(
+        session, rows, route_ids - {row.route_id for row in rows}
+    )
+
+
+async def rebuild_leaderboards(session: AsyncSession):
+    """Rank every route from route_stats, without reading telemetries."""
+    leaderboards = get_leaderboards()
+    if leaderboards.size <= 0:
+        return
+
+    leaderboards.load((await session.execute(select(*STATS_COLUMNS))).all())
+    await session.execute(delete(RouteLeaderboard))
+    if entries := leaderboards.entries():
+        await _upsert(session, entries)
+
+
+async def load_leaderboards(engine: AsyncEngine):
+    async with AsyncSession(engine) as session:
+        await rebuild_leaderboards(session)
+        await session.commit()
+
+    logger.info(
+        'Loaded leaderboards of %s routes',
+        len(get_leaderboards().boards['most_run']),
+    )
+
+
+async def maintain_leaderboards(engine: AsyncEngine, interval: float):
+    # picks up what the other workers wrote since the last rebuild
+    while True:
+        await asyncio.sleep(interval)
+
+        try:
+            await load_leaderboards(engine)
+        except Exception:
+            logger.exception('Leaderboard rebuild failed')
@@ -0,0 +1,342 @@
+import logging
+import random
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from http import HTTPStatus
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from api.settings import get_settings
+
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RequestDB:
+    """Database work done by the request being served."""
+
+    __slots__ = ('scope', 'seconds', 'statements')
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.statements = 0
+        self.seconds = 0.0
+
+
+_request_db: ContextVar[RequestDB | None] = ContextVar(
+    'request_db', default=None
+)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, params, context, *args):
+    context._metrics_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, params, context, *args):
+    seconds = time.perf_counter() - context._metrics_start
+    _record_statement(seconds)
+
+    if 0 < get_settings().SLOW_QUERY_THRESHOLD <= seconds:
+        _log_slow_query(conn, statement, params, context, seconds)
+
+
+def _record_statement(seconds: float):
+    db = _request_db.get()
+
+    if db is not None:
+        db.statements += 1
+        db.seconds += seconds
+
+
+async def execute_driver(cursor, statement: str, params):
+    """Run a statement on a driver cursor, measured like engine ones.
+
+    Driver cursors bypass the engine events, so the statement is counted
+    toward the request and logged when slow here instead.
+    """
+    start = time.perf_counter()
+    await cursor.execute(statement, params)
+    seconds = time.perf_counter() - start
+    _record_statement(seconds)
+    settings = get_settings()
+
+    if 0 < settings.SLOW_QUERY_THRESHOLD <= seconds:
+        plan = None
+        if random.random() < settings.SLOW_QUERY_EXPLAIN_RATE:
+            # another cursor, this one still holds the results
+            plan = await _explain_driver(cursor.connection, statement, params)
+        _warn_slow_query(statement, params, seconds, plan)
+
+
+def _params_shape(params) -> str:
+    if isinstance(params, dict):
+        return str({
+            key: type(value).__name__ for key, value in params.items()
+        })
+
+    if isinstance(params, list):
+        return f'{len(params)} x {_params_shape(params[0]) if params else ""}'
+
+    return str([type(value).__name__ for value in params or ()])
+
+
+def _explain(conn, statement: str, params) -> str | None:
+    # raw DBAPI cursor, so neither these events nor the session see it
+    cursor = conn.connection.dbapi_connection.cursor()
+
+    try:
+        cursor.execute('SAVEPOINT slow_query_explain')
+    except Exception:  # e.g. autocommit connections
+        cursor.close()
+        return None
+
+    try:
+        cursor.execute(f'EXPLAIN {statement}', params)
+        plan = '\n'.join(row[0] for row in cursor.fetchall())
+        cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+    except Exception:
+        cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+        plan = None
+    finally:
+        cursor.close()
+
+    return plan
+
+
+async def _explain_driver(connection, statement: str, params) -> str | None:
+    async with connection.cursor() as cursor:
+        try:
+            await cursor.execute('SAVEPOINT slow_query_explain')
+        except Exception:  # e.g. autocommit connections
+            return None
+
+        try:
+            await cursor.execute(f'EXPLAIN {statement}', params)
+            plan = '\n'.join(row[0] for row in await cursor.fetchall())
+            await cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+        except Exception:
+            await cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            plan = None
+
+    return plan
+
+
+def _log_slow_query(conn, statement, params, context, seconds):
+    plan = None
+
+    if (
+        not context.executemany
+        and random.random() < get_settings().SLOW_QUERY_EXPLAIN_RATE
+    ):
+        plan = _explain(conn, statement, params)
+
+    _warn_slow_query(statement, params, seconds, plan)
+
+
+def _warn_slow_query(statement: str, params, seconds: float, plan):
+    db = _request_db.get()
+    route = db.scope.get('route') if db is not None else None
+
+    logger.warning(
+        'Slow query (%.1f ms) on %s: %s\nparams: %s\nplan:\n%s',
+        seconds * 1000,
+        route.path if route is not None else '-',
+        statement,
+        _params_shape(params),
+        plan or '-',
+    )
+
+
+class Histogram:
+    __slots__ = ('buckets', 'count', 'sum')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.buckets[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: str) -> list[str]:
+        lines, cumulative = [], 0
+
+        for bound, count in zip((*LATENCY_BUCKETS, '+Inf'), self.buckets):
+            cumulative += count
+            lines.append(
+                f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+            )
+
+        lines.append(f'{name}_sum{{{labels}}} {self.sum}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class EndpointMetrics:
+    __slots__ = ('db_latency', 'db_statements', 'latency', 'statuses')
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.db_latency = Histogram()
+        self.db_statements = 0
+        self.statuses: dict[int, int] = {}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.endpoints: dict[tuple[str, str], EndpointMetrics] = {}
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        db: RequestDB,
+    ):
+        metrics = self.endpoints.get((method, route))
+        if metrics is None:
+            metrics = self.endpoints[method, route] = EndpointMetrics()
+
+        metrics.latency.observe(seconds)
+        metrics.db_latency.observe(db.seconds)
+        metrics.db_statements += db.statements
+        metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+
+    def clear(self):
+        self.endpoints.clear()
+
+    def render(self) -> str:
+        requests = [
+            '# HELP http_requests_total Requests by route and status.',
+            '# TYPE http_requests_total counter',
+        ]
+        latency = [
+            '# HELP http_request_duration_seconds Time to the response start.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        db_latency = [
+            '# HELP http_request_db_duration_seconds Database time per '
+            'request.',
+            '# TYPE http_request_db_duration_seconds histogram',
+        ]
+        db_statements = [
+            '# HELP http_request_db_statements_total Statements executed.',
+            '# TYPE http_request_db_statements_total counter',
+        ]
+
+        for (method, route), metrics in sorted(self.endpoints.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+
+            for status, count in sorted(metrics.statuses.items()):
+                requests.append(
+                    f'http_requests_total{{{labels},status="{status}"}} '
+                    f'{count}'
+                )
+            latency += metrics.latency.lines(
+                'http_request_duration_seconds', labels
+            )
+            db_latency += metrics.db_latency.lines(
+                'http_request_db_duration_seconds', labels
+            )
+            db_statements.append(
+                f'http_request_db_statements_total{{{labels}}} '
+                f'{metrics.db_statements}'
+            )
+
+        return (
+            '\n'.join(requests + latency + db_latency + db_statements) + '\n'
+        )
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """Records latency, status and database time per route template.
+
+    Latency runs until the response starts, so streamed bodies such as
+    exports and the live event stream are not timed for as long as the
+    client keeps reading them; their database time is counted in full.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = HTTPStatus.INTERNAL_SERVER_ERROR
+        seconds = None
+
+        async def send_status(message):
+            nonlocal status, seconds
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                seconds = time.perf_counter() - start
+            await send(message)
+
+        db = RequestDB(scope)
+        token = _request_db.set(db)
+        start = time.perf_counter()
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            if seconds is None:
+                seconds = time.perf_counter() - start
+            _request_db.reset(token)
+
+            # set by the router once the request matched a route
+            route = scope.get('route')
+            self.registry.observe(
+                scope['method'],
+                route.path if route is not None else 'unmatched',
+                int(status),
+                seconds,
+                db,
+            )
+
+
+router = APIRouter(tags=['system'])
+
+
+@router.get(
+    '/metrics',
+    status_code=HTTPStatus.OK,
+    response_class=PlainTextResponse,
+)
+async def read_metrics():
+    return PlainTextResponse(
+        registry.render(), media_type='text/plain; version=0.0.4'
+    )
@@ -3,8 +3,27 @@ from __future__ import annotations
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import ForeignKey, func
-from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
+from sqlalchemy import (
+    ARRAY,
+    DDL,
+    ForeignKey,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+    event,
+    func,
+    text,
+)
+from sqlalchemy.orm import (
+    Mapped,
+    mapped_column,
+    registry,
+    relationship,
+    validates,
+)
+
+from api.commands import route_values
 
 table_registry = registry()
 
@@ -17,9 +36,21 @@ class StatusState(str, Enum):
 @table_registry.mapped_as_dataclass
 class Route:
     __tablename__ = 'routes'
+    __table_args__ = (Index('ix_routes_created_at_id', 'created_at', 'id'),)
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
-    commands: Mapped[str] = mapped_column(unique=True)
+    commands: Mapped[str]
+    commands_hash: Mapped[str] = mapped_column(
+        String(64), init=False, index=True, unique=True
+    )
+    opcodes: Mapped[list[int]] = mapped_column(ARRAY(SmallInteger), init=False)
+    arguments: Mapped[list[int]] = mapped_column(ARRAY(Integer), init=False)
+    step_count: Mapped[int] = mapped_column(init=False)
+    total_distance: Mapped[int] = mapped_column(init=False)
+    total_rotation: Mapped[int] = mapped_column(init=False)
+    final_x: Mapped[float] = mapped_column(init=False)
+    final_y: Mapped[float] = mapped_column(init=False)
+    final_heading: Mapped[int] = mapped_column(init=False)
     created_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now()
     )
@@ -28,21 +59,114 @@ class Route:
     )
 
     telemetries: Mapped[list[Telemetry]] = relationship(
-        init=False, cascade='all, delete-orphan', lazy='selectin'
+        init=False,
+        cascade='all, delete-orphan',
+        lazy='noload',
+        passive_deletes=True,
     )
 
+    @validates('commands')
+    def _parse_commands(self, key, commands):
+        for name, value in route_values(commands).items():
+            if name != key:
+                setattr(self, name, value)
+        return commands
+
 
 @table_registry.mapped_as_dataclass
 class Telemetry:
     __tablename__ = 'telemetries'
+    __table_args__ = (
+        Index('ix_telemetries_created_at_id', 'created_at', 'id'),
+        Index('ix_telemetries_route_id_created_at', 'route_id', 'created_at'),
+        # failed runs are a small slice that is listed on its own
+        Index(
+            'ix_telemetries_failed_route_id_created_at',
+            'route_id',
+            'created_at',
+            postgresql_where=text("status = 'failed'"),
+        ),
+        Index(
+            'ix_telemetries_failed_created_at_id',
+            'created_at',
+            'id',
+            postgresql_where=text("status = 'failed'"),
+        ),
+        # a route's telemetries sorted by energy, with keyset pagination
+        Index(
+            'ix_telemetries_route_id_energy_consumed_id',
+            'route_id',
+            'energy_consumed',
+            'id',
+        ),
+        # monthly partitions are managed by api.partitions
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
 
-    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    id: Mapped[int] = mapped_column(
+        init=False, primary_key=True, autoincrement=True
+    )
     average_speed: Mapped[float]
     distance_traveled: Mapped[float]
     energy_consumed: Mapped[float]
     average_current: Mapped[float]
     status: Mapped[StatusState]
     created_at: Mapped[datetime] = mapped_column(
-        init=False, server_default=func.now()
+        init=False, primary_key=True, server_default=func.now()
+    )
+    route_id: Mapped[int] = mapped_column(
+        ForeignKey('routes.id', ondelete='CASCADE')
+    )
+
+
+# rows outside every monthly partition land here
+event.listen(
+    Telemetry.__table__,
+    'after_create',
+    DDL('CREATE TABLE telemetries_default PARTITION OF telemetries DEFAULT'),
+)
+
+
+@table_registry.mapped_as_dataclass
+class RouteStats:
+    __tablename__ = 'route_stats'
+
+    route_id: Mapped[int] = mapped_column(
+        ForeignKey('routes.id', ondelete='CASCADE'), primary_key=True
+    )
+    count: Mapped[int] = mapped_column(default=0)
+    success_count: Mapped[int] = mapped_column(default=0)
+    failed_count: Mapped[int] = mapped_column(default=0)
+
+    average_speed_sum: Mapped[float] = mapped_column(default=0)
+    average_speed_sum_sq: Mapped[float] = mapped_column(default=0)
+    average_speed_min: Mapped[float | None] = mapped_column(default=None)
+    average_speed_max: Mapped[float | None] = mapped_column(default=None)
+
+    distance_traveled_sum: Mapped[float] = mapped_column(default=0)
+    distance_traveled_sum_sq: Mapped[float] = mapped_column(default=0)
+    distance_traveled_min: Mapped[float | None] = mapped_column(default=None)
+    distance_traveled_max: Mapped[float | None] = mapped_column(default=None)
+
+    energy_consumed_sum: Mapped[float] = mapped_column(default=0)
+    energy_consumed_sum_sq: Mapped[float] = mapped_column(default=0)
+    energy_consumed_min: Mapped[float | None] = mapped_column(default=None)
+    energy_consumed_max: Mapped[float | None] = mapped_column(default=None)
+
+    average_current_sum: Mapped[float] = mapped_column(default=0)
+    average_current_sum_sq: Mapped[float] = mapped_column(default=0)
+    average_current_min: Mapped[float | None] = mapped_column(default=None)
+    average_current_max: Mapped[float | None] = mapped_column(default=None)
+
+
+@table_registry.mapped_as_dataclass
+class RouteLeaderboard:
+    """The first routes of each leaderboard, see api.leaderboard."""
+
+    __tablename__ = 'route_leaderboards'
+
+    board: Mapped[str] = mapped_column(String(32), primary_key=True)
+    route_id: Mapped[int] = mapped_column(
+        ForeignKey('routes.id', ondelete='CASCADE'), primary_key=True
     )
-    route_id: Mapped[int] = mapped_column(ForeignKey('routes.id'))
+    value: Mapped[float]
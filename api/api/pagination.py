@@ -0,0 +1,66 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import Select, tuple_
+
+from api.schemas import FilterPage
+
+DEFAULT_SORT = 'created_at'
+
+
+def encode_cursor(value, id: int, sort: str = DEFAULT_SORT) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort, value, id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, sort: str = DEFAULT_SORT) -> tuple:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, value, id = json.loads(payload)
+        if cursor_sort != sort:
+            raise ValueError('Cursor of another sort')
+        if sort.removeprefix('-') == 'created_at':
+            return datetime.fromisoformat(value), int(id)
+        return float(value), int(id)
+    except (binascii.Error, TypeError, ValueError) as error:
+        raise ValueError('Invalid cursor') from error
+
+
+def paginate(
+    query: Select, model, filter: FilterPage, sort: str = DEFAULT_SORT
+) -> Select:
+    """Keyset pagination over (sort column, id).
+
+    `sort` is a column name, prefixed with '-' for descending order.
+    """
+    descending = sort.startswith('-')
+    column = getattr(model, sort.removeprefix('-'))
+
+    if descending:
+        query = query.order_by(column.desc(), model.id.desc())
+    else:
+        query = query.order_by(column, model.id)
+    query = query.limit(filter.limit)
+
+    if filter.cursor is None:
+        return query.offset(filter.offset)
+
+    key = tuple_(column, model.id)
+    bound = tuple_(*decode_cursor(filter.cursor, sort))
+
+    return query.where(key < bound if descending else key > bound)
+
+
+def next_cursor(
+    rows, filter: FilterPage, sort: str = DEFAULT_SORT
+) -> str | None:
+    if not rows or len(rows) < filter.limit:
+        return None
+
+    return encode_cursor(
+        getattr(rows[-1], sort.removeprefix('-')), rows[-1].id, sort
+    )
@@ -0,0 +1,211 @@
+import argparse
+import asyncio
+import logging
+import re
+from datetime import date
+
+from sqlalchemy import TableClause, column, table, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from api.database import get_engine
+from api.models import Telemetry
+from api.settings import get_settings
+from api.stats import forget_rows
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'telemetries'
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+_PARTITION_NAME = re.compile(rf'^{TABLE}_y(\d{{4}})m(\d{{2}})$')
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f'{TABLE}_y{month:%Y}m{month:%m}'
+
+
+def partition_month(name: str) -> date | None:
+    match = _PARTITION_NAME.match(name)
+    if match is None:
+        return None
+
+    return date(int(match[1]), int(match[2]), 1)
+
+
+def partition_table(name: str) -> TableClause:
+    """A telemetries partition, detached or not, with typed columns."""
+    return table(name, *(column(c.key, c.type) for c in Telemetry.__table__.c))
+
+
+def month_bounds(month: date) -> str:
+    return f"created_at >= '{month}' AND created_at < '{add_months(month, 1)}'"
+
+
+def create_partition_sql(month: date) -> list[str]:
+    """Statements that add the partition holding `month`.
+
+    The partition is filled from the default partition before being
+    attached, otherwise Postgres refuses to attach a range the default
+    partition already has rows for.
+    """
+    name = partition_name(month)
+    bounds = month_bounds(month)
+
+    return [
+        f'CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)',
+        f'INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {bounds}',
+        f'DELETE FROM {DEFAULT_PARTITION} WHERE {bounds}',
+        f'ALTER TABLE {TABLE} ATTACH PARTITION {name} '
+        f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')",
+    ]
+
+
+async def partitions(conn: AsyncConnection) -> dict[date, str]:
+    names = await conn.scalars(
+        text(
+            'SELECT c.relname FROM pg_inherits i '
+            'JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = CAST(:table AS regclass)'
+        ),
+        {'table': TABLE},
+    )
+
+    return {
+        month: name
+        for name in names
+        if (month := partition_month(name)) is not None
+    }
+
+
+async def _lock(conn: AsyncConnection):
+    # serializes maintenance between workers running it at the same time
+    await conn.execute(
+        text('SELECT pg_advisory_xact_lock(hashtext(:table))'),
+        {'table': TABLE},
+    )
+
+
+async def ensure_partitions(
+    engine: AsyncEngine, months_ahead: int, today: date | None = None
+) -> list[str]:
+    """Create monthly partitions from this month to `months_ahead`."""
+    current = (today or date.today()).replace(day=1)
+    created = []
+
+    async with engine.begin() as conn:
+        await _lock(conn)
+        existing = await partitions(conn)
+
+        for months in range(months_ahead + 1):
+            month = add_months(current, months)
+            if month in existing:
+                continue
+
+            for statement in create_partition_sql(month):
+                await conn.execute(text(statement))
+            created.append(partition_name(month))
+
+    return created
+
+
+async def apply_retention(
+    engine: AsyncEngine,
+    keep_months: int,
+    detach: bool = False,
+    today: date | None = None,
+) -> list[str]:
+    """Drop, or only detach, partitions older than `keep_months`.
+
+    Rows older than the first monthly partition live in the default
+    partition and are not touched. The removed rows are taken out of
+    route_stats, which only describes telemetries in the table.
+    """
+    cutoff = add_months((today or date.today()).replace(day=1), -keep_months)
+    removed = []
+
+    async with engine.begin() as conn, AsyncSession(bind=conn) as session:
+        await _lock(conn)
+
+        for month, name in sorted((await partitions(conn)).items()):
+            if month >= cutoff:
+                continue
+
+            await conn.execute(
+                text(f'ALTER TABLE {TABLE} DETACH PARTITION {name}')
+            )
+            await forget_rows(session, partition_table(name))
+            if not detach:
+                await conn.execute(text(f'DROP TABLE {name}'))
+            removed.append(name)
+
+    return removed
+
+
+async def maintain_partitions(
+    engine: AsyncEngine,
+    months_ahead: int,
+    keep_months: int,
+    interval: float,
+):
+    while True:
+        try:
+            created = await ensure_partitions(engine, months_ahead)
+            removed = (
+                await apply_retention(engine, keep_months)
+                if keep_months
+                else []
+            )
+        except Exception:
+            logger.exception('Telemetry partition maintenance failed')
+        else:
+            if created or removed:
+                logger.info(
+                    'Created partitions %s, removed %s', created, removed
+                )
+
+        await asyncio.sleep(interval)
+
+
+async def main(args):
+    engine = get_engine()
+
+    if args.command == 'ensure':
+        names = await ensure_partitions(engine, args.months_ahead)
+        print(f'created: {", ".join(names) or "-"}')
+    else:
+        names = await apply_retention(engine, args.keep_months, args.detach)
+        print(f'{"detached" if args.detach else "dropped"}: ', end='')
+        print(', '.join(names) or '-')
+
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Maintain the monthly telemetries partitions'
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ensure = commands.add_parser('ensure', help='create future partitions')
+    ensure.add_argument(
+        '--months-ahead',
+        type=int,
+        default=get_settings().TELEMETRY_PARTITION_MONTHS_AHEAD,
+    )
+
+    retention = commands.add_parser(
+        'retention', help='remove partitions older than --keep-months'
+    )
+    retention.add_argument('--keep-months', type=int, required=True)
+    retention.add_argument(
+        '--detach',
+        action='store_true',
+        help='keep the old partitions as standalone tables',
+    )
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,99 @@
+from sqlalchemy import Delete, Select, func, literal_column, select
+
+from api.models import Route, Telemetry
+from api.pagination import paginate
+from api.schemas import (
+    FilterPage,
+    TelemetryAggregate,
+    TelemetryConditions,
+    TelemetryFilter,
+    TelemetryRange,
+)
+from api.serialization import route_page, telemetry_page
+from api.stats import METRICS
+
+
+def filter_telemetries(
+    query: Select | Delete, filter: TelemetryRange
+) -> Select | Delete:
+    if filter.route_id is not None:
+        query = query.where(Telemetry.route_id == filter.route_id)
+    if filter.start is not None:
+        query = query.where(Telemetry.created_at >= filter.start)
+    if filter.end is not None:
+        query = query.where(Telemetry.created_at < filter.end)
+
+    return query
+
+
+def filter_conditions(
+    query: Select | Delete, filter: TelemetryConditions
+) -> Select | Delete:
+    query = filter_telemetries(query, filter)
+
+    if filter.status is not None:
+        query = query.where(Telemetry.status == filter.status)
+    for metric in METRICS:
+        column = getattr(Telemetry, metric)
+        low = getattr(filter, f'min_{metric}')
+        high = getattr(filter, f'max_{metric}')
+        if low is not None:
+            query = query.where(column >= low)
+        if high is not None:
+            query = query.where(column <= high)
+
+    return query
+
+
+def route_page_query(filter: FilterPage) -> Select:
+    return paginate(
+        select(*route_page.columns(Route), Route.created_at), Route, filter
+    )
+
+
+def telemetry_page_query(filter: TelemetryFilter) -> Select:
+    return paginate(
+        filter_conditions(
+            select(*telemetry_page.columns(Telemetry), Telemetry.created_at),
+            filter,
+        ),
+        Telemetry,
+        filter,
+        filter.sort,
+    )
+
+
+def aggregate_query(filter: TelemetryAggregate) -> Select:
+    bucket = func.date_trunc(
+        literal_column(f"'{filter.bucket}'"), Telemetry.created_at
+    ).label('bucket')
+
+    columns = [bucket, func.count().label('count')]
+    for metric in METRICS:
+        column = getattr(Telemetry, metric)
+        columns += [
+            func.sum(column).label(f'{metric}_total'),
+            func.avg(column).label(f'{metric}_mean'),
+            func.min(column).label(f'{metric}_min'),
+            func.max(column).label(f'{metric}_max'),
+        ]
+
+    return (
+        filter_telemetries(select(*columns), filter)
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+
+
+def bucket_public(row) -> dict:
+    return {
+        'bucket': row.bucket,
+        'count': row.count,
+        **{
+            metric: {
+                field: row._mapping[f'{metric}_{field}']
+                for field in ('total', 'mean', 'min', 'max')
+            }
+            for metric in METRICS
+        },
+    }
@@ -0,0 +1,53 @@
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.analytics import efficiency, fetch_columns, outliers
+from api.archive import get_archive
+from api.database import get_read_session
+from api.schemas import (
+    EfficiencyReport,
+    OutlierFilter,
+    OutlierReport,
+    TelemetryRange,
+)
+
+router = APIRouter(prefix='/analytics', tags=['analytics'])
+
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+
+
+@router.get(
+    '/efficiency',
+    status_code=HTTPStatus.OK,
+    response_model=EfficiencyReport,
+    response_class=JSONResponse,
+)
+async def read_efficiency(
+    session: ReadSession, filter: Annotated[TelemetryRange, Query()]
+):
+    columns = await fetch_columns(
+        await session.connection(), get_archive(), filter
+    )
+
+    return await run_in_threadpool(efficiency, columns)
+
+
+@router.get(
+    '/outliers',
+    status_code=HTTPStatus.OK,
+    response_model=OutlierReport,
+    response_class=JSONResponse,
+)
+async def read_outliers(
+    session: ReadSession, filter: Annotated[OutlierFilter, Query()]
+):
+    columns = await fetch_columns(
+        await session.connection(), get_archive(), filter
+    )
+
+    return await run_in_threadpool(outliers, columns, filter)
@@ -0,0 +1,50 @@
+from http import HTTPStatus
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.database import get_read_session
+from api.leaderboard import get_leaderboards, ranking
+from api.models import RouteLeaderboard
+from api.schemas import LeaderboardFilter, LeaderboardPublic
+
+router = APIRouter(prefix='/leaderboards', tags=['leaderboards'])
+
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+
+
+@router.get(
+    '/{board}',
+    status_code=HTTPStatus.OK,
+    response_model=LeaderboardPublic,
+    response_class=JSONResponse,
+)
+async def read_leaderboard(
+    board: Literal['efficient', 'failure_rate', 'most_run'],
+    session: ReadSession,
+    filter: Annotated[LeaderboardFilter, Query()],
+):
+    if get_leaderboards().size <= 0:
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail='Leaderboards disabled',
+        )
+
+    # the stored first routes of the board, shared by every worker
+    rows = await session.execute(
+        select(RouteLeaderboard.route_id, RouteLeaderboard.value)
+        .where(RouteLeaderboard.board == board)
+        .order_by(*ranking())
+        .limit(filter.limit)
+    )
+
+    return {
+        'board': board,
+        'routes': [
+            {'rank': rank, 'route_id': route_id, 'value': value}
+            for rank, (route_id, value) in enumerate(rows, start=1)
+        ],
+    }
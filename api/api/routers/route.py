@@ -1,26 +1,50 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import JSONResponse
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from api.database import get_session
-from api.models import Route
+from api.archive import get_archive
+from api.broadcast import get_broadcaster, live_events
+from api.cache import (
+    cache_route,
+    forget_route,
+    get_route_cache,
+    get_route_hash_cache,
+    notify_route_change,
+    public_route,
+)
+from api.commands import route_values
+from api.database import get_read_session, get_session
+from api.leaderboard import track_routes
+from api.models import Route, RouteStats, Telemetry
+from api.pagination import next_cursor, paginate
+from api.queries import route_page_query
 from api.schemas import (
     FilterPage,
     Message,
+    RouteFilter,
     RoutePublic,
     RoutePublicList,
     RouteSchema,
+    RouteStatsList,
+    RouteStatsPublic,
+    RouteTelemetriesPublic,
+    TelemetryConditions,
 )
+from api.serialization import route_page
+from api.settings import get_settings
+from api.stats import stats_public
 
 router = APIRouter(prefix='/routes', tags=['routes'])
 
 Filter = Annotated[FilterPage, Query()]
 Session = Annotated[AsyncSession, Depends(get_session)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
 
 
 @router.get(
@@ -29,31 +53,174 @@ Session = Annotated[AsyncSession, Depends(get_session)]
     response_model=RoutePublicList,
     response_class=JSONResponse,
 )
-async def read_routes(session: Session, filter: Filter):
-    routes = await session.scalars(
-        select(Route).limit(filter.limit).offset(filter.offset)
+async def read_routes(session: ReadSession, filter: Filter):
+    try:
+        query = route_page_query(filter)
+    except ValueError:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor'
+        )
+
+    routes = (await session.execute(query)).all()
+
+    return route_page.response(routes, next_cursor(routes, filter))
+
+
+def _select_stats():
+    return select(Route.id, RouteStats).outerjoin(
+        RouteStats, RouteStats.route_id == Route.id
+    )
+
+
+@router.get(
+    '/stats',
+    status_code=HTTPStatus.OK,
+    response_model=RouteStatsList,
+    response_class=JSONResponse,
+)
+async def read_routes_stats(session: Session, filter: Filter):
+    rows = await session.execute(
+        _select_stats()
+        .order_by(Route.id)
+        .limit(filter.limit)
+        .offset(filter.offset)
     )
 
-    return {'routes': routes}
+    return {'stats': [stats_public(*row) for row in rows]}
 
 
 @router.get(
-    '/{route_id}',
+    '/{route_id}/stats',
     status_code=HTTPStatus.OK,
-    response_model=RoutePublic,
+    response_model=RouteStatsPublic,
     response_class=JSONResponse,
 )
-async def read_route(route_id: int, session: Session):
-    db_route = await session.scalar(select(Route).where(Route.id == route_id))
+async def read_route_stats(route_id: int, session: Session):
+    row = (
+        await session.execute(_select_stats().where(Route.id == route_id))
+    ).first()
 
-    if db_route:
-        return db_route
+    if row:
+        return stats_public(*row)
 
     raise HTTPException(
         status_code=HTTPStatus.NOT_FOUND, detail='Route not found'
     )
 
 
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if if_none_match is None:
+        return False
+
+    return any(
+        tag.strip().removeprefix('W/') in {etag, '*'}
+        for tag in if_none_match.split(',')
+    )
+
+
+@router.get(
+    '/{route_id}',
+    status_code=HTTPStatus.OK,
+    response_model=RoutePublic | RouteTelemetriesPublic,
+    response_class=JSONResponse,
+)
+async def read_route(
+    route_id: int,
+    session: ReadSession,
+    filter: Annotated[RouteFilter, Query()],
+    response: Response,
+    if_none_match: Annotated[str | None, Header()] = None,
+):
+    route_cache = get_route_cache()
+    cached = route_cache.get(route_id)
+
+    if cached is None:
+        # an update committed while the route loads leaves it uncached
+        generation = route_cache.generation(route_id)
+        db_route = await session.scalar(
+            select(Route).where(Route.id == route_id)
+        )
+
+        if db_route is None:
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND, detail='Route not found'
+            )
+
+        # a lagging replica could put back a route just invalidated
+        cached = (
+            public_route(db_route)
+            if session.info.get('replica')
+            else cache_route(db_route, generation)
+        )
+
+    route, etag = cached
+
+    if filter.include is None:
+        if _etag_matches(if_none_match, etag):
+            return Response(
+                status_code=HTTPStatus.NOT_MODIFIED, headers={'ETag': etag}
+            )
+
+        response.headers['ETag'] = etag
+        return route
+
+    try:
+        query = paginate(
+            select(Telemetry).where(Telemetry.route_id == route_id),
+            Telemetry,
+            filter,
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor'
+        )
+
+    telemetries = (await session.scalars(query)).all()
+
+    return RouteTelemetriesPublic(
+        **route.model_dump(),
+        telemetries=telemetries,
+        next_cursor=next_cursor(telemetries, filter),
+    )
+
+
+@router.get(
+    '/{route_id}/telemetries/live',
+    status_code=HTTPStatus.OK,
+    response_class=StreamingResponse,
+)
+async def live_telemetries(route_id: int, session: Session):
+    route_cache = get_route_cache()
+    if route_cache.get(route_id) is None:
+        generation = route_cache.generation(route_id)
+        db_route = await session.scalar(
+            select(Route).where(Route.id == route_id)
+        )
+
+        if db_route is None:
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND, detail='Route not found'
+            )
+
+        cache_route(db_route, generation)
+
+    # the request does not need its connection while streaming
+    await session.close()
+
+    async def events():
+        with get_broadcaster().subscribe(route_id) as subscription:
+            async for event in live_events(
+                subscription, get_settings().LIVE_KEEPALIVE
+            ):
+                yield event
+
+    return StreamingResponse(
+        events(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache'},
+    )
+
+
 @router.post(
     '/',
     status_code=HTTPStatus.CREATED,
@@ -61,22 +228,35 @@ async def read_route(route_id: int, session: Session):
     response_class=JSONResponse,
 )
 async def create_route(route: RouteSchema, session: Session):
+    try:
+        values = route_values(route.commands)
+    except ValueError:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail='Invalid commands',
+        )
+
+    if get_route_hash_cache().get(values['commands_hash']) is not None:
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT, detail='Route already exists'
+        )
+
     db_route = await session.scalar(
-        select(Route).where(Route.commands == route.commands)
+        insert(Route)
+        .values(values)
+        .on_conflict_do_nothing(index_elements=[Route.commands_hash])
+        .returning(Route)
     )
 
-    if db_route:
+    if db_route is None:
         raise HTTPException(
             status_code=HTTPStatus.CONFLICT, detail='Route already exists'
         )
 
-    new_route = Route(commands=route.commands)
-
-    session.add(new_route)
     await session.commit()
-    await session.refresh(new_route)
+    cache_route(db_route)
 
-    return new_route
+    return db_route
 
 
 @router.put(
@@ -89,12 +269,23 @@ async def update_route(route_id: int, route: RouteSchema, session: Session):
     db_route = await session.scalar(select(Route).where(Route.id == route_id))
 
     if db_route:
+        commands_hash = db_route.commands_hash
+
         try:
             db_route.commands = route.commands
+        except ValueError:
+            raise HTTPException(
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                detail='Invalid commands',
+            )
 
+        try:
+            await notify_route_change(session, route_id, commands_hash)
             await session.commit()
             await session.refresh(db_route)
 
+            forget_route(route_id, commands_hash)
+
             return db_route
 
         except IntegrityError:
@@ -114,11 +305,23 @@ async def update_route(route_id: int, route: RouteSchema, session: Session):
     response_class=JSONResponse,
 )
 async def delete_route(route_id: int, session: Session):
-    db_route = await session.scalar(select(Route).where(Route.id == route_id))
+    # telemetries and route_stats go with it through ON DELETE CASCADE
+    db_route = (
+        await session.execute(
+            delete(Route)
+            .where(Route.id == route_id)
+            .returning(Route.id, Route.commands_hash)
+        )
+    ).first()
 
     if db_route:
-        await session.delete(db_route)
+        await track_routes(session, [], [route_id])
+        await notify_route_change(session, route_id, db_route.commands_hash)
         await session.commit()
+
+        forget_route(route_id, db_route.commands_hash)
+        await get_archive().delete(TelemetryConditions(route_id=route_id))
+
         return {'message': 'Route deleted'}
 
     raise HTTPException(
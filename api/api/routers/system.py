@@ -0,0 +1,88 @@
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
+
+from api.archive import get_archive
+from api.broadcast import get_broadcaster
+from api.cache import get_route_cache, get_route_hash_cache
+from api.database import get_engine, get_replicas, pool_status
+from api.ingest import TelemetryIngestQueue, get_ingest_queue
+from api.leaderboard import get_leaderboards
+
+router = APIRouter(prefix='/system', tags=['system'])
+
+
+@router.get(
+    '/cache',
+    status_code=HTTPStatus.OK,
+    response_class=JSONResponse,
+)
+async def read_cache():
+    return {
+        'routes': get_route_cache().stats(),
+        'route_hashes': get_route_hash_cache().stats(),
+    }
+
+
+@router.get(
+    '/pool',
+    status_code=HTTPStatus.OK,
+    response_class=JSONResponse,
+)
+async def read_pool():
+    return pool_status(get_engine())
+
+
+@router.get(
+    '/replicas',
+    status_code=HTTPStatus.OK,
+    response_class=JSONResponse,
+)
+async def read_replicas():
+    return get_replicas().stats()
+
+
+@router.get(
+    '/ingest',
+    status_code=HTTPStatus.OK,
+    response_class=JSONResponse,
+)
+async def read_ingest(
+    queue: Annotated[TelemetryIngestQueue | None, Depends(get_ingest_queue)],
+):
+    if queue is None:
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail='Ingest queue disabled',
+        )
+
+    return queue.stats()
+
+
+@router.get(
+    '/live',
+    status_code=HTTPStatus.OK,
+    response_class=JSONResponse,
+)
+async def read_live():
+    return get_broadcaster().stats()
+
+
+@router.get(
+    '/archive',
+    status_code=HTTPStatus.OK,
+    response_class=JSONResponse,
+)
+async def read_archive():
+    return get_archive().stats()
+
+
+@router.get(
+    '/leaderboards',
+    status_code=HTTPStatus.OK,
+    response_class=JSONResponse,
+)
+async def read_leaderboards():
+    return get_leaderboards().stats()
@@ -2,25 +2,59 @@ from http import HTTPStatus
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import JSONResponse
-from sqlalchemy import select
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from api.database import get_session
+from api.archive import get_archive, merge_buckets
+from api.broadcast import notify_telemetries, publish_telemetries
+from api.cache import get_route_cache
+from api.database import get_read_session, get_session
+from api.export import MEDIA_TYPES, export_query, stream_telemetries
+from api.ingest import (
+    IngestQueueFull,
+    TelemetryIngestQueue,
+    get_ingest_queue,
+    insert_telemetries,
+)
 from api.models import Route, Telemetry
+from api.pagination import next_cursor
+from api.queries import (
+    aggregate_query,
+    bucket_public,
+    filter_conditions,
+    filter_telemetries,
+    telemetry_page_query,
+)
 from api.schemas import (
-    FilterPage,
     Message,
+    TelemetryAggregate,
+    TelemetryBatch,
+    TelemetryBatchPublic,
+    TelemetryBucketList,
+    TelemetryConditions,
+    TelemetryDeleted,
+    TelemetryExport,
+    TelemetryFilter,
     TelemetryPublic,
     TelemetryPublicList,
+    TelemetryRouteBatch,
     TelemetrySchema,
 )
+from api.serialization import telemetry_page
+from api.stats import (
+    forget_telemetries,
+    forget_telemetry,
+    record_telemetries,
+)
 
 router = APIRouter(prefix='/telemetries', tags=['telemetries'])
 
 
-Filter = Annotated[FilterPage, Query()]
+Filter = Annotated[TelemetryFilter, Query()]
 Session = Annotated[AsyncSession, Depends(get_session)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+IngestQueue = Annotated[TelemetryIngestQueue | None, Depends(get_ingest_queue)]
 
 
 @router.get(
@@ -29,12 +63,89 @@ Session = Annotated[AsyncSession, Depends(get_session)]
     response_model=TelemetryPublicList,
     response_class=JSONResponse,
 )
-async def read_telemetries(session: Session, filter: Filter):
-    telemetries = await session.scalars(
-        select(Telemetry).limit(filter.limit).offset(filter.offset)
+async def read_telemetries(session: ReadSession, filter: Filter):
+    try:
+        query = telemetry_page_query(filter)
+    except ValueError:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor'
+        )
+
+    telemetries = (await session.execute(query)).all()
+
+    return telemetry_page.response(
+        telemetries, next_cursor(telemetries, filter, filter.sort)
     )
 
-    return {'telemetries': telemetries}
+
+@router.get(
+    '/export',
+    status_code=HTTPStatus.OK,
+    response_class=StreamingResponse,
+)
+async def export_telemetries(
+    session: Session, filter: Annotated[TelemetryExport, Query()]
+):
+    query = filter_telemetries(export_query(), filter)
+
+    return StreamingResponse(
+        stream_telemetries(
+            session,
+            query,
+            filter.format,
+            archived=get_archive().export(filter),
+        ),
+        media_type=MEDIA_TYPES[filter.format],
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename=telemetries.{filter.format}'
+            )
+        },
+    )
+
+
+@router.get(
+    '/aggregate',
+    status_code=HTTPStatus.OK,
+    response_model=TelemetryBucketList,
+    response_class=JSONResponse,
+)
+async def aggregate_telemetries(
+    session: Session, filter: Annotated[TelemetryAggregate, Query()]
+):
+    rows = await session.execute(aggregate_query(filter))
+
+    return {
+        'buckets': merge_buckets(
+            get_archive().aggregate(filter),
+            [bucket_public(row) for row in rows],
+        )
+    }
+
+
+@router.delete(
+    '/',
+    status_code=HTTPStatus.OK,
+    response_model=TelemetryDeleted,
+    response_class=JSONResponse,
+)
+async def delete_telemetries(
+    session: Session, filter: Annotated[TelemetryConditions, Query()]
+):
+    if all(
+        getattr(filter, name) is None
+        for name in TelemetryConditions.model_fields
+    ):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='At least one filter is required',
+        )
+
+    query = filter_conditions(delete(Telemetry), filter)
+    deleted = await forget_telemetries(session, query)
+    await session.commit()
+
+    return {'deleted': deleted + await get_archive().delete(filter)}
 
 
 @router.get(
@@ -43,7 +154,7 @@ async def read_telemetries(session: Session, filter: Filter):
     response_model=TelemetryPublic,
     response_class=JSONResponse,
 )
-async def read_telemetry(telemetry_id: int, session: Session):
+async def read_telemetry(telemetry_id: int, session: ReadSession):
     db_telemetry = await session.scalar(
         select(Telemetry).where(Telemetry.id == telemetry_id)
     )
@@ -51,11 +162,111 @@ async def read_telemetry(telemetry_id: int, session: Session):
     if db_telemetry:
         return db_telemetry
 
+    archived = get_archive().get(telemetry_id)
+    if archived:
+        return archived._asdict()
+
     raise HTTPException(
         status_code=HTTPStatus.NOT_FOUND, detail='Telemetry not found'
     )
 
 
+@router.post(
+    '/batch',
+    status_code=HTTPStatus.CREATED,
+    response_model=TelemetryBatchPublic,
+    response_class=JSONResponse,
+)
+async def create_telemetries(batch: TelemetryRouteBatch, session: Session):
+    rows = [telemetry.model_dump() for telemetry in batch.telemetries]
+    route_ids = {row['route_id'] for row in rows}
+
+    db_route_ids = await session.scalars(
+        select(Route.id).where(Route.id.in_(route_ids))
+    )
+
+    if len(db_route_ids.all()) < len(route_ids):
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='Route not found'
+        )
+
+    ids = await insert_telemetries(session, rows)
+    await session.commit()
+    publish_telemetries(rows, ids)
+
+    return {'count': len(ids), 'ids': ids}
+
+
+@router.post(
+    '/{route_id}/batch',
+    status_code=HTTPStatus.CREATED,
+    response_model=TelemetryBatchPublic,
+    response_class=JSONResponse,
+)
+async def create_route_telemetries(
+    batch: TelemetryBatch, session: Session, route_id: int
+):
+    db_route = await session.scalar(
+        select(Route.id).where(Route.id == route_id)
+    )
+
+    if db_route:
+        rows = [
+            {**telemetry.model_dump(), 'route_id': route_id}
+            for telemetry in batch.telemetries
+        ]
+
+        ids = await insert_telemetries(session, rows)
+        await session.commit()
+        publish_telemetries(rows, ids)
+
+        return {'count': len(ids), 'ids': ids}
+
+    raise HTTPException(
+        status_code=HTTPStatus.NOT_FOUND, detail='Route not found'
+    )
+
+
+@router.post(
+    '/{route_id}/queue',
+    status_code=HTTPStatus.ACCEPTED,
+    response_model=Message,
+    response_class=JSONResponse,
+)
+async def enqueue_telemetry(
+    telemetry: TelemetrySchema,
+    session: Session,
+    queue: IngestQueue,
+    route_id: int,
+):
+    if queue is None:
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail='Ingest queue disabled',
+        )
+
+    if get_route_cache().get(route_id) is None:
+        db_route = await session.scalar(
+            select(Route.id).where(Route.id == route_id)
+        )
+
+        if db_route is None:
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND, detail='Route not found'
+            )
+
+    try:
+        await queue.put({**telemetry.model_dump(), 'route_id': route_id})
+    except IngestQueueFull:
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail='Ingest queue full',
+            headers={'Retry-After': '1'},
+        )
+
+    return {'message': 'Telemetry accepted'}
+
+
 @router.post(
     '/{route_id}',
     status_code=HTTPStatus.CREATED,
@@ -65,7 +276,9 @@ async def read_telemetry(telemetry_id: int, session: Session):
 async def create_telemetry(
     telemetry: TelemetrySchema, session: Session, route_id: int
 ):
-    db_route = await session.scalar(select(Route).where(Route.id == route_id))
+    db_route = await session.scalar(
+        select(Route.id).where(Route.id == route_id)
+    )
 
     if db_route:
         new_telemetry = Telemetry(
@@ -77,9 +290,15 @@ async def create_telemetry(
             route_id=route_id,
         )
 
+        rows = [{**telemetry.model_dump(), 'route_id': route_id}]
+
         session.add(new_telemetry)
+        await record_telemetries(session, rows)
+        await session.flush()
+        await notify_telemetries(session, rows, [new_telemetry.id])
         await session.commit()
         await session.refresh(new_telemetry)
+        publish_telemetries(rows, [new_telemetry.id])
 
         return new_telemetry
 
@@ -100,10 +319,14 @@ async def delete_telemetry(telemetry_id: int, session: Session):
     )
 
     if db_telemetry:
+        await forget_telemetry(session, db_telemetry)
         await session.delete(db_telemetry)
         await session.commit()
         return {'message': 'Telemetry deleted'}
 
+    if await get_archive().delete_id(telemetry_id):
+        return {'message': 'Telemetry deleted'}
+
     raise HTTPException(
         status_code=HTTPStatus.NOT_FOUND, detail='Telemetry not found'
     )
@@ -1,7 +1,13 @@
+from datetime import datetime
+from typing import Literal
+
 from pydantic import BaseModel, ConfigDict, Field
 
 from api.models import StatusState
 
+MAX_BATCH_SIZE = 10_000
+MAX_PAGE_SIZE = 10_000
+
 
 class RouteSchema(BaseModel):
     commands: str
@@ -9,11 +15,20 @@ class RouteSchema(BaseModel):
 
 class RoutePublic(RouteSchema):
     id: int
+    opcodes: list[int]
+    arguments: list[int]
+    step_count: int
+    total_distance: int
+    total_rotation: int
+    final_x: float
+    final_y: float
+    final_heading: int
     model_config = ConfigDict(from_attributes=True)
 
 
 class RoutePublicList(BaseModel):
     routes: list[RoutePublic]
+    next_cursor: str | None = None
 
 
 class TelemetrySchema(BaseModel):
@@ -31,6 +46,57 @@ class TelemetryPublic(TelemetrySchema):
 
 class TelemetryPublicList(BaseModel):
     telemetries: list[TelemetryPublic]
+    next_cursor: str | None = None
+
+
+class RouteTelemetriesPublic(RoutePublic):
+    telemetries: list[TelemetryPublic]
+    next_cursor: str | None = None
+
+
+class MetricStats(BaseModel):
+    total: float
+    mean: float | None
+    std: float | None
+    min: float | None
+    max: float | None
+
+
+class RouteStatsPublic(BaseModel):
+    route_id: int
+    count: int
+    success_count: int
+    failed_count: int
+    success_rate: float | None
+    average_speed: MetricStats
+    distance_traveled: MetricStats
+    energy_consumed: MetricStats
+    average_current: MetricStats
+
+
+class RouteStatsList(BaseModel):
+    stats: list[RouteStatsPublic]
+
+
+class TelemetryBatch(BaseModel):
+    telemetries: list[TelemetrySchema] = Field(
+        min_length=1, max_length=MAX_BATCH_SIZE
+    )
+
+
+class TelemetryRouteSchema(TelemetrySchema):
+    route_id: int
+
+
+class TelemetryRouteBatch(BaseModel):
+    telemetries: list[TelemetryRouteSchema] = Field(
+        min_length=1, max_length=MAX_BATCH_SIZE
+    )
+
+
+class TelemetryBatchPublic(BaseModel):
+    count: int
+    ids: list[int]
 
 
 class Message(BaseModel):
@@ -39,4 +105,155 @@ class Message(BaseModel):
 
 class FilterPage(BaseModel):
     offset: int = Field(ge=0, default=0)
-    limit: int = Field(ge=0, default=10)
+    limit: int = Field(ge=0, le=MAX_PAGE_SIZE, default=10)
+    cursor: str | None = None
+
+
+class RouteFilter(FilterPage):
+    include: Literal['telemetries'] | None = None
+
+
+class TelemetryRange(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    route_id: int | None = None
+    start: datetime | None = Field(default=None, alias='from')
+    end: datetime | None = Field(default=None, alias='to')
+
+
+class TelemetryExport(TelemetryRange):
+    format: Literal['ndjson', 'csv'] = 'ndjson'
+
+
+class TelemetryConditions(TelemetryRange):
+    status: StatusState | None = None
+    min_average_speed: float | None = None
+    max_average_speed: float | None = None
+    min_distance_traveled: float | None = None
+    max_distance_traveled: float | None = None
+    min_energy_consumed: float | None = None
+    max_energy_consumed: float | None = None
+    min_average_current: float | None = None
+    max_average_current: float | None = None
+
+
+TelemetrySort = Literal[
+    'created_at',
+    '-created_at',
+    'average_speed',
+    '-average_speed',
+    'distance_traveled',
+    '-distance_traveled',
+    'energy_consumed',
+    '-energy_consumed',
+    'average_current',
+    '-average_current',
+]
+
+
+class TelemetryFilter(FilterPage, TelemetryConditions):
+    sort: TelemetrySort = 'created_at'
+
+
+class TelemetryDeleted(BaseModel):
+    deleted: int
+
+
+class TelemetryAggregate(TelemetryRange):
+    bucket: Literal['hour', 'day', 'week'] = 'day'
+
+
+class MetricAggregate(BaseModel):
+    total: float
+    mean: float
+    min: float
+    max: float
+
+
+class TelemetryBucket(BaseModel):
+    bucket: datetime
+    count: int
+    average_speed: MetricAggregate
+    distance_traveled: MetricAggregate
+    energy_consumed: MetricAggregate
+    average_current: MetricAggregate
+
+
+class TelemetryBucketList(BaseModel):
+    buckets: list[TelemetryBucket]
+
+
+class OutlierFilter(TelemetryRange):
+    metric: Literal[
+        'energy_per_meter',
+        'average_speed',
+        'distance_traveled',
+        'energy_consumed',
+        'average_current',
+    ] = 'energy_per_meter'
+    method: Literal['zscore', 'iqr'] = 'zscore'
+    # runs are compared with their own route, or with the whole fleet
+    scope: Literal['route', 'fleet'] = 'route'
+    # |z| above it, or distance past the quartiles in IQRs; None is 3 for
+    # zscore and 1.5 for iqr, 0 flags every row off the mean or quartiles
+    threshold: float | None = Field(default=None, ge=0)
+    limit: int = Field(ge=0, le=MAX_PAGE_SIZE, default=100)
+
+
+class Efficiency(BaseModel):
+    count: int
+    failure_rate: float | None
+    energy_per_meter: float | None
+    speed_current_correlation: float | None
+
+
+class RouteEfficiency(Efficiency):
+    route_id: int
+
+
+class FleetEfficiency(Efficiency):
+    routes: int
+
+
+class EfficiencyReport(BaseModel):
+    fleet: FleetEfficiency
+    routes: list[RouteEfficiency]
+
+
+class Outlier(BaseModel):
+    id: int
+    route_id: int
+    value: float
+    score: float
+    failed: bool
+
+
+class FailureRates(BaseModel):
+    all: float | None
+    outliers: float | None
+
+
+class OutlierReport(BaseModel):
+    metric: str
+    method: str
+    scope: str
+    threshold: float
+    count: int
+    outlier_count: int
+    failure_rate: FailureRates
+    outliers: list[Outlier]
+
+
+class LeaderboardFilter(BaseModel):
+    limit: int = Field(ge=0, le=MAX_PAGE_SIZE, default=10)
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    route_id: int
+    value: float
+
+
+class LeaderboardPublic(BaseModel):
+    board: str
+    routes: list[LeaderboardEntry]
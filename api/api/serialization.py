@@ -0,0 +1,80 @@
+import json
+from collections.abc import Sequence
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+from api.schemas import RoutePublic, TelemetryPublic
+
+# Python switches floats to exponent notation outside this range, where
+# pydantic-core would write them differently (1e-05 vs 0.00001)
+_MIN_PLAIN_FLOAT = 1e-4
+_MAX_PLAIN_FLOAT = 1e16
+
+
+def _typed_dict(model: type[BaseModel]) -> type:
+    return TypedDict(
+        f'{model.__name__}Row',
+        {name: field.annotation for name, field in model.model_fields.items()},
+    )
+
+
+def _plain_float(value: float) -> bool:
+    value = abs(value)
+    return value == 0 or _MIN_PLAIN_FLOAT <= value < _MAX_PLAIN_FLOAT
+
+
+class PageSerializer:
+    """Serializes a page of column rows straight to JSON bytes.
+
+    The output is byte-for-byte what FastAPI renders for the equivalent
+    `response_model`, without building ORM objects or pydantic models
+    for each row.
+    """
+
+    def __init__(self, model: type[BaseModel], key: str):
+        self.key = key
+        self.fields = tuple(model.model_fields)
+        self._floats = [
+            index
+            for index, field in enumerate(model.model_fields.values())
+            if field.annotation is float
+        ]
+        self._adapter = TypeAdapter(
+            TypedDict(
+                f'{model.__name__}Page',
+                {key: list[_typed_dict(model)], 'next_cursor': str | None},
+            )
+        )
+
+    def columns(self, table) -> list:
+        return [getattr(table, name) for name in self.fields]
+
+    def dump_json(self, rows: Sequence, next_cursor: str | None) -> bytes:
+        content = {
+            self.key: [dict(zip(self.fields, row)) for row in rows],
+            'next_cursor': next_cursor,
+        }
+
+        if all(
+            _plain_float(row[index]) for row in rows for index in self._floats
+        ):
+            return self._adapter.dump_json(content)
+
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(',', ':'),
+        ).encode('utf-8')
+
+    def response(self, rows: Sequence, next_cursor: str | None) -> Response:
+        return Response(
+            self.dump_json(rows, next_cursor), media_type='application/json'
+        )
+
+
+route_page = PageSerializer(RoutePublic, 'routes')
+telemetry_page = PageSerializer(TelemetryPublic, 'telemetries')
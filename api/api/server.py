@@ -0,0 +1,39 @@
+import argparse
+import os
+
+import uvicorn
+
+from api.settings import get_settings
+
+
+def worker_count(workers: int) -> int:
+    return workers if workers > 0 else os.cpu_count() or 1
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(
+        description='Serve the API with uvicorn worker processes'
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=settings.WORKERS,
+        help='worker processes, 0 starts one per CPU',
+    )
+    args = parser.parse_args()
+
+    # every worker runs the app lifespan: its own pool, warmup and caches
+    uvicorn.run(
+        'api.app:app',
+        host=args.host,
+        port=args.port,
+        workers=worker_count(args.workers),
+        lifespan='on',
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,3 +9,73 @@ class Settings(BaseSettings):
     )
 
     DATABASE_URL: str
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30
+    DATABASE_POOL_RECYCLE: int = -1
+    DATABASE_POOL_PRE_PING: bool = False
+    # milliseconds, 0 leaves the server default
+    DATABASE_STATEMENT_TIMEOUT: int = 0
+    # executions before psycopg prepares a query, None disables it
+    DATABASE_PREPARE_THRESHOLD: int | None = 5
+    # JSON list of read replica URLs, e.g. '["postgresql+psycopg://..."]'
+    DATABASE_REPLICA_URLS: list[str] = []
+    # seconds a client's reads stay on the primary after it writes
+    DATABASE_REPLICA_STICKINESS: float = 5
+    # seconds a replica that failed to connect is skipped
+    DATABASE_REPLICA_RETRY: float = 30
+    # seconds, passed to libpq as connect_timeout
+    DATABASE_REPLICA_CONNECT_TIMEOUT: int = 2
+
+    # connections each worker opens and primes before serving, 0 disables
+    DATABASE_POOL_WARMUP: int = 0
+
+    # uvicorn worker processes of api.server, 0 starts one per CPU
+    WORKERS: int = 1
+
+    ROUTE_CACHE_SIZE: int = 1024
+    ROUTE_CACHE_TTL: float = 300
+    # most recent routes each worker loads into the cache at startup
+    ROUTE_CACHE_WARMUP: int = 0
+
+    INGEST_QUEUE_ENABLED: bool = False
+    INGEST_QUEUE_SIZE: int = 10_000
+    INGEST_BATCH_SIZE: int = 500
+    # seconds
+    INGEST_FLUSH_INTERVAL: float = 0.05
+    INGEST_PUT_TIMEOUT: float = 0.1
+    # retries of a failed flush, the wait doubles from INGEST_RETRY_BACKOFF
+    INGEST_FLUSH_RETRIES: int = 3
+    # seconds
+    INGEST_RETRY_BACKOFF: float = 0.1
+
+    LIVE_BUFFER_SIZE: int = 100
+    # seconds between SSE keepalive comments
+    LIVE_KEEPALIVE: float = 15
+    LIVE_NOTIFY_ENABLED: bool = False
+
+    # seconds, 0 disables the slow query log
+    SLOW_QUERY_THRESHOLD: float = 0.5
+    # fraction of slow queries logged with their EXPLAIN plan
+    SLOW_QUERY_EXPLAIN_RATE: float = 0.1
+
+    TELEMETRY_PARTITION_MONTHS_AHEAD: int = 3
+    # months of telemetries kept, 0 keeps every partition
+    TELEMETRY_RETENTION_MONTHS: int = 0
+    # seconds between partition maintenance runs, 0 disables it
+    TELEMETRY_PARTITION_INTERVAL: float = 0
+    # directory of the columnar archive of old telemetries, empty disables
+    TELEMETRY_ARCHIVE_DIR: str = ''
+
+    # routes of each leaderboard kept in route_leaderboards, 0 disables them
+    LEADERBOARD_SIZE: int = 0
+    # runs a route needs to be ranked by efficiency and failure rate
+    LEADERBOARD_MIN_RUNS: int = 1
+    # seconds between rebuilds from route_stats, 0 disables them; with
+    # several workers they fix what one ranked without the others' writes
+    LEADERBOARD_REFRESH_INTERVAL: float = 60
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
@@ -0,0 +1,334 @@
+import asyncio
+import math
+
+from sqlalchemy import (
+    Delete,
+    FromClause,
+    bindparam,
+    delete,
+    func,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.database import get_engine
+from api.leaderboard import (
+    STATS_COLUMNS,
+    rebuild_leaderboards,
+    refresh_routes,
+    track_routes,
+)
+from api.models import RouteStats, StatusState, Telemetry
+
+METRICS = (
+    'average_speed',
+    'distance_traveled',
+    'energy_consumed',
+    'average_current',
+)
+
+
+def _rollup(rows: list[dict]) -> list[dict]:
+    rollups = {}
+
+    for row in rows:
+        stats = rollups.get(row['route_id'])
+
+        if stats is None:
+            stats = rollups[row['route_id']] = {
+                'route_id': row['route_id'],
+                'count': 0,
+                'success_count': 0,
+                'failed_count': 0,
+            }
+            for metric in METRICS:
+                stats[f'{metric}_sum'] = 0.0
+                stats[f'{metric}_sum_sq'] = 0.0
+                stats[f'{metric}_min'] = row[metric]
+                stats[f'{metric}_max'] = row[metric]
+
+        stats['count'] += 1
+        stats[f'{StatusState(row["status"]).value}_count'] += 1
+
+        for metric in METRICS:
+            value = row[metric]
+            stats[f'{metric}_sum'] += value
+            stats[f'{metric}_sum_sq'] += value * value
+            stats[f'{metric}_min'] = min(stats[f'{metric}_min'], value)
+            stats[f'{metric}_max'] = max(stats[f'{metric}_max'], value)
+
+    return list(rollups.values())
+
+
+async def record_telemetries(session: AsyncSession, rows: list[dict]):
+    query = insert(RouteStats).values(_rollup(rows))
+    excluded = query.excluded
+
+    values = {
+        name: getattr(RouteStats, name) + getattr(excluded, name)
+        for name in ('count', 'success_count', 'failed_count')
+    }
+    for metric in METRICS:
+        for name in (f'{metric}_sum', f'{metric}_sum_sq'):
+            values[name] = getattr(RouteStats, name) + getattr(excluded, name)
+        values[f'{metric}_min'] = func.least(
+            getattr(RouteStats, f'{metric}_min'),
+            getattr(excluded, f'{metric}_min'),
+        )
+        values[f'{metric}_max'] = func.greatest(
+            getattr(RouteStats, f'{metric}_max'),
+            getattr(excluded, f'{metric}_max'),
+        )
+
+    stats = await session.execute(
+        query.on_conflict_do_update(
+            index_elements=[RouteStats.route_id], set_=values
+        ).returning(*STATS_COLUMNS)
+    )
+    await track_routes(session, stats.all())
+
+
+async def forget_telemetry(session: AsyncSession, telemetry: Telemetry):
+    status_count = f'{StatusState(telemetry.status).value}_count'
+    values = {
+        'count': RouteStats.count - 1,
+        status_count: getattr(RouteStats, status_count) - 1,
+    }
+    for metric in METRICS:
+        value = getattr(telemetry, metric)
+        for name, delta in (
+            (f'{metric}_sum', value),
+            (f'{metric}_sum_sq', value * value),
+        ):
+            values[name] = getattr(RouteStats, name) - delta
+
+    stats = await session.scalar(
+        update(RouteStats)
+        .where(RouteStats.route_id == telemetry.route_id)
+        .values(values)
+        .returning(RouteStats)
+    )
+
+    if stats is None:
+        return
+
+    if stats.count <= 0:
+        await session.delete(stats)
+        await track_routes(session, [], [telemetry.route_id])
+        return
+
+    await track_routes(session, [stats])
+
+    # min/max cannot be decremented, so they are only recomputed when the
+    # deleted sample was one of the bounds
+    if any(
+        getattr(telemetry, metric)
+        in {getattr(stats, f'{metric}_min'), getattr(stats, f'{metric}_max')}
+        for metric in METRICS
+    ):
+        bounds = await session.execute(
+            select(*_bounds_columns()).where(
+                Telemetry.route_id == telemetry.route_id,
+                Telemetry.id != telemetry.id,
+            )
+        )
+        for name, value in bounds.one()._mapping.items():
+            setattr(stats, name, value)
+
+
+def _bounds_columns() -> list:
+    columns = []
+    for metric in METRICS:
+        column = getattr(Telemetry, metric)
+        columns += [
+            func.min(column).label(f'{metric}_min'),
+            func.max(column).label(f'{metric}_max'),
+        ]
+
+    return columns
+
+
+def _stats_columns(telemetries) -> list:
+    """Aggregates of route_stats over the columns of `telemetries`."""
+    columns = [
+        telemetries.route_id,
+        func.count().label('count'),
+        func
+        .count()
+        .filter(telemetries.status == StatusState.success)
+        .label('success_count'),
+        func
+        .count()
+        .filter(telemetries.status == StatusState.failed)
+        .label('failed_count'),
+    ]
+    for metric in METRICS:
+        column = getattr(telemetries, metric)
+        columns += [
+            func.sum(column).label(f'{metric}_sum'),
+            func.sum(column * column).label(f'{metric}_sum_sq'),
+            func.min(column).label(f'{metric}_min'),
+            func.max(column).label(f'{metric}_max'),
+        ]
+
+    return columns
+
+
+async def rebuild_route_stats(session: AsyncSession):
+    columns = _stats_columns(Telemetry.__table__.c)
+
+    await session.execute(delete(RouteStats))
+    await session.execute(
+        insert(RouteStats).from_select(
+            [column.key for column in columns],
+            select(*columns).group_by(Telemetry.route_id),
+        )
+    )
+    await rebuild_leaderboards(session)
+
+
+async def forget_telemetries(session: AsyncSession, query: Delete) -> int:
+    """Run a bulk DELETE of telemetries and take them out of route_stats.
+
+    The deleted rows are rolled up per route by the DELETE statement
+    itself, so nothing is loaded row by row.
+    """
+    return await forget_rows(
+        session, query.returning(*Telemetry.__table__.c).cte('deleted')
+    )
+
+
+async def forget_rows(session: AsyncSession, rows: FromClause) -> int:
+    """Take the telemetries of `rows` out of route_stats.
+
+    `rows` must already be gone from the telemetries table, e.g. the
+    RETURNING of their DELETE or a detached partition.
+    """
+    rollups = (
+        await session.execute(
+            select(*_stats_columns(rows.c)).group_by(rows.c.route_id)
+        )
+    ).all()
+
+    if not rollups:
+        return 0
+
+    counters = ['count', 'success_count', 'failed_count']
+    for metric in METRICS:
+        counters += [f'{metric}_sum', f'{metric}_sum_sq']
+
+    table = RouteStats.__table__
+    await session.execute(
+        update(table)
+        .where(table.c.route_id == bindparam('b_route_id'))
+        .values({
+            name: table.c[name] - bindparam(f'b_{name}') for name in counters
+        }),
+        [
+            {f'b_{name}': value for name, value in row._mapping.items()}
+            for row in rollups
+        ],
+    )
+
+    route_ids = [row.route_id for row in rollups]
+    await session.execute(
+        delete(RouteStats).where(
+            RouteStats.route_id.in_(route_ids), RouteStats.count <= 0
+        )
+    )
+
+    # min/max cannot be decremented, so they are recomputed for the routes
+    # whose bounds may have been deleted
+    bound_names = [column.key for column in _bounds_columns()]
+    stored = {
+        row.route_id: row
+        for row in await session.execute(
+            select(
+                RouteStats.route_id,
+                *(getattr(RouteStats, name) for name in bound_names),
+            ).where(RouteStats.route_id.in_(route_ids))
+        )
+    }
+    stale = [
+        row.route_id
+        for row in rollups
+        if row.route_id in stored
+        and any(
+            getattr(row, f'{metric}_min')
+            <= getattr(stored[row.route_id], f'{metric}_min')
+            or getattr(row, f'{metric}_max')
+            >= getattr(stored[row.route_id], f'{metric}_max')
+            for metric in METRICS
+        )
+    ]
+
+    if stale:
+        bounds = (
+            select(Telemetry.route_id, *_bounds_columns())
+            .where(Telemetry.route_id.in_(stale))
+            .group_by(Telemetry.route_id)
+            .subquery()
+        )
+        await session.execute(
+            update(RouteStats)
+            .where(RouteStats.route_id == bounds.c.route_id)
+            .values({name: bounds.c[name] for name in bound_names})
+            .execution_options(synchronize_session=False)
+        )
+
+    await refresh_routes(session, route_ids)
+
+    return sum(row.count for row in rollups)
+
+
+def _metric_public(stats: RouteStats | None, metric: str) -> dict:
+    if stats is None or stats.count <= 0:
+        return {
+            'total': 0.0,
+            'mean': None,
+            'std': None,
+            'min': None,
+            'max': None,
+        }
+
+    total = getattr(stats, f'{metric}_sum')
+    mean = total / stats.count
+    variance = getattr(stats, f'{metric}_sum_sq') / stats.count - mean**2
+
+    return {
+        'total': total,
+        'mean': mean,
+        'std': math.sqrt(max(variance, 0.0)),
+        'min': getattr(stats, f'{metric}_min'),
+        'max': getattr(stats, f'{metric}_max'),
+    }
+
+
+def stats_public(route_id: int, stats: RouteStats | None) -> dict:
+    count = stats.count if stats else 0
+    success_count = stats.success_count if stats else 0
+
+    return {
+        'route_id': route_id,
+        'count': count,
+        'success_count': success_count,
+        'failed_count': stats.failed_count if stats else 0,
+        'success_rate': success_count / count if count else None,
+        **{metric: _metric_public(stats, metric) for metric in METRICS},
+    }
+
+
+async def main():
+    engine = get_engine()
+
+    async with AsyncSession(engine) as session:
+        await rebuild_route_stats(session)
+        await session.commit()
+
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
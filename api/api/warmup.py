@@ -0,0 +1,70 @@
+import logging
+from contextlib import AsyncExitStack
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from api.cache import warm_route_cache
+from api.queries import route_page_query, telemetry_page_query
+from api.schemas import FilterPage, TelemetryFilter
+from api.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+def hot_queries() -> list[Select]:
+    """First pages of the list endpoints, the queries every client runs."""
+    return [
+        route_page_query(FilterPage()),
+        telemetry_page_query(TelemetryFilter()),
+    ]
+
+
+async def warm_pool(
+    engine: AsyncEngine, connections: int, executions: int = 1
+) -> int:
+    """Opens `connections` pooled connections and runs the hot queries.
+
+    Each query runs `executions` times per connection, past psycopg's
+    prepare threshold it becomes a server-side prepared statement. The
+    first run also fills SQLAlchemy's compiled statement cache.
+    """
+    queries = hot_queries()
+
+    async with AsyncExitStack() as stack:
+        # held open together, so each one is a distinct pooled connection
+        opened = [
+            await stack.enter_async_context(engine.connect())
+            for _ in range(connections)
+        ]
+        for conn in opened:
+            for query in queries:
+                for _ in range(executions):
+                    await conn.execute(query)
+            # psycopg deallocates its prepared statements on ROLLBACK
+            await conn.commit()
+
+    return len(opened)
+
+
+async def warm_up(engine: AsyncEngine, settings: Settings) -> dict:
+    threshold = settings.DATABASE_PREPARE_THRESHOLD
+    warmed = {
+        'connections': await warm_pool(
+            engine,
+            min(settings.DATABASE_POOL_WARMUP, settings.DATABASE_POOL_SIZE),
+            1 if threshold is None else threshold + 1,
+        ),
+        'routes': 0,
+    }
+
+    if settings.ROUTE_CACHE_WARMUP > 0:
+        async with AsyncSession(engine) as session:
+            warmed['routes'] = await warm_route_cache(
+                session, settings.ROUTE_CACHE_WARMUP
+            )
+
+    logger.info(
+        'Warmed %(connections)s connections and %(routes)s routes', warmed
+    )
+    return warmed
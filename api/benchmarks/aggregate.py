@@ -0,0 +1,71 @@
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from api.database import get_engine
+from benchmarks.common import bench_client, create_route
+
+engine = get_engine()
+
+
+async def seed(rows: int, days: int) -> int:
+    async with engine.begin() as conn:
+        route_id = await create_route(conn)
+        await conn.execute(
+            text(
+                'INSERT INTO telemetries (average_speed, distance_traveled, '
+                'energy_consumed, average_current, status, route_id, '
+                'created_at) '
+                "SELECT random(), random(), random(), random(), 'success', "
+                ':route_id, now() - random() * make_interval(days => :days) '
+                'FROM generate_series(1, :rows)'
+            ),
+            {'route_id': route_id, 'rows': rows, 'days': days},
+        )
+        await conn.execute(text('ANALYZE telemetries'))
+
+    return route_id
+
+
+async def main(rows: int, days: int, repeat: int):
+    async with bench_client() as client:
+        route_id = await seed(rows, days)
+
+        scenarios = [
+            ('fleet, day', {'bucket': 'day'}),
+            ('fleet, week', {'bucket': 'week'}),
+            ('route, hour', {'bucket': 'hour', 'route_id': route_id}),
+            (
+                'fleet, last 7 days, hour',
+                {'bucket': 'hour', 'from': _days_ago(7)},
+            ),
+        ]
+
+        for label, params in scenarios:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                response = await client.get(
+                    '/telemetries/aggregate', params=params
+                )
+            elapsed = (time.perf_counter() - start) / repeat * 1000
+            buckets = len(response.json()['buckets'])
+            print(f'{label:<28} {buckets:>6} buckets {elapsed:10.1f} ms')
+
+
+def _days_ago(days: int) -> str:
+    return (datetime.now() - timedelta(days=days)).isoformat()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Latency of time-bucketed telemetry aggregation'
+    )
+    parser.add_argument('--rows', type=int, default=3_000_000)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.days, args.repeat))
@@ -0,0 +1,120 @@
+import argparse
+import asyncio
+import statistics
+import time
+from collections import defaultdict
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.database import get_engine
+from api.models import StatusState, Telemetry
+from benchmarks.common import bench_client, create_route, report
+
+engine = get_engine()
+
+
+async def seed(rows: int, routes: int, days: int):
+    async with engine.begin() as conn:
+        route_ids = [await create_route(conn) for _ in range(routes)]
+        await conn.execute(
+            text(
+                'INSERT INTO telemetries (average_speed, distance_traveled, '
+                'energy_consumed, average_current, status, route_id, '
+                'created_at) '
+                'SELECT random(), random(), random(), random(), '
+                "CASE WHEN random() < 0.9 THEN 'success' ELSE 'failed' END"
+                '::statusstate, (:route_ids)[1 + n % :routes], '
+                'now() - random() * make_interval(days => :days) '
+                'FROM generate_series(1, :rows) AS n'
+            ),
+            {
+                'route_ids': route_ids,
+                'routes': routes,
+                'rows': rows,
+                'days': days,
+            },
+        )
+        await conn.execute(text('ANALYZE telemetries'))
+
+
+async def efficiency_rows() -> int:
+    # the same report computed from ORM rows, one Python step per row
+    async with AsyncSession(engine) as session:
+        result = await session.execute(
+            select(
+                Telemetry.route_id,
+                Telemetry.average_speed,
+                Telemetry.distance_traveled,
+                Telemetry.energy_consumed,
+                Telemetry.average_current,
+                Telemetry.status,
+            )
+        )
+        routes = defaultdict(lambda: defaultdict(float))
+        count = 0
+        for route_id, speed, distance, energy, current, status in result:
+            sums = routes[route_id]
+            sums['count'] += 1
+            sums['failed'] += status == StatusState.failed
+            sums['distance'] += distance
+            sums['energy'] += energy
+            sums['speed'] += speed
+            sums['current'] += current
+            sums['speed_current'] += speed * current
+            sums['speed_sq'] += speed * speed
+            sums['current_sq'] += current * current
+            count += 1
+
+    return count
+
+
+async def timed(request, repeat: int) -> float:
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await request()
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds)
+
+
+async def main(rows: int, routes: int, days: int, repeat: int):
+    async with bench_client() as client:
+        await seed(rows, routes, days)
+
+        report(
+            'ORM rows, Python loop',
+            rows,
+            await timed(efficiency_rows, repeat),
+        )
+        for label, url, params in (
+            ('GET /analytics/efficiency', '/analytics/efficiency', {}),
+            (
+                'GET /analytics/outliers',
+                '/analytics/outliers',
+                {'method': 'zscore'},
+            ),
+            (
+                'GET /analytics/outliers iqr',
+                '/analytics/outliers',
+                {'method': 'iqr'},
+            ),
+        ):
+            report(
+                label,
+                rows,
+                await timed(lambda: client.get(url, params=params), repeat),
+            )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Fleet analytics over the whole telemetry history'
+    )
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--routes', type=int, default=100)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.routes, args.days, args.repeat))
@@ -0,0 +1,120 @@
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import date, datetime
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.archive import TelemetryArchive, archive_months
+from api.database import get_engine
+from api.partitions import add_months, ensure_partitions
+from api.queries import aggregate_query, bucket_public
+from api.schemas import TelemetryAggregate, TelemetryExport
+from benchmarks.aggregate import seed
+from benchmarks.common import bench_client
+
+engine = get_engine()
+
+TABLE_SIZE = (
+    'SELECT coalesce(sum(pg_total_relation_size(inhrelid)), 0) '
+    'FROM pg_inherits WHERE inhparent = CAST(:table AS regclass)'
+)
+
+
+async def table_bytes() -> int:
+    async with engine.connect() as conn:
+        return await conn.scalar(text(TABLE_SIZE), {'table': 'telemetries'})
+
+
+async def scan_postgres(filter: TelemetryAggregate, repeat: int) -> float:
+    async with AsyncSession(engine) as session:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            [
+                bucket_public(row)
+                for row in await session.execute(aggregate_query(filter))
+            ]
+        return (time.perf_counter() - start) / repeat
+
+
+def scan_archive(
+    archive: TelemetryArchive, filter: TelemetryAggregate, repeat: int
+) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        archive.aggregate(filter)
+    return (time.perf_counter() - start) / repeat
+
+
+def export_archive(archive: TelemetryArchive, filter: TelemetryExport):
+    start = time.perf_counter()
+    rows = sum(len(chunk) for chunk in archive.export(filter))
+    return rows, time.perf_counter() - start
+
+
+async def main(rows: int, days: int, keep_months: int, repeat: int):
+    cutoff = add_months(date.today().replace(day=1), -keep_months)
+    filter = TelemetryAggregate(
+        bucket='day', end=datetime.combine(cutoff, datetime.min.time())
+    )
+
+    async with bench_client():
+        # one partition per month, so archiving drops whole tables
+        first = add_months(date.today().replace(day=1), -(days // 28 + 1))
+        await ensure_partitions(engine, days // 28 + 1, today=first)
+        await seed(rows, days)
+        async with engine.connect() as conn:
+            await conn.execution_options(isolation_level='AUTOCOMMIT')
+            await conn.execute(text('VACUUM ANALYZE telemetries'))
+
+        before = await table_bytes()
+        postgres = await scan_postgres(filter, repeat)
+
+        with tempfile.TemporaryDirectory() as directory:
+            archive = TelemetryArchive(directory)
+
+            start = time.perf_counter()
+            archived = sum(
+                (await archive_months(engine, archive, keep_months)).values()
+            )
+            elapsed = time.perf_counter() - start
+
+            moved = before - await table_bytes()
+            stored = archive.stats()['bytes']
+            # first scan pages the files in, like a cold Postgres cache
+            scan_archive(archive, filter, 1)
+            numpy = scan_archive(archive, filter, repeat)
+            exported, export_seconds = export_archive(
+                archive, TelemetryExport()
+            )
+
+    print(f'archived {archived} rows in {elapsed:.1f} s')
+    print(
+        f'{"size":<28} postgres {moved / 2**20:9.1f} MiB '
+        f'archive {stored / 2**20:9.1f} MiB '
+        f'({moved / max(stored, 1):.1f}x)'
+    )
+    print(
+        f'{"aggregate by day":<28} postgres {postgres * 1000:9.1f} ms '
+        f'archive {numpy * 1000:9.1f} ms '
+        f'({postgres / numpy:.1f}x)'
+    )
+    print(
+        f'{"archive export":<28} {exported:>9} rows {export_seconds:9.3f} s '
+        f'{exported / export_seconds:>12,.0f} rows/s'
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Size and scan speed of the telemetry archive'
+    )
+    parser.add_argument('--rows', type=int, default=3_000_000)
+    parser.add_argument('--days', type=int, default=180)
+    parser.add_argument('--keep-months', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.days, args.keep_months, args.repeat))
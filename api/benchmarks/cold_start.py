@@ -0,0 +1,81 @@
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from api.migrate import upgrade
+from api.settings import get_settings
+
+STARTUP_TIMEOUT = 60
+# what the entrypoint runs before the server, before and after the check
+MIGRATIONS = {
+    'alembic upgrade head': [
+        sys.executable,
+        '-m',
+        'alembic',
+        'upgrade',
+        'head',
+    ],
+    'api.migrate': [sys.executable, '-m', 'api.migrate'],
+}
+
+
+def first_request(migrate: list[str], port: int) -> float:
+    """Seconds from the container command to the first answered request."""
+    start = time.perf_counter()
+    subprocess.run(migrate, check=True, capture_output=True)
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            '-m',
+            'api.server',
+            '--port',
+            str(port),
+            '--workers',
+            '1',
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    try:
+        while time.perf_counter() - start < STARTUP_TIMEOUT:
+            try:
+                response = httpx.get(
+                    f'http://127.0.0.1:{port}/routes/', params={'limit': 1}
+                )
+                response.raise_for_status()
+                return time.perf_counter() - start
+            except httpx.TransportError:
+                time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+
+    raise RuntimeError('server did not start')
+
+
+def main(repeat: int, port: int):
+    # a restart, the database is already migrated
+    upgrade(get_settings().DATABASE_URL)
+
+    for label, migrate in MIGRATIONS.items():
+        seconds = [first_request(migrate, port) for _ in range(repeat)]
+        print(
+            f'{label:<28} first request after '
+            f'{statistics.median(seconds):6.2f} s (median of {repeat})'
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Time from container start to the first request'
+    )
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--port', type=int, default=8766)
+    args = parser.parse_args()
+
+    main(args.repeat, args.port)
@@ -0,0 +1,61 @@
+import random
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from api.app import app
+from api.commands import route_values
+from api.database import get_engine
+from api.models import Route, table_registry
+
+engine = get_engine()
+
+
+@asynccontextmanager
+async def bench_client():
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url='http://bench'
+    ) as client:
+        yield client
+
+    await engine.dispose()
+
+
+def unique_commands() -> str:
+    distances = random.sample(range(1, 10_000), 3)
+    return (
+        f'ANDAR {distances[0]} CM, GIRAR 90 GRAUS DIREITA, '
+        f'ANDAR {distances[1]} CM, GIRAR 45 GRAUS ESQUERDA, '
+        f'ANDAR {distances[2]} CM, ENTREGAR'
+    )
+
+
+async def create_route(conn: AsyncConnection) -> int:
+    return await conn.scalar(
+        insert(Route)
+        .values(route_values(unique_commands()))
+        .returning(Route.id)
+    )
+
+
+@contextmanager
+def timer():
+    elapsed = {}
+    start = time.perf_counter()
+
+    yield elapsed
+
+    elapsed['seconds'] = time.perf_counter() - start
+
+
+def report(label: str, rows: int, seconds: float, unit: str = 'rows'):
+    print(
+        f'{label:<28} {rows:>9} {unit} {seconds:9.3f} s '
+        f'{rows / seconds:>12,.0f} {unit}/s'
+    )
@@ -0,0 +1,95 @@
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.database import get_engine
+from api.models import Route, Telemetry
+from api.stats import rebuild_route_stats
+from benchmarks.common import bench_client, create_route, report
+
+engine = get_engine()
+
+
+async def seed(rows: int, days: int) -> int:
+    async with engine.begin() as conn:
+        route_id = await create_route(conn)
+        await conn.execute(
+            text(
+                'INSERT INTO telemetries (average_speed, distance_traveled, '
+                'energy_consumed, average_current, status, route_id, '
+                'created_at) '
+                'SELECT random(), random(), random(), random(), '
+                "CASE WHEN random() < 0.9 THEN 'success' ELSE 'failed' END"
+                '::statusstate, :route_id, '
+                'now() - random() * make_interval(days => :days) '
+                'FROM generate_series(1, :rows)'
+            ),
+            {'route_id': route_id, 'rows': rows, 'days': days},
+        )
+
+    async with AsyncSession(engine) as session:
+        await rebuild_route_stats(session)
+        await session.commit()
+
+    return route_id
+
+
+async def delete_orm(route_id: int):
+    # what deleting a route cost before: every telemetry loaded and
+    # deleted by the unit of work
+    async with AsyncSession(engine) as session:
+        for telemetry in await session.scalars(
+            select(Telemetry).where(Telemetry.route_id == route_id)
+        ):
+            await session.delete(telemetry)
+        await session.delete(await session.get(Route, route_id))
+        await session.commit()
+
+
+async def timed(request):
+    start = time.perf_counter()
+    response = await request
+    return response, time.perf_counter() - start
+
+
+async def main(rows: int, orm_rows: int, days: int):
+    async with bench_client() as client:
+        route_id = await seed(orm_rows, days)
+        _, seconds = await timed(delete_orm(route_id))
+        report('ORM, per-row DELETE', orm_rows, seconds)
+
+        route_id = await seed(rows, days)
+        _, seconds = await timed(client.delete(f'/routes/{route_id}'))
+        report('DELETE /routes/{id}', rows, seconds)
+
+        route_id = await seed(rows, days)
+        for label, params in (
+            ('DELETE /telemetries/?status', {'status': 'failed'}),
+            ('DELETE /telemetries/?route', {}),
+        ):
+            response, seconds = await timed(
+                client.delete(
+                    '/telemetries/', params={'route_id': route_id, **params}
+                )
+            )
+            report(label, response.json()['deleted'], seconds)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Deleting a route with a long telemetry history'
+    )
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument(
+        '--orm-rows',
+        type=int,
+        default=20_000,
+        help='telemetries of the route deleted through the ORM',
+    )
+    parser.add_argument('--days', type=int, default=90)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.orm_rows, args.days))
@@ -0,0 +1,45 @@
+import argparse
+import asyncio
+import resource
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.database import get_engine
+from api.export import export_query, stream_telemetries
+
+engine = get_engine()
+
+
+async def main(format: str):
+    async with AsyncSession(engine) as session:
+        start = time.perf_counter()
+        first_byte = None
+        size = 0
+
+        async for chunk in stream_telemetries(session, export_query(), format):
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            size += len(chunk)
+
+        elapsed = time.perf_counter() - start
+
+    await engine.dispose()
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'format          {format}')
+    print(f'first byte      {first_byte * 1000:.1f} ms')
+    print(f'total           {elapsed:.2f} s ({size / 2**20:,.1f} MiB)')
+    print(f'peak RSS        {peak_rss:,.1f} MiB')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Time to first byte and peak memory of the export stream'
+    )
+    parser.add_argument(
+        '--format', choices=['ndjson', 'csv'], default='ndjson'
+    )
+    args = parser.parse_args()
+
+    asyncio.run(main(args.format))
@@ -0,0 +1,45 @@
+import argparse
+import asyncio
+from http import HTTPStatus
+
+from benchmarks.common import bench_client, report, timer, unique_commands
+from benchmarks.payloads import TELEMETRY
+
+
+async def main(rows: int, batch_size: int):
+    async with bench_client() as client:
+        response = await client.post(
+            '/routes/', json={'commands': unique_commands()}
+        )
+        route_id = response.json()['id']
+
+        with timer() as elapsed:
+            for _ in range(rows):
+                response = await client.post(
+                    f'/telemetries/{route_id}', json=TELEMETRY
+                )
+                assert response.status_code == HTTPStatus.CREATED
+
+        report('per-row POST', rows, elapsed['seconds'])
+
+        with timer() as elapsed:
+            for start in range(0, rows, batch_size):
+                size = min(batch_size, rows - start)
+                response = await client.post(
+                    f'/telemetries/{route_id}/batch',
+                    json={'telemetries': [TELEMETRY] * size},
+                )
+                assert response.status_code == HTTPStatus.CREATED
+
+        report(f'batch POST ({batch_size}/req)', rows, elapsed['seconds'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Per-row vs batch telemetry ingestion'
+    )
+    parser.add_argument('--rows', type=int, default=2_000)
+    parser.add_argument('--batch-size', type=int, default=1_000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.batch_size))
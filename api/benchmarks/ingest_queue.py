@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+from http import HTTPStatus
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from api.app import app
+from api.database import get_engine
+from api.ingest import TelemetryIngestQueue
+from api.settings import get_settings
+from benchmarks.common import bench_client, report, timer, unique_commands
+from benchmarks.payloads import TELEMETRY
+
+engine = get_engine()
+
+
+async def post_all(client, url: str, rows: int, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def post():
+        async with semaphore:
+            response = await client.post(url, json=TELEMETRY)
+            return response.status_code
+
+    return await asyncio.gather(*(post() for _ in range(rows)))
+
+
+async def main(rows: int, concurrency: int, batch_size: int):
+    async with bench_client() as client:
+        response = await client.post(
+            '/routes/', json={'commands': unique_commands()}
+        )
+        route_id = response.json()['id']
+
+        with timer() as elapsed:
+            statuses = await post_all(
+                client, f'/telemetries/{route_id}', rows, concurrency
+            )
+            assert set(statuses) == {HTTPStatus.CREATED}
+
+        report('synchronous POST', rows, elapsed['seconds'])
+
+        settings = get_settings()
+        queue = app.state.ingest_queue = TelemetryIngestQueue(
+            async_sessionmaker(engine, expire_on_commit=False),
+            maxsize=rows,
+            batch_size=batch_size,
+            flush_interval=0.05,
+            put_timeout=1,
+            retries=settings.INGEST_FLUSH_RETRIES,
+            retry_backoff=settings.INGEST_RETRY_BACKOFF,
+        )
+        queue.start()
+
+        with timer() as accepted:
+            statuses = await post_all(
+                client, f'/telemetries/{route_id}/queue', rows, concurrency
+            )
+            assert set(statuses) == {HTTPStatus.ACCEPTED}
+
+        report('queued POST (accepted)', rows, accepted['seconds'])
+
+        with timer() as elapsed:
+            await queue.stop()
+
+        report(
+            'queued POST (persisted)',
+            rows,
+            accepted['seconds'] + elapsed['seconds'],
+        )
+        print(queue.stats())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Synchronous vs write-behind telemetry ingestion'
+    )
+    parser.add_argument('--rows', type=int, default=5_000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.concurrency, args.batch_size))
@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.database import get_engine
+from api.leaderboard import get_leaderboards, load_leaderboards
+from api.models import Telemetry
+from api.stats import rebuild_route_stats
+from benchmarks.common import bench_client, create_route
+from benchmarks.payloads import TELEMETRY
+
+engine = get_engine()
+
+
+async def seed(rows: int, routes: int, days: int) -> list[int]:
+    async with engine.begin() as conn:
+        route_ids = [await create_route(conn) for _ in range(routes)]
+        await conn.execute(
+            text(
+                'INSERT INTO telemetries (average_speed, distance_traveled, '
+                'energy_consumed, average_current, status, route_id, '
+                'created_at) '
+                'SELECT random(), random(), random(), random(), '
+                "CASE WHEN random() < 0.9 THEN 'success' ELSE 'failed' END"
+                '::statusstate, (:route_ids)[1 + n % :routes], '
+                'now() - random() * make_interval(days => :days) '
+                'FROM generate_series(1, :rows) AS n'
+            ),
+            {
+                'route_ids': route_ids,
+                'routes': routes,
+                'rows': rows,
+                'days': days,
+            },
+        )
+        await conn.execute(text('ANALYZE telemetries'))
+
+    async with AsyncSession(engine) as session:
+        await rebuild_route_stats(session)
+        await session.commit()
+
+    return route_ids
+
+
+async def most_run_scan(limit: int):
+    # what each request would run without the leaderboards
+    async with engine.connect() as conn:
+        await conn.execute(
+            select(Telemetry.route_id, func.count())
+            .group_by(Telemetry.route_id)
+            .order_by(func.count().desc())
+            .limit(limit)
+        )
+
+
+async def milliseconds(request, repeat: int) -> float:
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await request()
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds) * 1000
+
+
+async def main(rows: int, routes: int, days: int, size: int, repeat: int):
+    async with bench_client() as client:
+        get_leaderboards().size = size
+        route_ids = await seed(rows, routes, days)
+
+        start = time.perf_counter()
+        await load_leaderboards(engine)
+        print(
+            f'{"startup rebuild":<32} {routes:>7} routes '
+            f'{(time.perf_counter() - start) * 1000:9.1f} ms'
+        )
+
+        for label, request in (
+            ('GROUP BY over telemetries', lambda: most_run_scan(size)),
+            (
+                'GET /leaderboards/most_run',
+                lambda: client.get(
+                    '/leaderboards/most_run', params={'limit': size}
+                ),
+            ),
+        ):
+            elapsed = await milliseconds(request, repeat)
+            print(f'{label:<32} {rows:>7} rows {elapsed:11.1f} ms')
+
+        # what keeping the boards costs each write, on the busiest route
+        for label, enabled in (('disabled', 0), ('enabled', size)):
+            get_leaderboards().size = enabled
+            elapsed = await milliseconds(
+                lambda: client.post(
+                    f'/telemetries/{route_ids[0]}', json=TELEMETRY
+                ),
+                repeat * 10,
+            )
+            print(f'{"POST /telemetries, " + label:<32} {elapsed:22.2f} ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Leaderboard reads against scanning the telemetries'
+    )
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--routes', type=int, default=10_000)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--size', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    asyncio.run(
+        main(args.rows, args.routes, args.days, args.size, args.repeat)
+    )
@@ -0,0 +1,522 @@
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http import HTTPStatus
+
+from sqlalchemy import event, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from api.app import app
+from api.commands import route_values
+from api.database import get_engine
+from api.ingest import TelemetryIngestQueue
+from api.leaderboard import BOARDS, get_leaderboards, load_leaderboards
+from api.models import Route, Telemetry
+from api.settings import get_settings
+from api.stats import rebuild_route_stats
+from benchmarks.common import bench_client, unique_commands
+from benchmarks.payloads import TELEMETRY, telemetry_payload
+
+engine = get_engine()
+# routes per leaderboard when LEADERBOARD_SIZE leaves them disabled
+LEADERBOARD_SIZE = 10
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    # builds (url, request kwargs) for the n-th request
+    request: Callable[[int], tuple[str, dict]]
+    expected: HTTPStatus
+    # status once a run longer than the seeded ids deletes one again
+    reused: HTTPStatus | None = None
+    # timed until the response starts, the body never ends
+    stream: bool = False
+
+
+async def seed(routes: int, telemetries: int, days: int):
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(Route),
+            [route_values(unique_commands()) for _ in range(routes)],
+        )
+        # shaped like the test fixtures, with some noise and 10% failures
+        await conn.execute(
+            text(
+                'INSERT INTO telemetries (average_speed, distance_traveled, '
+                'energy_consumed, average_current, status, route_id, '
+                'created_at) '
+                'SELECT 10 + random() * 5, 200 + random() * 50, '
+                '100 + random() * 20, 100 + random() * 10, '
+                "CASE WHEN random() < 0.9 THEN 'success' ELSE 'failed' END"
+                '::statusstate, ids[1 + (n % array_length(ids, 1))], '
+                'now() - random() * make_interval(days => :days) '
+                'FROM generate_series(1, :rows) AS n, '
+                '(SELECT array_agg(id) AS ids FROM routes) AS r'
+            ),
+            {'rows': telemetries, 'days': days},
+        )
+
+    async with AsyncSession(engine) as session:
+        await rebuild_route_stats(session)
+        await session.commit()
+
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level='AUTOCOMMIT')
+        await conn.execute(text('VACUUM ANALYZE'))
+
+
+async def enable_optional(requests: int) -> TelemetryIngestQueue:
+    """Turn on the leaderboards and the ingest queue, which the settings
+    may leave off and the test client skips with the app's lifespan."""
+    settings = get_settings()
+    get_leaderboards().size = settings.LEADERBOARD_SIZE or LEADERBOARD_SIZE
+    await load_leaderboards(engine)
+
+    queue = app.state.ingest_queue = TelemetryIngestQueue(
+        async_sessionmaker(engine, expire_on_commit=False),
+        maxsize=max(settings.INGEST_QUEUE_SIZE, requests),
+        batch_size=settings.INGEST_BATCH_SIZE,
+        flush_interval=settings.INGEST_FLUSH_INTERVAL,
+        put_timeout=settings.INGEST_PUT_TIMEOUT,
+        retries=settings.INGEST_FLUSH_RETRIES,
+        retry_backoff=settings.INGEST_RETRY_BACKOFF,
+    )
+    queue.start()
+    return queue
+
+
+async def open_stream(path: str) -> int:
+    """Status of a streaming response, disconnecting once it starts.
+
+    httpx's ASGI transport waits for the whole body, which an event
+    stream never finishes, so the app is called directly.
+    """
+    started = asyncio.Event()
+    status = []
+
+    async def receive():
+        await started.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+            started.set()
+
+    await app(
+        {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', b'bench')],
+            'server': ('bench', 80),
+            'client': ('127.0.0.1', 0),
+        },
+        receive,
+        send,
+    )
+    return status[0]
+
+
+async def fetch_ids(model, limit: int) -> list[int]:
+    async with engine.connect() as conn:
+        ids = await conn.scalars(
+            select(model.id).order_by(model.id.desc()).limit(limit)
+        )
+        return ids.all()
+
+
+async def scenarios(requests: int) -> list[Scenario]:
+    route_ids = await fetch_ids(Route, 1_000)
+    telemetry_ids = await fetch_ids(Telemetry, requests)
+    # routes the write scenarios are allowed to change or delete
+    disposable = route_ids[: requests * 2]
+    updated, deleted = disposable[:requests], disposable[requests:]
+    # too few routes seeded, the updated ones are deleted instead
+    deleted = deleted or updated
+    routes = itertools.cycle(route_ids[requests * 2 :] or route_ids)
+    boards = itertools.cycle(BOARDS)
+
+    def route_id():
+        return next(routes)
+
+    def telemetry_id(n: int) -> int:
+        # runs longer than the seeded telemetries go round them again
+        return telemetry_ids[n % len(telemetry_ids)]
+
+    return [
+        Scenario(
+            'GET /routes/', 'GET', lambda n: ('/routes/', {}), HTTPStatus.OK
+        ),
+        Scenario(
+            'GET /routes/?limit=1000',
+            'GET',
+            lambda n: ('/routes/', {'params': {'limit': 1_000}}),
+            HTTPStatus.OK,
+        ),
+        Scenario(
+            'GET /routes/stats',
+            'GET',
+            lambda n: ('/routes/stats', {}),
+            HTTPStatus.OK,
+        ),
+        Scenario(
+            'GET /routes/{id}/stats',
+            'GET',
+            lambda n: (f'/routes/{route_id()}/stats', {}),
+            HTTPStatus.OK,
+        ),
+        Scenario(
+            'GET /routes/{id}',
+            'GET',
+            lambda n: (f'/routes/{route_id()}', {}),
+            HTTPStatus.OK,
+        ),
+        Scenario(
+            'GET /routes/{id}?include',
+            'GET',
+            lambda n: (
+                f'/routes/{route_id()}',
+                {'params': {'include': 'telemetries', 'limit': 100}},
+            ),
+            HTTPStatus.OK,
+        ),
+        Scenario(
+            'POST /routes/',
+            'POST',
+            lambda n: ('/routes/', {'json': {'commands': unique_commands()}}),
+            HTTPStatus.CREATED,
+        ),
+        Scenario(
+            'PUT /routes/{id}',
+            'PUT',
+            lambda n: (
+                f'/routes/{updated[n % len(updated)]}',
+                {'json': {'commands': unique_commands()}},
+            ),
+            HTTPStatus.OK,
+        ),
+        Scenario(
+            'GET /telemetries/',
+            'GET',
+            lambda n: ('/telemetries/', {'params': {'limit': 100}}),
+            HTTPStatus.OK,
+        ),
+        Scenario(
+            'GET /telemetries/?limit=5000',
+            'GET',
+            lambda n: ('/telemetries/', {'params': {'limit': 5_000}}),
+            HTTPStatus.OK,
+        ),
+        Scenario(
+            'GET /telemetries/{id}',
+            'GET',
+            lambda n: (f'/telemetries/{telemetry_id(n)}', {}),
+            HTTPStatus.OK,
+        ),
+        Scenario(
+            'GET /telemetries/export',
+            'GET',
+            lambda n: (
+                '/telemetries/export',
+                {'params': {'route_id': route_id()}},
+            ),
+            HTTPStatus.OK,
+        ),
+        Scenario(
+            'GET /telemetries/aggregate',
+            'GET',
+            lambda n: (
+                '/telemetries/aggregate',
+                {'params': {'route_id': route_id(), 'bucket': 'day'}},
+            ),
+            HTTPStatus.OK,
+        ),
+        Scenario(
+            'POST /telemetries/{id}',
+            'POST',
+            lambda n: (f'/telemetries/{route_id()}', {'json': TELEMETRY}),
+            HTTPStatus.CREATED,
+        ),
+        Scenario(
+            'POST /telemetries/{id}/batch',
+            'POST',
+            lambda n: (
+                f'/telemetries/{route_id()}/batch',
+                {'json': {'telemetries': [TELEMETRY] * 100}},
+            ),
+            HTTPStatus.CREATED,
+        ),
+        Scenario(
+            'POST /telemetries/batch',
+            'POST',
+            lambda n: (
+                '/telemetries/batch',
+                {
+                    'json': {
+                        'telemetries': [
+                            telemetry_payload(route_id=route_id())
+                            for _ in range(100)
+                        ]
+                    }
+                },
+            ),
+            HTTPStatus.CREATED,
+        ),
+        Scenario(
+            'POST /telemetries/{id}/queue',
+            'POST',
+            lambda n: (
+                f'/telemetries/{route_id()}/queue',
+                {'json': TELEMETRY},
+            ),
+            HTTPStatus.ACCEPTED,
+        ),
+        Scenario(
+            'GET /analytics/efficiency',
+            'GET',
+            lambda n: (
+                '/analytics/efficiency',
+                {'params': {'route_id': route_id()}},
+            ),
+            HTTPStatus.OK,
+        ),
+        Scenario(
+            'GET /analytics/outliers',
+            'GET',
+            lambda n: (
+                '/analytics/outliers',
+                {'params': {'route_id': route_id(), 'method': 'iqr'}},
+            ),
+            HTTPStatus.OK,
+        ),
+        Scenario(
+            'GET /leaderboards/{board}',
+            'GET',
+            lambda n: (f'/leaderboards/{next(boards)}', {}),
+            HTTPStatus.OK,
+        ),
+        Scenario(
+            'GET /routes/{id}/telemetries/live',
+            'GET',
+            lambda n: (f'/routes/{route_id()}/telemetries/live', {}),
+            HTTPStatus.OK,
+            stream=True,
+        ),
+        Scenario(
+            'DELETE /telemetries/{id}',
+            'DELETE',
+            lambda n: (f'/telemetries/{telemetry_id(n)}', {}),
+            HTTPStatus.OK,
+            reused=HTTPStatus.NOT_FOUND,
+        ),
+        Scenario(
+            'DELETE /telemetries/?route_id',
+            'DELETE',
+            lambda n: (
+                '/telemetries/',
+                {'params': {'route_id': route_id(), 'status': 'failed'}},
+            ),
+            HTTPStatus.OK,
+        ),
+        Scenario(
+            'DELETE /routes/{id}',
+            'DELETE',
+            lambda n: (f'/routes/{deleted[n % len(deleted)]}', {}),
+            HTTPStatus.OK,
+            reused=HTTPStatus.NOT_FOUND,
+        ),
+    ]
+
+
+def percentile(timings: list[float], percent: int) -> float:
+    return statistics.quantiles(timings, n=100, method='inclusive')[
+        percent - 1
+    ]
+
+
+async def run(client, scenario: Scenario, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    timings, errors, statements = [], 0, []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    async def request(n: int):
+        nonlocal errors
+        url, kwargs = scenario.request(n)
+
+        async with semaphore:
+            start = time.perf_counter()
+            if scenario.stream:
+                status = await open_stream(url)
+            else:
+                response = await client.request(scenario.method, url, **kwargs)
+                status = response.status_code
+            timings.append((time.perf_counter() - start) * 1000)
+
+        if status not in {scenario.expected, scenario.reused}:
+            errors += 1
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', count)
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(request(n) for n in range(requests)))
+    finally:
+        elapsed = time.perf_counter() - start
+        event.remove(engine.sync_engine, 'before_cursor_execute', count)
+
+    return {
+        'requests': requests,
+        'errors': errors,
+        'p50_ms': percentile(timings, 50),
+        'p95_ms': percentile(timings, 95),
+        'p99_ms': percentile(timings, 99),
+        'throughput': requests / elapsed,
+        'queries_per_request': len(statements) / requests,
+    }
+
+
+def regressions(
+    results: dict, baseline: dict, latency: float, throughput: float
+) -> list[str]:
+    flagged = []
+
+    for name, result in results.items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if result[key] > previous[key] * (1 + latency):
+                flagged.append(
+                    f'{name}: {key} {previous[key]:.2f} -> {result[key]:.2f}'
+                )
+
+        if result['throughput'] < previous['throughput'] * (1 - throughput):
+            flagged.append(
+                f'{name}: throughput {previous["throughput"]:.1f} -> '
+                f'{result["throughput"]:.1f}'
+            )
+
+        if result['queries_per_request'] > previous['queries_per_request']:
+            flagged.append(
+                f'{name}: queries/request '
+                f'{previous["queries_per_request"]:.2f} -> '
+                f'{result["queries_per_request"]:.2f}'
+            )
+
+    return flagged
+
+
+async def main(args):
+    random.seed(args.random_seed)
+
+    async with bench_client() as client:
+        if args.routes or args.telemetries:
+            await seed(args.routes, args.telemetries, args.days)
+        queue = await enable_optional(args.requests)
+
+        results = {}
+        print(
+            f'{"endpoint":<34} {"p50":>8} {"p95":>8} {"p99":>8} '
+            f'{"req/s":>9} {"queries":>8} {"errors":>7}'
+        )
+        try:
+            for scenario in await scenarios(args.requests):
+                if args.only and not any(
+                    pattern in scenario.name for pattern in args.only
+                ):
+                    continue
+
+                result = results[scenario.name] = await run(
+                    client, scenario, args.requests, args.concurrency
+                )
+                print(
+                    f'{scenario.name:<34} {result["p50_ms"]:>8.2f} '
+                    f'{result["p95_ms"]:>8.2f} {result["p99_ms"]:>8.2f} '
+                    f'{result["throughput"]:>9.1f} '
+                    f'{result["queries_per_request"]:>8.2f} '
+                    f'{result["errors"]:>7}'
+                )
+        finally:
+            await queue.stop()
+            del app.state.ingest_queue
+
+    report = {
+        'meta': {
+            'date': datetime.now(timezone.utc).isoformat(),
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+        },
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+
+        flagged = regressions(
+            results,
+            baseline,
+            args.latency_threshold,
+            args.throughput_threshold,
+        )
+        for line in flagged:
+            print(f'REGRESSION {line}')
+
+        if flagged:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Concurrent load test of every API endpoint'
+    )
+    parser.add_argument(
+        '--routes', type=int, default=0, help='routes to seed first'
+    )
+    parser.add_argument(
+        '--telemetries', type=int, default=0, help='telemetries to seed first'
+    )
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--only', nargs='+', help='endpoint name filters')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='JSON results to compare with')
+    parser.add_argument(
+        '--latency-threshold',
+        type=float,
+        default=0.2,
+        help='allowed relative latency increase',
+    )
+    parser.add_argument(
+        '--throughput-threshold',
+        type=float,
+        default=0.2,
+        help='allowed relative throughput decrease',
+    )
+    parser.add_argument('--random-seed', type=int, default=0)
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from api import metrics
+from api.metrics import MetricsMiddleware, MetricsRegistry
+
+
+async def endpoint(scope, receive, send):
+    scope['route'] = SimpleNamespace(path='/routes/{route_id}')
+    await send({'type': 'http.response.start', 'status': 200})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def send(message):
+    pass
+
+
+async def receive():
+    return {'type': 'http.request'}
+
+
+async def request_us(app, requests: int) -> float:
+    scope = {'type': 'http', 'method': 'GET', 'path': '/routes/1'}
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+
+    return (time.perf_counter() - start) / requests * 1_000_000
+
+
+def statement_us(statements: int) -> float:
+    context = SimpleNamespace(executemany=False)
+
+    start = time.perf_counter()
+    for _ in range(statements):
+        metrics._before_cursor_execute(None, None, '', None, context, False)
+        metrics._after_cursor_execute(None, None, '', None, context, False)
+
+    return (time.perf_counter() - start) / statements * 1_000_000
+
+
+async def main(requests: int, statements: int):
+    bare = await request_us(endpoint, requests)
+    measured = await request_us(
+        MetricsMiddleware(endpoint, MetricsRegistry()), requests
+    )
+    print(f'middleware overhead      {measured - bare:8.2f} us/request')
+
+    token = metrics._request_db.set(metrics.RequestDB({}))
+    overhead = statement_us(statements)
+    print(f'cursor events overhead   {overhead:8.2f} us/statement')
+    metrics._request_db.reset(token)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Hot-path cost of the /metrics instrumentation'
+    )
+    parser.add_argument('--requests', type=int, default=100_000)
+    parser.add_argument('--statements', type=int, default=100_000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.requests, args.statements))
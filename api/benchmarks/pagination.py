@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import select, text
+
+from api.database import get_engine
+from api.models import Telemetry
+from api.pagination import encode_cursor
+from benchmarks.common import bench_client, create_route
+
+engine = get_engine()
+
+
+async def seed(rows: int) -> int:
+    async with engine.begin() as conn:
+        route_id = await create_route(conn)
+        await conn.execute(
+            text(
+                'INSERT INTO telemetries (average_speed, distance_traveled, '
+                'energy_consumed, average_current, status, route_id) '
+                "SELECT random(), random(), random(), random(), 'success', "
+                ':route_id FROM generate_series(1, :rows)'
+            ),
+            {'route_id': route_id, 'rows': rows},
+        )
+        await conn.execute(text('ANALYZE telemetries'))
+
+    return route_id
+
+
+async def cursor_at(offset: int) -> str:
+    async with engine.connect() as conn:
+        row = (
+            await conn.execute(
+                select(Telemetry.created_at, Telemetry.id)
+                .order_by(Telemetry.created_at, Telemetry.id)
+                .offset(offset - 1)
+                .limit(1)
+            )
+        ).one()
+
+    return encode_cursor(row.created_at, row.id)
+
+
+async def median_ms(client, params: dict, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await client.get('/telemetries/', params=params)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(timings)
+
+
+async def main(rows: int, limit: int, pages: list[int], repeat: int):
+    async with bench_client() as client:
+        await seed(rows)
+
+        print(f'{"page":>8} {"offset (ms)":>12} {"cursor (ms)":>12}')
+        for page in pages:
+            offset = (page - 1) * limit
+
+            offset_ms = await median_ms(
+                client, {'offset': offset, 'limit': limit}, repeat
+            )
+
+            params = {'limit': limit}
+            if offset:
+                params['cursor'] = await cursor_at(offset)
+
+            cursor_ms = await median_ms(client, params, repeat)
+
+            print(f'{page:>8} {offset_ms:>12.2f} {cursor_ms:>12.2f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='OFFSET vs keyset pagination latency by page depth'
+    )
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument(
+        '--pages', type=int, nargs='+', default=[1, 100, 1_000, 10_000]
+    )
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.limit, args.pages, args.repeat))
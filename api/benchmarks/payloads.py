@@ -0,0 +1,13 @@
+# the telemetry the benchmarks and tests send
+TELEMETRY = {
+    'average_speed': 10,
+    'distance_traveled': 200,
+    'energy_consumed': 100,
+    'average_current': 100,
+    'status': 'success',
+}
+
+
+def telemetry_payload(**values) -> dict:
+    """TELEMETRY with some fields replaced or added, e.g. a route_id."""
+    return {**TELEMETRY, **values}
@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.app import app
+from api.cache import get_route_cache
+from api.database import (
+    create_engine,
+    get_engine,
+    get_read_session,
+    get_session,
+    pool_status,
+)
+from api.settings import get_settings
+from benchmarks.common import bench_client, create_route, report, timer
+
+engine = get_engine()
+
+
+async def run(client, route_id: int, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def request(index: int):
+        async with semaphore:
+            if index % 2:
+                get_route_cache().clear()
+                await client.get(f'/routes/{route_id}')
+            else:
+                await client.get('/telemetries/', params={'limit': 50})
+
+    await asyncio.gather(*(request(index) for index in range(requests)))
+
+
+async def main(pool_sizes: list[int], requests: int, concurrency: int):
+    async with bench_client() as client:
+        async with engine.begin() as conn:
+            route_id = await create_route(conn)
+
+        for pool_size in pool_sizes:
+            settings = get_settings().model_copy(
+                update={
+                    'DATABASE_POOL_SIZE': pool_size,
+                    'DATABASE_MAX_OVERFLOW': 0,
+                }
+            )
+            pooled = create_engine(settings)
+
+            async def get_session_override():
+                async with AsyncSession(
+                    pooled, expire_on_commit=False
+                ) as session:
+                    yield session
+
+            app.dependency_overrides[get_session] = get_session_override
+            app.dependency_overrides[get_read_session] = get_session_override
+
+            # warm the pool so connection setup is not measured
+            await run(client, route_id, pool_size * 2, pool_size)
+
+            with timer() as elapsed:
+                await run(client, route_id, requests, concurrency)
+
+            report(
+                f'pool_size={pool_size}',
+                requests,
+                elapsed['seconds'],
+                unit='reqs',
+            )
+            print(f'{"":<28} {pool_status(pooled)}')
+
+            app.dependency_overrides.clear()
+            await pooled.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Request throughput by connection pool size'
+    )
+    parser.add_argument(
+        '--pool-sizes', type=int, nargs='+', default=[1, 2, 5, 10, 20]
+    )
+    parser.add_argument('--requests', type=int, default=2_000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.pool_sizes, args.requests, args.concurrency))
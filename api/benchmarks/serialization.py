@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import time
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.database import get_engine
+from api.models import Telemetry
+from api.schemas import TelemetryPublicList
+from api.serialization import telemetry_page
+from benchmarks.common import bench_client
+from benchmarks.pagination import seed
+
+engine = get_engine()
+
+
+def response_model_body(telemetries) -> bytes:
+    content = {'telemetries': telemetries, 'next_cursor': None}
+    return JSONResponse(
+        TelemetryPublicList.model_validate(content).model_dump(mode='json')
+    ).body
+
+
+async def orm_path(session: AsyncSession, limit: int) -> bytes:
+    query = select(Telemetry).order_by(Telemetry.id).limit(limit)
+    telemetries = (await session.scalars(query)).all()
+    session.expunge_all()
+
+    return response_model_body(telemetries)
+
+
+async def row_path(session: AsyncSession, limit: int) -> bytes:
+    query = (
+        select(*telemetry_page.columns(Telemetry))
+        .order_by(Telemetry.id)
+        .limit(limit)
+    )
+    rows = (await session.execute(query)).all()
+
+    return telemetry_page.dump_json(rows, None)
+
+
+async def cpu_us_per_row(path, limit: int, repeat: int) -> float:
+    async with AsyncSession(engine) as session:
+        start = time.process_time()
+        for _ in range(repeat):
+            await path(session, limit)
+        elapsed = time.process_time() - start
+
+    return elapsed / (repeat * limit) * 1_000_000
+
+
+async def main(limits: list[int], repeat: int):
+    async with bench_client():
+        await seed(max(limits))
+
+        async with AsyncSession(engine) as session:
+            assert await orm_path(session, 100) == await row_path(session, 100)
+
+        print(f'{"rows":>8} {"orm (us/row)":>14} {"rows (us/row)":>14}')
+        for limit in limits:
+            orm = await cpu_us_per_row(orm_path, limit, repeat)
+            rows = await cpu_us_per_row(row_path, limit, repeat)
+
+            print(f'{limit:>8} {orm:>14.2f} {rows:>14.2f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='CPU per row: ORM + response_model vs row serializer'
+    )
+    parser.add_argument(
+        '--limits', type=int, nargs='+', default=[100, 1_000, 10_000]
+    )
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.limits, args.repeat))
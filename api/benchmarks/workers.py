@@ -0,0 +1,135 @@
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+from sqlalchemy import text
+
+from api.database import get_engine
+from api.models import table_registry
+from benchmarks.common import create_route, report
+
+engine = get_engine()
+
+STARTUP_TIMEOUT = 30
+
+
+async def seed(telemetries: int) -> int:
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+        route_id = await create_route(conn)
+        await conn.execute(
+            text(
+                'INSERT INTO telemetries (average_speed, distance_traveled, '
+                'energy_consumed, average_current, status, route_id) '
+                "SELECT random(), random(), random(), random(), 'success', "
+                ':route_id FROM generate_series(1, :rows)'
+            ),
+            {'route_id': route_id, 'rows': telemetries},
+        )
+    await engine.dispose()
+
+    return route_id
+
+
+def start_server(port: int, workers: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            '-m',
+            'api.server',
+            '--port',
+            str(port),
+            '--workers',
+            str(workers),
+        ],
+        env={**os.environ, 'DATABASE_POOL_WARMUP': '5'},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f'http://127.0.0.1:{port}/system/pool')
+            return server
+        except httpx.TransportError:
+            time.sleep(0.2)
+
+    server.terminate()
+    raise RuntimeError('server did not start')
+
+
+async def load(url: str, route_id: int, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits) as client:
+
+        async def request(index: int):
+            async with semaphore:
+                if index % 2:
+                    await client.get(f'/routes/{route_id}')
+                else:
+                    await client.get('/telemetries/', params={'limit': 50})
+
+        await asyncio.gather(*(request(index) for index in range(requests)))
+
+
+def run_client(url: str, route_id: int, requests: int, concurrency: int):
+    asyncio.run(load(url, route_id, requests, concurrency))
+
+
+def run(pool: ProcessPoolExecutor, url: str, route_id: int, args) -> float:
+    # clients in their own processes, one event loop would saturate first
+    start = time.perf_counter()
+    futures = [
+        pool.submit(run_client, url, route_id, args.requests, args.concurrency)
+        for _ in range(args.clients)
+    ]
+    for future in futures:
+        future.result()
+    return time.perf_counter() - start
+
+
+def main(args):
+    route_id = asyncio.run(seed(args.telemetries))
+
+    with ProcessPoolExecutor(args.clients) as pool:
+        for workers in args.workers:
+            server = start_server(args.port, workers)
+            url = f'http://127.0.0.1:{args.port}'
+            try:
+                # a first round so every worker has served before timing
+                run(pool, url, route_id, args)
+                seconds = run(pool, url, route_id, args)
+            finally:
+                server.terminate()
+                server.wait()
+
+            report(
+                f'workers={workers}',
+                args.requests * args.clients,
+                seconds,
+                unit='reqs',
+            )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Request throughput by uvicorn worker count'
+    )
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--requests', type=int, default=2_000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument(
+        '--clients', type=int, default=4, help='load generator processes'
+    )
+    parser.add_argument('--telemetries', type=int, default=10_000)
+    parser.add_argument('--port', type=int, default=8765)
+
+    main(parser.parse_args())
@@ -1,7 +1,8 @@
 #!/bin/sh
+set -e
 
-# Executar migrações
-poetry run alembic upgrade head
+# Executar migrações (só roda o alembic se o banco não estiver no head)
+python -m api.migrate
 
-# Iniciar aplicação
-poetry run uvicorn --host 0.0.0.0 --port 8000 api.app:app
\ No newline at end of file
+# Iniciar aplicação (WORKERS define o número de processos)
+exec python -m api.server --host 0.0.0.0 --port 8000
@@ -1,4 +1,5 @@
 import asyncio
+import re
 
 from logging.config import fileConfig
 
@@ -6,14 +7,24 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 from sqlalchemy import pool
 
 from alembic import context
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from api.models import table_registry
-from api.settings import Settings
+
+
+class MigrationSettings(BaseSettings):
+    # only what migrations need, the rest of the app config may be absent
+    model_config = SettingsConfigDict(
+        env_file='.env', env_file_encoding='utf-8', extra='ignore'
+    )
+
+    DATABASE_URL: str
+
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
-config.set_main_option('sqlalchemy.url', Settings().DATABASE_URL)
+config.set_main_option('sqlalchemy.url', MigrationSettings().DATABASE_URL)
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -26,6 +37,17 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = table_registry.metadata
 
+
+# telemetries partitions are managed by api.partitions, not the models
+PARTITION = re.compile(r'^telemetries_(default|y\d{4}m\d{2})$')
+
+
+def include_name(name, type_, parent_names):
+    if type_ == 'table':
+        return PARTITION.match(name) is None
+
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -48,6 +70,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -57,7 +80,11 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection):
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
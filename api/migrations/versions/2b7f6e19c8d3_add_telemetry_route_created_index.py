@@ -0,0 +1,29 @@
+"""add telemetry route created index
+
+Revision ID: 2b7f6e19c8d3
+Revises: 9d41f0c3a7b2
+Create Date: 2025-11-26 18:03:54.640913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b7f6e19c8d3'
+down_revision: Union[str, Sequence[str], None] = '9d41f0c3a7b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # created_at range scans are served by ix_telemetries_created_at_id
+    op.create_index('ix_telemetries_route_id_created_at', 'telemetries', ['route_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_telemetries_route_id_created_at', table_name='telemetries')
@@ -0,0 +1,32 @@
+"""add telemetry filter indexes
+
+Revision ID: 3b8e5d0f7a21
+Revises: f2a7c9d41b36
+Create Date: 2025-12-07 16:02:51.774190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8e5d0f7a21'
+down_revision: Union[str, Sequence[str], None] = 'f2a7c9d41b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_telemetries_failed_route_id_created_at', 'telemetries', ['route_id', 'created_at'], unique=False, postgresql_where=sa.text("status = 'failed'"))
+    op.create_index('ix_telemetries_failed_created_at_id', 'telemetries', ['created_at', 'id'], unique=False, postgresql_where=sa.text("status = 'failed'"))
+    op.create_index('ix_telemetries_route_id_energy_consumed_id', 'telemetries', ['route_id', 'energy_consumed', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_telemetries_route_id_energy_consumed_id', table_name='telemetries')
+    op.drop_index('ix_telemetries_failed_created_at_id', table_name='telemetries', postgresql_where=sa.text("status = 'failed'"))
+    op.drop_index('ix_telemetries_failed_route_id_created_at', table_name='telemetries', postgresql_where=sa.text("status = 'failed'"))
@@ -0,0 +1,30 @@
+"""add pagination indexes
+
+Revision ID: 5c2e8b7d4f10
+Revises: a1f39d76406a
+Create Date: 2025-11-20 19:42:11.507230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e8b7d4f10'
+down_revision: Union[str, Sequence[str], None] = 'a1f39d76406a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_routes_created_at_id', 'routes', ['created_at', 'id'], unique=False)
+    op.create_index('ix_telemetries_created_at_id', 'telemetries', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_telemetries_created_at_id', table_name='telemetries')
+    op.drop_index('ix_routes_created_at_id', table_name='routes')
@@ -0,0 +1,35 @@
+"""create route leaderboards
+
+Revision ID: 6a0d3e8f1c57
+Revises: 3b8e5d0f7a21
+Create Date: 2026-10-18 14:02:51.734190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a0d3e8f1c57'
+down_revision: Union[str, Sequence[str], None] = '3b8e5d0f7a21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # filled by the API at startup, see api.leaderboard
+    op.create_table('route_leaderboards',
+    sa.Column('board', sa.String(length=32), nullable=False),
+    sa.Column('route_id', sa.Integer(), nullable=False),
+    sa.Column('value', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['route_id'], ['routes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('board', 'route_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('route_leaderboards')
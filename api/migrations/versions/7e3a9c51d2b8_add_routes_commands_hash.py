@@ -0,0 +1,71 @@
+"""add routes commands hash
+
+Revision ID: 7e3a9c51d2b8
+Revises: 2b7f6e19c8d3
+Create Date: 2025-11-29 16:48:02.913754
+
+"""
+import hashlib
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e3a9c51d2b8'
+down_revision: Union[str, Sequence[str], None] = '2b7f6e19c8d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# a frozen copy of api.commands.commands_hash as of this revision, Postgres
+# upper() and \s do not match Python's str.upper() and re on non-ASCII input
+def commands_hash(commands: str) -> str:
+    commands = re.sub(r'\s+', ' ', re.sub(r'\s*,\s*', ', ', commands.strip())).upper()
+    return hashlib.sha256(commands.encode()).hexdigest()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('routes', sa.Column('commands_hash', sa.String(length=64), nullable=True))
+    # hash the existing routes with the function above
+    connection = op.get_bind()
+    routes = sa.table('routes', sa.column('id'), sa.column('commands'), sa.column('commands_hash'))
+    hashes = [
+        {'route_id': id, 'hash': commands_hash(commands)}
+        for id, commands in connection.execute(sa.select(routes.c.id, routes.c.commands)).all()
+    ]
+    if hashes:
+        connection.execute(
+            routes.update()
+            .where(routes.c.id == sa.bindparam('route_id'))
+            .values(commands_hash=sa.bindparam('hash')),
+            hashes,
+        )
+    # routes that only differed by case or whitespace were distinct under
+    # routes_commands_key but share a hash now, the unique index would fail
+    collisions = op.get_bind().execute(sa.text("""
+        SELECT array_agg(id ORDER BY id)
+        FROM routes
+        GROUP BY commands_hash
+        HAVING count(*) > 1
+        ORDER BY min(id)
+    """)).scalars().all()
+    if collisions:
+        raise RuntimeError(
+            'Routes with the same normalized commands, keep one of each '
+            'group and move its telemetries before upgrading: '
+            + '; '.join(', '.join(map(str, ids)) for ids in collisions)
+        )
+    op.alter_column('routes', 'commands_hash', nullable=False)
+    op.create_index(op.f('ix_routes_commands_hash'), 'routes', ['commands_hash'], unique=True)
+    op.drop_constraint(op.f('routes_commands_key'), 'routes', type_='unique')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_unique_constraint(op.f('routes_commands_key'), 'routes', ['commands'])
+    op.drop_index(op.f('ix_routes_commands_hash'), table_name='routes')
+    op.drop_column('routes', 'commands_hash')
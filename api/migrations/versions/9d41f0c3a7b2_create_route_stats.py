@@ -0,0 +1,72 @@
+"""create route stats
+
+Revision ID: 9d41f0c3a7b2
+Revises: 5c2e8b7d4f10
+Create Date: 2025-11-24 20:15:37.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d41f0c3a7b2'
+down_revision: Union[str, Sequence[str], None] = '5c2e8b7d4f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('route_stats',
+    sa.Column('route_id', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('success_count', sa.Integer(), nullable=False),
+    sa.Column('failed_count', sa.Integer(), nullable=False),
+    sa.Column('average_speed_sum', sa.Float(), nullable=False),
+    sa.Column('average_speed_sum_sq', sa.Float(), nullable=False),
+    sa.Column('average_speed_min', sa.Float(), nullable=True),
+    sa.Column('average_speed_max', sa.Float(), nullable=True),
+    sa.Column('distance_traveled_sum', sa.Float(), nullable=False),
+    sa.Column('distance_traveled_sum_sq', sa.Float(), nullable=False),
+    sa.Column('distance_traveled_min', sa.Float(), nullable=True),
+    sa.Column('distance_traveled_max', sa.Float(), nullable=True),
+    sa.Column('energy_consumed_sum', sa.Float(), nullable=False),
+    sa.Column('energy_consumed_sum_sq', sa.Float(), nullable=False),
+    sa.Column('energy_consumed_min', sa.Float(), nullable=True),
+    sa.Column('energy_consumed_max', sa.Float(), nullable=True),
+    sa.Column('average_current_sum', sa.Float(), nullable=False),
+    sa.Column('average_current_sum_sq', sa.Float(), nullable=False),
+    sa.Column('average_current_min', sa.Float(), nullable=True),
+    sa.Column('average_current_max', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['route_id'], ['routes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('route_id')
+    )
+    # backfill from the existing telemetries (same as `python -m api.stats`)
+    op.execute("""
+        INSERT INTO route_stats (
+            route_id, count, success_count, failed_count,
+            average_speed_sum, average_speed_sum_sq, average_speed_min, average_speed_max,
+            distance_traveled_sum, distance_traveled_sum_sq, distance_traveled_min, distance_traveled_max,
+            energy_consumed_sum, energy_consumed_sum_sq, energy_consumed_min, energy_consumed_max,
+            average_current_sum, average_current_sum_sq, average_current_min, average_current_max
+        )
+        SELECT
+            route_id,
+            count(*),
+            count(*) FILTER (WHERE status = 'success'),
+            count(*) FILTER (WHERE status = 'failed'),
+            sum(average_speed), sum(average_speed * average_speed), min(average_speed), max(average_speed),
+            sum(distance_traveled), sum(distance_traveled * distance_traveled), min(distance_traveled), max(distance_traveled),
+            sum(energy_consumed), sum(energy_consumed * energy_consumed), min(energy_consumed), max(energy_consumed),
+            sum(average_current), sum(average_current * average_current), min(average_current), max(average_current)
+        FROM telemetries
+        GROUP BY route_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('route_stats')
@@ -0,0 +1,119 @@
+"""add routes parsed commands
+
+Revision ID: c4d8a2f6e913
+Revises: 7e3a9c51d2b8
+Create Date: 2025-12-02 21:27:45.338190
+
+"""
+import math
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d8a2f6e913'
+down_revision: Union[str, Sequence[str], None] = '7e3a9c51d2b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    'opcodes',
+    'arguments',
+    'step_count',
+    'total_distance',
+    'total_rotation',
+    'final_x',
+    'final_y',
+    'final_heading',
+)
+
+# a frozen copy of api.commands as of this revision, so later changes to
+# the parser do not change what this migration writes
+ANDAR, GIRAR, ENTREGAR = 1, 2, 3
+COMMAND = re.compile(
+    r'ANDAR (?P<distance>-?\d+) CM'
+    r'|GIRAR (?P<angle>\d+) GRAUS (?P<direction>DIREITA|ESQUERDA)'
+    r'|ENTREGAR'
+)
+
+
+def route_values(commands: str) -> dict:
+    commands = re.sub(r'\s+', ' ', re.sub(r'\s*,\s*', ', ', commands.strip())).upper()
+    opcodes, arguments = [], []
+
+    for command in commands.split(', '):
+        match = COMMAND.fullmatch(command)
+        if match is None:
+            raise ValueError(f'Invalid command: {command!r}')
+
+        if match['distance'] is not None:
+            opcodes.append(ANDAR)
+            arguments.append(int(match['distance']))
+        elif match['angle'] is not None:
+            sign = 1 if match['direction'] == 'DIREITA' else -1
+            opcodes.append(GIRAR)
+            arguments.append(sign * int(match['angle']))
+        else:
+            opcodes.append(ENTREGAR)
+            arguments.append(0)
+
+    # starts at the origin facing +y, DIREITA turns clockwise
+    x = y = 0.0
+    heading = total_distance = total_rotation = 0
+    for opcode, argument in zip(opcodes, arguments):
+        if opcode == ANDAR:
+            total_distance += abs(argument)
+            x += argument * math.sin(math.radians(heading))
+            y += argument * math.cos(math.radians(heading))
+        elif opcode == GIRAR:
+            total_rotation += abs(argument)
+            heading = (heading + argument) % 360
+
+    return {
+        'opcodes': opcodes,
+        'arguments': arguments,
+        'step_count': len(opcodes),
+        'total_distance': total_distance,
+        'total_rotation': total_rotation,
+        'final_x': round(x, 3),
+        'final_y': round(y, 3),
+        'final_heading': heading,
+    }
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('routes', sa.Column('opcodes', postgresql.ARRAY(sa.SmallInteger()), nullable=True))
+    op.add_column('routes', sa.Column('arguments', postgresql.ARRAY(sa.Integer()), nullable=True))
+    op.add_column('routes', sa.Column('step_count', sa.Integer(), nullable=True))
+    op.add_column('routes', sa.Column('total_distance', sa.Integer(), nullable=True))
+    op.add_column('routes', sa.Column('total_rotation', sa.Integer(), nullable=True))
+    op.add_column('routes', sa.Column('final_x', sa.Float(), nullable=True))
+    op.add_column('routes', sa.Column('final_y', sa.Float(), nullable=True))
+    op.add_column('routes', sa.Column('final_heading', sa.Integer(), nullable=True))
+
+    # parse the existing routes once with the parser above;
+    # routes that no longer parse keep an empty program
+    connection = op.get_bind()
+    routes = sa.table('routes', sa.column('id'), sa.column('commands'), *(sa.column(name) for name in COLUMNS))
+    for id, commands in connection.execute(sa.select(routes.c.id, routes.c.commands)).all():
+        try:
+            values = route_values(commands)
+        except ValueError:
+            values = dict.fromkeys(COLUMNS, 0) | {'opcodes': [], 'arguments': []}
+        connection.execute(
+            routes.update().where(routes.c.id == id).values({name: values[name] for name in COLUMNS})
+        )
+
+    for name in COLUMNS:
+        op.alter_column('routes', name, nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in reversed(COLUMNS):
+        op.drop_column('routes', name)
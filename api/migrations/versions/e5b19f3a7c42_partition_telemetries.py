@@ -0,0 +1,104 @@
+"""partition telemetries
+
+Revision ID: e5b19f3a7c42
+Revises: c4d8a2f6e913
+Create Date: 2025-12-04 19:42:11.512304
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b19f3a7c42'
+down_revision: Union[str, Sequence[str], None] = 'c4d8a2f6e913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = 'id, average_speed, distance_traveled, energy_consumed, average_current, status, created_at, route_id'
+MONTHS_AHEAD = 3
+
+
+# partition helpers as of this revision, frozen so later changes to
+# api.partitions do not change what this migration does
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partition(month: date) -> None:
+    # filled from the default partition before being attached, Postgres
+    # refuses to attach a range the default partition has rows for
+    name = f'telemetries_y{month:%Y}m{month:%m}'
+    end = _add_months(month, 1)
+    bounds = f"created_at >= '{month}' AND created_at < '{end}'"
+
+    op.execute(f'CREATE TABLE {name} (LIKE telemetries INCLUDING DEFAULTS)')
+    op.execute(f'INSERT INTO {name} SELECT * FROM telemetries_default WHERE {bounds}')
+    op.execute(f'DELETE FROM telemetries_default WHERE {bounds}')
+    op.execute(f"ALTER TABLE telemetries ATTACH PARTITION {name} FOR VALUES FROM ('{month}') TO ('{end}')")
+
+
+def _telemetries_table(primary_key, **kwargs) -> None:
+    op.create_table('telemetries',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('telemetries_id_seq'::regclass)"), nullable=False),
+    sa.Column('average_speed', sa.Float(), nullable=False),
+    sa.Column('distance_traveled', sa.Float(), nullable=False),
+    sa.Column('energy_consumed', sa.Float(), nullable=False),
+    sa.Column('average_current', sa.Float(), nullable=False),
+    sa.Column('status', postgresql.ENUM('success', 'failed', name='statusstate', create_type=False), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('route_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['route_id'], ['routes.id'], name='telemetries_route_id_fkey'),
+    primary_key,
+    **kwargs,
+    )
+    op.create_index('ix_telemetries_created_at_id', 'telemetries', ['created_at', 'id'], unique=False)
+    op.create_index('ix_telemetries_route_id_created_at', 'telemetries', ['route_id', 'created_at'], unique=False)
+
+
+def _replace_telemetries(primary_key, **kwargs) -> None:
+    # the old table keeps its data until it is copied; its index and
+    # constraint names are freed for the new table
+    op.rename_table('telemetries', 'telemetries_old')
+    op.drop_index('ix_telemetries_created_at_id', table_name='telemetries_old')
+    op.drop_index('ix_telemetries_route_id_created_at', table_name='telemetries_old')
+    op.execute('ALTER TABLE telemetries_old RENAME CONSTRAINT telemetries_pkey TO telemetries_old_pkey')
+    op.execute('ALTER TABLE telemetries_old RENAME CONSTRAINT telemetries_route_id_fkey TO telemetries_old_route_id_fkey')
+
+    _telemetries_table(primary_key, **kwargs)
+
+
+def _finish_copy() -> None:
+    op.execute(f'INSERT INTO telemetries ({COLUMNS}) SELECT {COLUMNS} FROM telemetries_old')
+    op.execute('ALTER SEQUENCE telemetries_id_seq OWNED BY telemetries.id')
+    op.drop_table('telemetries_old')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _replace_telemetries(
+        sa.PrimaryKeyConstraint('id', 'created_at'),
+        postgresql_partition_by='RANGE (created_at)',
+    )
+    op.execute('CREATE TABLE telemetries_default PARTITION OF telemetries DEFAULT')
+
+    # one partition per month holding data, up to a few months ahead
+    first = op.get_bind().scalar(sa.text('SELECT min(created_at) FROM telemetries_old'))
+    month = (first.date() if first else date.today()).replace(day=1)
+    last = _add_months(date.today().replace(day=1), MONTHS_AHEAD)
+    while month <= last:
+        _create_partition(month)
+        month = _add_months(month, 1)
+
+    _finish_copy()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _replace_telemetries(sa.PrimaryKeyConstraint('id'))
+    _finish_copy()
@@ -0,0 +1,30 @@
+"""cascade telemetries route fk
+
+Revision ID: f2a7c9d41b36
+Revises: e5b19f3a7c42
+Create Date: 2025-12-06 10:14:37.209518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a7c9d41b36'
+down_revision: Union[str, Sequence[str], None] = 'e5b19f3a7c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_constraint(op.f('telemetries_route_id_fkey'), 'telemetries', type_='foreignkey')
+    op.create_foreign_key(op.f('telemetries_route_id_fkey'), 'telemetries', 'routes', ['route_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(op.f('telemetries_route_id_fkey'), 'telemetries', type_='foreignkey')
+    op.create_foreign_key(op.f('telemetries_route_id_fkey'), 'telemetries', 'routes', ['route_id'], ['id'])
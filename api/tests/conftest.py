@@ -4,13 +4,21 @@ from datetime import datetime
 import pytest
 import pytest_asyncio
 from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
 from sqlalchemy import event
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from testcontainers.postgres import PostgresContainer
 
 from api.app import app
-from api.database import get_session
+from api.cache import get_route_cache, get_route_hash_cache
+from api.database import get_read_session, get_session
+from api.ingest import TelemetryIngestQueue
 from api.models import Route, Telemetry, table_registry
+from benchmarks.payloads import TELEMETRY
 
 
 @pytest.fixture
@@ -20,11 +28,60 @@ def client(session: AsyncSession):
 
     with TestClient(app) as client:
         app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_read_session] = get_session_override
         yield client
 
     app.dependency_overrides.clear()
 
 
+@pytest_asyncio.fixture
+async def async_client(engine, session: AsyncSession):
+    async def get_session_override():
+        async with AsyncSession(
+            engine, expire_on_commit=False
+        ) as request_session:
+            yield request_session
+
+    app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_read_session] = get_session_override
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url='http://test'
+    ) as client:
+        yield client
+
+    app.dependency_overrides.clear()
+
+
+@pytest_asyncio.fixture
+async def ingest_queue(engine, session: AsyncSession):
+    queues = []
+
+    def _ingest_queue(
+        *, maxsize=100, batch_size=10, flush_interval=0.01, put_timeout=0.01
+    ):
+        queue = TelemetryIngestQueue(
+            async_sessionmaker(engine, expire_on_commit=False),
+            maxsize=maxsize,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            put_timeout=put_timeout,
+            retries=3,
+            retry_backoff=0,
+        )
+        app.state.ingest_queue = queue
+        queues.append(queue)
+        return queue
+
+    yield _ingest_queue
+
+    for queue in queues:
+        queue.start()
+        await queue.stop()
+
+    app.state.ingest_queue = None
+
+
 @pytest.fixture(scope='session')
 def engine():
     with PostgresContainer('postgres:18', driver='psycopg') as postgres:
@@ -39,20 +96,16 @@ async def session(engine):
     async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
 
+    get_route_cache().clear()
+    get_route_hash_cache().clear()
+
     async with engine.begin() as conn:
         await conn.run_sync(table_registry.metadata.drop_all)
 
 
 @pytest_asyncio.fixture
 async def telemetry(session: AsyncSession, route: Route):
-    telemetry = Telemetry(
-        average_speed=10,
-        distance_traveled=200,
-        energy_consumed=100,
-        average_current=100,
-        status='success',
-        route_id=route.id,
-    )
+    telemetry = Telemetry(**TELEMETRY, route_id=route.id)
     session.add(telemetry)
     await session.commit()
     await session.refresh(telemetry)
@@ -94,3 +147,60 @@ def _mock_db_time(*, model, time=datetime(2025, 1, 1)):
 @pytest.fixture
 def mock_db_time():
     return _mock_db_time
+
+
+@pytest.fixture
+def count_queries(engine):
+    @contextmanager
+    def _count_queries():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(
+            engine.sync_engine, 'before_cursor_execute', before_cursor_execute
+        )
+
+        yield statements
+
+        event.remove(
+            engine.sync_engine, 'before_cursor_execute', before_cursor_execute
+        )
+
+    return _count_queries
+
+
+@pytest.fixture
+def query_budget(count_queries):
+    @contextmanager
+    def _query_budget(limit: int):
+        with count_queries() as statements:
+            yield statements
+
+        assert len(statements) <= limit, (
+            f'{len(statements)} statements, budget is {limit}:\n'
+            + '\n'.join(statements)
+        )
+
+    return _query_budget
+
+
+@pytest.fixture
+def populate(client):
+    def _populate(routes: int, telemetries: int) -> list[int]:
+        route_ids = []
+
+        for n in range(routes):
+            response = client.post(
+                '/routes/', json={'commands': f'ANDAR {n + 1} CM, ENTREGAR'}
+            )
+            route_ids.append(response.json()['id'])
+            client.post(
+                f'/telemetries/{route_ids[-1]}/batch',
+                json={'telemetries': [TELEMETRY] * telemetries},
+            )
+
+        return route_ids
+
+    return _populate
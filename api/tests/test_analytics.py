@@ -0,0 +1,230 @@
+from datetime import date, datetime
+from http import HTTPStatus
+
+import numpy as np
+import pytest
+from sqlalchemy import insert
+
+from api.analytics import fetch_columns, iqr_scores, zscores
+from api.archive import archive_months, get_archive
+from api.models import Route, Telemetry
+from api.schemas import TelemetryRange
+from benchmarks.payloads import telemetry_payload
+
+GROUPS = 4
+
+
+def telemetry(route_id, distance, energy, speed=10, current=2, **values):
+    return telemetry_payload(
+        average_speed=speed,
+        distance_traveled=distance,
+        energy_consumed=energy,
+        average_current=current,
+        route_id=route_id,
+        **values,
+    )
+
+
+async def insert_telemetries(session, rows: list[dict]) -> list[int]:
+    ids = await session.scalars(
+        insert(Telemetry).returning(Telemetry.id), rows
+    )
+    await session.commit()
+    return ids.all()
+
+
+@pytest.fixture
+def archive_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(get_archive(), 'directory', tmp_path)
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_fetch_columns(engine, session, route, archive_dir):
+    ids = await insert_telemetries(
+        session,
+        [
+            telemetry(route.id, 200, 100, created_at=datetime(2024, 12, 1)),
+            telemetry(route.id, 100, 300, status='failed'),
+        ],
+    )
+    await archive_months(engine, get_archive(), 1, today=date(2025, 3, 1))
+
+    columns = await fetch_columns(
+        await session.connection(), get_archive(), TelemetryRange()
+    )
+
+    # Postgres rows first, then the archive
+    assert columns['id'].tolist() == [ids[1], ids[0]]
+    assert columns['route_id'].tolist() == [route.id, route.id]
+    assert columns['distance_traveled'].tolist() == [100, 200]
+    assert columns['energy_consumed'].tolist() == [300, 100]
+    assert columns['failed'].tolist() == [True, False]
+
+
+@pytest.mark.asyncio
+async def test_read_efficiency(async_client, session, route):
+    other = Route(commands='ANDAR 10 CM, ENTREGAR')
+    session.add(other)
+    await session.commit()
+    await insert_telemetries(
+        session,
+        [
+            telemetry(route.id, 100, 100, speed=1, current=2),
+            telemetry(route.id, 300, 500, speed=2, current=4, status='failed'),
+            telemetry(other.id, 50, 25, speed=3, current=1),
+        ],
+    )
+
+    response = await async_client.get('/analytics/efficiency')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'fleet': {
+            'count': 3,
+            'routes': 2,
+            'failure_rate': pytest.approx(1 / 3),
+            'energy_per_meter': pytest.approx(625 / 450),
+            'speed_current_correlation': pytest.approx(
+                np.corrcoef([1, 2, 3], [2, 4, 1])[0, 1]
+            ),
+        },
+        'routes': [
+            {
+                'route_id': route.id,
+                'count': 2,
+                'failure_rate': 0.5,
+                'energy_per_meter': 1.5,
+                'speed_current_correlation': pytest.approx(1),
+            },
+            {
+                'route_id': other.id,
+                'count': 1,
+                'failure_rate': 0.0,
+                'energy_per_meter': 0.5,
+                'speed_current_correlation': None,
+            },
+        ],
+    }
+
+    response = await async_client.get(
+        '/analytics/efficiency', params={'route_id': other.id}
+    )
+
+    assert [row['route_id'] for row in response.json()['routes']] == [other.id]
+
+
+def test_read_efficiency_empty(client):
+    response = client.get('/analytics/efficiency')
+
+    assert response.json() == {
+        'fleet': {
+            'count': 0,
+            'routes': 0,
+            'failure_rate': None,
+            'energy_per_meter': None,
+            'speed_current_correlation': None,
+        },
+        'routes': [],
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('method', ['zscore', 'iqr'])
+async def test_read_outliers(async_client, session, route, method):
+    # energy per meter around 1, one run far above it and one failing
+    # run with no distance, which has no energy per meter
+    rows = [telemetry(route.id, 100, 95 + n) for n in range(20)]
+    rows += [
+        telemetry(route.id, 100, 900, status='failed'),
+        telemetry(route.id, 0, 50, status='failed'),
+    ]
+    ids = await insert_telemetries(session, rows)
+
+    response = await async_client.get(
+        '/analytics/outliers', params={'method': method, 'limit': 5}
+    )
+    report = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert report['count'] == len(rows)
+    assert report['outlier_count'] == 1
+    assert report['failure_rate'] == {
+        'all': pytest.approx(2 / len(rows)),
+        'outliers': 1.0,
+    }
+    assert report['outliers'][0]['id'] == ids[-2]
+    assert report['outliers'][0]['value'] == pytest.approx(9)
+    assert report['outliers'][0]['failed']
+
+
+@pytest.mark.asyncio
+async def test_read_outliers_scope(async_client, session, route):
+    other = Route(commands='ANDAR 10 CM, ENTREGAR')
+    session.add(other)
+    await session.commit()
+    # each route is steady, but one of them runs at twice the other's speed
+    await insert_telemetries(
+        session,
+        [telemetry(route.id, 100, 100, speed=10 + n % 2) for n in range(30)]
+        + [telemetry(other.id, 100, 100, speed=40)],
+    )
+
+    outliers = {}
+    for scope in ('route', 'fleet'):
+        response = await async_client.get(
+            '/analytics/outliers',
+            params={'metric': 'average_speed', 'scope': scope},
+        )
+        outliers[scope] = [
+            row['route_id'] for row in response.json()['outliers']
+        ]
+
+    assert outliers == {'route': [], 'fleet': [other.id]}
+
+
+@pytest.mark.asyncio
+async def test_read_outliers_threshold_zero(async_client, session, route):
+    speeds = (9, 10, 11)
+    await insert_telemetries(
+        session,
+        [telemetry(route.id, 100, 100, speed=speed) for speed in speeds],
+    )
+
+    response = await async_client.get(
+        '/analytics/outliers',
+        params={'metric': 'average_speed', 'threshold': 0},
+    )
+
+    # every run off the mean is flagged, not the default 3 deviations
+    assert response.json()['threshold'] == 0
+    assert response.json()['outlier_count'] == len(speeds) - 1
+
+
+def test_read_outliers_invalid(client):
+    response = client.get('/analytics/outliers', params={'metric': 'status'})
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_scores_match_reference():
+    rng = np.random.default_rng(0)
+    group = rng.integers(0, GROUPS, 1_000)
+    values = rng.normal(size=1_000)
+    values[::50] = np.nan
+
+    z = zscores(values, group, GROUPS)
+    iqr = iqr_scores(values, group, GROUPS)
+
+    for n in range(GROUPS):
+        mask = (group == n) & np.isfinite(values)
+        x = values[mask]
+        q1, q3 = np.quantile(x, [0.25, 0.75])
+
+        assert np.allclose(z[mask], (x - x.mean()) / x.std())
+        assert np.allclose(
+            iqr[mask],
+            np.where(x > q3, x - q3, np.minimum(x - q1, 0)) / (q3 - q1),
+        )
+    assert not z[~np.isfinite(values)].any()
+    assert not iqr[~np.isfinite(values)].any()
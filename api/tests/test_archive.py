@@ -0,0 +1,266 @@
+import json
+from datetime import date, datetime
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from api import archive
+from api.archive import archive_months, get_archive
+from api.models import Telemetry
+from api.partitions import ensure_partitions
+from api.stats import rebuild_route_stats
+from benchmarks.payloads import telemetry_payload
+
+TODAY = date(2025, 3, 15)
+SAMPLES = [
+    (datetime(2024, 12, 30, 8), 100, 'success'),
+    (datetime(2025, 1, 2, 8), 300, 'success'),
+    (datetime(2025, 1, 2, 9), 50, 'failed'),
+    (datetime(2025, 3, 1, 8), 20, 'success'),
+]
+
+
+@pytest.fixture
+def archive_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(get_archive(), 'directory', tmp_path)
+    return tmp_path
+
+
+async def insert_telemetries(session, route_id: int, samples=SAMPLES):
+    ids = await session.scalars(
+        insert(Telemetry).returning(Telemetry.id),
+        [
+            telemetry_payload(
+                energy_consumed=energy,
+                average_current=2,
+                status=status,
+                route_id=route_id,
+                created_at=created_at,
+            )
+            for created_at, energy, status in samples
+        ],
+    )
+    await session.commit()
+    return ids.all()
+
+
+@pytest.mark.asyncio
+async def test_archive_months(engine, session, route, archive_dir):
+    ids = await insert_telemetries(session, route.id)
+    # january gets its own partition, december stays in the default one
+    await ensure_partitions(engine, 0, today=date(2025, 1, 1))
+
+    archived = await archive_months(engine, get_archive(), 1, today=TODAY)
+
+    assert archived == {'2024-12': 1, '2025-01': 2}
+    assert await session.scalar(select(func.count(Telemetry.id))) == 1
+    assert get_archive().stats()['months'] == ['2024-12', '2025-01']
+    assert get_archive().stats()['rows'] == len(SAMPLES) - 1
+    assert json.loads((archive_dir / '2025-01' / 'index.json').read_text())[
+        'min_id'
+    ] == min(ids[1:3])
+
+
+@pytest.mark.asyncio
+async def test_archive_months_leaves_route_stats(
+    engine, session, route, archive_dir, async_client
+):
+    await insert_telemetries(session, route.id)
+    await rebuild_route_stats(session)
+    await session.commit()
+    await ensure_partitions(engine, 0, today=date(2025, 1, 1))
+
+    await archive_months(engine, get_archive(), 1, today=TODAY)
+    stats = (await async_client.get(f'/routes/{route.id}/stats')).json()
+
+    # route_stats only describes the telemetries left in Postgres
+    assert stats['count'] == 1
+    assert stats['failed_count'] == 0
+    assert (
+        stats['energy_consumed']['min']
+        == stats['energy_consumed']['max']
+        == SAMPLES[-1][1]
+    )
+
+    await rebuild_route_stats(session)
+    await session.commit()
+
+    assert (await async_client.get(f'/routes/{route.id}/stats')).json() == (
+        stats
+    )
+
+
+@pytest.mark.asyncio
+async def test_archive_months_merges_late_rows(
+    engine, session, route, archive_dir
+):
+    await insert_telemetries(session, route.id)
+    await archive_months(engine, get_archive(), 1, today=TODAY)
+
+    late = await insert_telemetries(
+        session, route.id, [(datetime(2025, 1, 1), 10, 'failed')]
+    )
+    archived = await archive_months(engine, get_archive(), 1, today=TODAY)
+
+    assert archived == {'2025-01': 1}
+    assert get_archive().stats()['rows'] == len(SAMPLES)
+    assert get_archive().get(late[0]).created_at == datetime(2025, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_archive_months_failed_commit(
+    engine, session, route, archive_dir, monkeypatch
+):
+    async def fail(*args):
+        raise RuntimeError
+
+    await insert_telemetries(session, route.id)
+    monkeypatch.setattr(archive, 'forget_telemetries', fail)
+
+    with pytest.raises(RuntimeError):
+        await archive_months(engine, get_archive(), 1, today=TODAY)
+
+    # the staged month is dropped, the rows only live in Postgres
+    assert await session.scalar(select(func.count(Telemetry.id))) == len(
+        SAMPLES
+    )
+    assert get_archive().stats()['months'] == []
+    assert [path.name for path in archive_dir.iterdir()] == ['.lock']
+
+
+@pytest.mark.asyncio
+async def test_read_archived_telemetry(
+    engine, session, route, archive_dir, async_client
+):
+    ids = await insert_telemetries(session, route.id)
+    await archive_months(engine, get_archive(), 1, today=TODAY)
+
+    response = await async_client.get(f'/telemetries/{ids[1]}')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == telemetry_payload(
+        id=ids[1], energy_consumed=300, average_current=2
+    )
+
+    response = await async_client.get(f'/telemetries/{ids[-1] + 1}')
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_export_reads_archive_first(
+    engine, session, route, archive_dir, async_client
+):
+    ids = await insert_telemetries(session, route.id)
+    await archive_months(engine, get_archive(), 1, today=TODAY)
+
+    response = await async_client.get('/telemetries/export')
+    rows = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [row['id'] for row in rows] == ids
+    assert rows[0] == telemetry_payload(
+        id=ids[0],
+        route_id=route.id,
+        average_current=2,
+        created_at='2024-12-30T08:00:00',
+    )
+
+    response = await async_client.get(
+        '/telemetries/export',
+        params={
+            'format': 'csv',
+            'route_id': route.id,
+            'from': '2025-01-02T09:00:00',
+        },
+    )
+
+    assert [line.split(',')[0] for line in response.text.splitlines()] == [
+        'id',
+        str(ids[2]),
+        str(ids[3]),
+    ]
+
+    response = await async_client.get(
+        '/telemetries/export', params={'route_id': route.id + 1}
+    )
+
+    assert not response.text
+
+
+@pytest.mark.asyncio
+async def test_aggregate_merges_archive(
+    engine, session, route, archive_dir, async_client
+):
+    await insert_telemetries(session, route.id)
+    await archive_months(engine, get_archive(), 0, today=date(2025, 1, 1))
+
+    response = await async_client.get(
+        '/telemetries/aggregate', params={'bucket': 'week'}
+    )
+    buckets = response.json()['buckets']
+
+    # the week of 2024-12-30 has rows in the archive and in Postgres
+    assert [(bucket['bucket'], bucket['count']) for bucket in buckets] == [
+        ('2024-12-30T00:00:00', 3),
+        ('2025-02-24T00:00:00', 1),
+    ]
+    assert buckets[0]['energy_consumed'] == {
+        'total': 450.0,
+        'mean': 150.0,
+        'min': 50.0,
+        'max': 300.0,
+    }
+
+    response = await async_client.get(
+        '/telemetries/aggregate',
+        params={'bucket': 'hour', 'to': '2025-01-01T00:00:00'},
+    )
+
+    assert [
+        (bucket['bucket'], bucket['count'])
+        for bucket in response.json()['buckets']
+    ] == [('2024-12-30T08:00:00', 1)]
+
+
+@pytest.mark.asyncio
+async def test_delete_archived_telemetries(
+    engine, session, route, archive_dir, async_client
+):
+    ids = await insert_telemetries(session, route.id)
+    await archive_months(engine, get_archive(), 1, today=TODAY)
+
+    response = await async_client.delete(f'/telemetries/{ids[0]}')
+
+    assert response.status_code == HTTPStatus.OK
+    assert get_archive().stats()['months'] == ['2025-01']
+    response = await async_client.get(f'/telemetries/{ids[0]}')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+    response = await async_client.delete(
+        '/telemetries/', params={'status': 'failed'}
+    )
+
+    assert response.json() == {'deleted': 1}
+    response = await async_client.get('/telemetries/export')
+    assert [json.loads(line)['id'] for line in response.text.splitlines()] == [
+        ids[1],
+        ids[3],
+    ]
+
+    await async_client.delete(f'/routes/{route.id}')
+
+    assert get_archive().stats()['rows'] == 0
+    response = await async_client.get(f'/telemetries/{ids[1]}')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    response = await async_client.get(
+        '/telemetries/aggregate', params={'bucket': 'week'}
+    )
+    assert response.json() == {'buckets': []}
+
+
+def test_read_archive_stats(client, archive_dir):
+    response = client.get('/system/archive')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'months': [], 'rows': 0, 'bytes': 0}
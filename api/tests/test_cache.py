@@ -0,0 +1,60 @@
+from api.cache import LRUCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2, ttl=60)
+
+    cache.set('a', 'A')
+    cache.set('b', 'B')
+    cache.get('a')
+    cache.set('c', 'C')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 'A'
+    assert cache.get('c') == 'C'
+    assert cache.stats() == {
+        'size': 2,
+        'maxsize': 2,
+        'ttl': 60,
+        'hits': 3,
+        'misses': 1,
+        'evictions': 1,
+        'expirations': 0,
+    }
+
+
+def test_cache_expires_entries():
+    clock = FakeClock()
+    cache = LRUCache(maxsize=2, ttl=10, clock=clock)
+
+    cache.set('a', 1)
+    clock.now = 9
+    assert cache.get('a') == 1
+
+    clock.now = 10
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_cache_disabled():
+    cache = LRUCache(maxsize=0, ttl=10)
+
+    assert cache.set('a', 1) == 1
+    assert cache.get('a') is None
+
+
+def test_cache_pop_bumps_generation():
+    cache = LRUCache(maxsize=2, ttl=60)
+    generation = cache.generation('a')
+
+    cache.pop('a')
+
+    assert cache.generation('a') != generation
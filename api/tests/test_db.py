@@ -1,10 +1,14 @@
 from dataclasses import asdict
 
 import pytest
-from sqlalchemy import select
+from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.commands import route_values
+from api.database import create_engine, pool_status
 from api.models import Route, Telemetry
+from api.settings import Settings
+from benchmarks.payloads import TELEMETRY
 
 
 @pytest.mark.asyncio
@@ -26,7 +30,7 @@ async def test_create_route_db(session: AsyncSession, mock_db_time):
 
         assert asdict(route) == {
             'id': 1,
-            'commands': commands,
+            **route_values(commands),
             'created_at': time,
             'updated_at': time,
             'telemetries': [],
@@ -36,14 +40,7 @@ async def test_create_route_db(session: AsyncSession, mock_db_time):
 @pytest.mark.asyncio
 async def test_create_telemetry_db(session: AsyncSession, mock_db_time, route):
     with mock_db_time(model=Telemetry) as time:
-        new_telemetry = Telemetry(
-            average_speed=10,
-            distance_traveled=200,
-            energy_consumed=100,
-            average_current=100,
-            status='success',
-            route_id=route.id,
-        )
+        new_telemetry = Telemetry(**TELEMETRY, route_id=route.id)
 
         session.add(new_telemetry)
         await session.commit()
@@ -54,11 +51,33 @@ async def test_create_telemetry_db(session: AsyncSession, mock_db_time, route):
 
         assert asdict(telemetry) == {
             'id': 1,
-            'average_speed': 10,
-            'distance_traveled': 200,
-            'energy_consumed': 100,
-            'average_current': 100,
-            'status': 'success',
+            **TELEMETRY,
             'route_id': 1,
             'created_at': time,
         }
+
+
+@pytest.mark.asyncio
+async def test_engine_settings(engine):
+    settings = Settings(
+        DATABASE_URL=engine.url.render_as_string(hide_password=False),
+        DATABASE_POOL_SIZE=2,
+        DATABASE_STATEMENT_TIMEOUT=1500,
+        DATABASE_PREPARE_THRESHOLD=None,
+    )
+    configured = create_engine(settings)
+
+    async with configured.connect() as conn:
+        timeout = await conn.scalar(text('SHOW statement_timeout'))
+        raw = await conn.get_raw_connection()
+
+        assert timeout == '1500ms'
+        assert raw.driver_connection.prepare_threshold is None
+        assert pool_status(configured) == {
+            'size': 2,
+            'checked_in': 0,
+            'checked_out': 1,
+            'overflow': -1,
+        }
+
+    await configured.dispose()
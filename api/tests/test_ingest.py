@@ -0,0 +1,167 @@
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+from api.app import app
+from api.models import RouteStats, Telemetry
+from api.settings import get_settings
+from benchmarks.payloads import TELEMETRY, telemetry_payload
+
+
+def test_enqueue_telemetry_disabled(client, route):
+    response = client.post(f'/telemetries/{route.id}/queue', json=TELEMETRY)
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json() == {'detail': 'Ingest queue disabled'}
+
+    response = client.get('/system/ingest')
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+
+
+@pytest.mark.asyncio
+async def test_enqueue_telemetry(async_client, session, route, ingest_queue):
+    queue = ingest_queue()
+    queue.start()
+
+    response = await async_client.post(
+        f'/telemetries/{route.id}/queue', json=TELEMETRY
+    )
+
+    assert response.status_code == HTTPStatus.ACCEPTED
+    assert response.json() == {'message': 'Telemetry accepted'}
+
+    await queue.drain()
+
+    telemetry = await session.scalar(select(Telemetry))
+    stats = await session.scalar(select(RouteStats))
+
+    assert telemetry.route_id == route.id
+    assert telemetry.distance_traveled == TELEMETRY['distance_traveled']
+    assert stats.count == 1
+
+
+@pytest.mark.asyncio
+async def test_enqueue_telemetry_route_not_found(async_client, ingest_queue):
+    ingest_queue()
+
+    response = await async_client.post('/telemetries/1/queue', json=TELEMETRY)
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Route not found'}
+
+
+@pytest.mark.asyncio
+async def test_enqueue_telemetry_queue_full(async_client, route, ingest_queue):
+    ingest_queue(maxsize=1)
+
+    response = await async_client.post(
+        f'/telemetries/{route.id}/queue', json=TELEMETRY
+    )
+    assert response.status_code == HTTPStatus.ACCEPTED
+
+    response = await async_client.post(
+        f'/telemetries/{route.id}/queue', json=TELEMETRY
+    )
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert response.headers['Retry-After'] == '1'
+
+    response = await async_client.get('/system/ingest')
+    assert response.json()['depth'] == 1
+    assert response.json()['rejected'] == 1
+
+
+@pytest.mark.asyncio
+async def test_ingest_queue_batches(session, route, ingest_queue):
+    queue = ingest_queue(batch_size=2)
+
+    for _ in range(5):
+        await queue.put(telemetry_payload(route_id=route.id))
+
+    queue.start()
+    await queue.stop()
+
+    count = await session.scalar(select(func.count(Telemetry.id)))
+    stats = queue.stats()
+
+    assert count == stats['flushed'] == stats['enqueued']
+    assert stats['batches'] == count // 2 + 1
+    assert stats['batch_size_max'] == queue.batch_size
+    assert stats['depth'] == 0
+
+
+@pytest.mark.asyncio
+async def test_ingest_queue_drops_deleted_routes(session, route, ingest_queue):
+    queue = ingest_queue()
+
+    await queue.put(telemetry_payload(route_id=route.id))
+    await queue.put(telemetry_payload(route_id=route.id + 1))
+
+    queue.start()
+    await queue.drain()
+
+    telemetries = (await session.scalars(select(Telemetry))).all()
+
+    assert [telemetry.route_id for telemetry in telemetries] == [route.id]
+    assert queue.stats()['flushed'] == 1
+    assert queue.stats()['dropped'] == 1
+
+
+@pytest.mark.asyncio
+async def test_ingest_queue_retries_failed_flush(
+    session, route, ingest_queue, monkeypatch
+):
+    queue = ingest_queue()
+    write = queue._write
+    failures = [OperationalError('INSERT', {}, Exception('connection lost'))]
+
+    async def flaky_write(rows):
+        if failures:
+            raise failures.pop()
+        return await write(rows)
+
+    monkeypatch.setattr(queue, '_write', flaky_write)
+    await queue.put(telemetry_payload(route_id=route.id))
+
+    queue.start()
+    await queue.drain()
+
+    count = await session.scalar(select(func.count(Telemetry.id)))
+    stats = queue.stats()
+
+    assert count == 1
+    assert (stats['flushed'], stats['retried'], stats['failed']) == (1, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_ingest_queue_gives_up_after_retries(
+    session, route, ingest_queue, monkeypatch
+):
+    queue = ingest_queue()
+
+    async def failing_write(rows):
+        raise OperationalError('INSERT', {}, Exception('connection lost'))
+
+    monkeypatch.setattr(queue, '_write', failing_write)
+    await queue.put(telemetry_payload(route_id=route.id))
+
+    queue.start()
+    await queue.drain()
+
+    assert queue.stats()['retried'] == queue.retries
+    assert queue.stats()['failed'] == 1
+
+
+def test_lifespan_starts_ingest_queue(monkeypatch):
+    monkeypatch.setattr(get_settings(), 'INGEST_QUEUE_ENABLED', True)
+
+    with TestClient(app) as client:
+        response = client.get('/system/ingest')
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['depth'] == 0
+
+    assert app.state.ingest_queue is None
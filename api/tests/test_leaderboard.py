@@ -0,0 +1,261 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import delete, insert, select
+
+from api.leaderboard import (
+    STATS_COLUMNS,
+    Leaderboard,
+    get_leaderboards,
+    rebuild_leaderboards,
+    track_routes,
+)
+from api.models import Route, RouteLeaderboard, RouteStats, Telemetry
+from api.stats import rebuild_route_stats
+from benchmarks.payloads import telemetry_payload
+
+SIZE = 2
+
+
+def telemetry(distance=100, energy=100, status='success'):
+    return telemetry_payload(
+        distance_traveled=distance,
+        energy_consumed=energy,
+        average_current=2,
+        status=status,
+    )
+
+
+@pytest.fixture
+def boards(monkeypatch):
+    leaderboards = get_leaderboards()
+    monkeypatch.setattr(leaderboards, 'size', SIZE)
+    monkeypatch.setattr(leaderboards, 'min_runs', 1)
+
+    yield leaderboards
+
+    leaderboards.clear()
+
+
+@pytest.fixture
+def routes(session):
+    async def _routes(count: int) -> list[Route]:
+        routes = [
+            Route(commands=f'ANDAR {n + 1} CM, ENTREGAR') for n in range(count)
+        ]
+        session.add_all(routes)
+        await session.commit()
+        return routes
+
+    return _routes
+
+
+async def stored(session) -> dict[str, list[int]]:
+    rows = await session.execute(
+        select(RouteLeaderboard).order_by(
+            RouteLeaderboard.board, RouteLeaderboard.route_id
+        )
+    )
+    boards = {}
+    for row in rows.scalars():
+        boards.setdefault(row.board, []).append(row.route_id)
+    return boards
+
+
+def test_leaderboard_order():
+    board = Leaderboard(descending=True)
+
+    for route_id, value in ((1, 5), (2, 7), (3, 5), (4, 1)):
+        board.set(route_id, value)
+    board.set(2, 3)
+    board.set(4, None)
+
+    # ties go to the lower route id
+    assert board.top(10) == [(1, 5), (3, 5), (2, 3)]
+    assert board.top(1) == [(1, 5)]
+    assert len(board) == len(board.top(10))
+
+
+@pytest.mark.asyncio
+async def test_telemetries_move_routes(async_client, session, boards, routes):
+    first, second, third = await routes(3)
+
+    for route, runs in ((first, 1), (second, 3), (third, 2)):
+        await async_client.post(
+            f'/telemetries/{route.id}/batch',
+            json={'telemetries': [telemetry()] * runs},
+        )
+    response = await async_client.post(
+        f'/telemetries/{first.id}',
+        json=telemetry(distance=100, energy=10, status='failed'),
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert boards.top('most_run', 3) == [
+        {'rank': 1, 'route_id': second.id, 'value': 3},
+        {'rank': 2, 'route_id': first.id, 'value': 2},
+        {'rank': 3, 'route_id': third.id, 'value': 2},
+    ]
+    assert boards.top('efficient', 1) == [
+        {'rank': 1, 'route_id': first.id, 'value': pytest.approx(0.55)},
+    ]
+    assert boards.top('failure_rate', 1)[0]['route_id'] == first.id
+    # only the first SIZE routes of each board are stored
+    assert (await stored(session))['most_run'] == [first.id, second.id]
+
+    await async_client.delete(f'/telemetries/{response.json()["id"]}')
+
+    assert [row['route_id'] for row in boards.top('most_run', 3)] == [
+        second.id,
+        third.id,
+        first.id,
+    ]
+    assert (await stored(session))['most_run'] == [second.id, third.id]
+
+
+@pytest.mark.asyncio
+async def test_bulk_deletes_move_routes(async_client, session, boards, routes):
+    first, second = await routes(2)
+    await async_client.post(
+        f'/telemetries/{first.id}/batch',
+        json={'telemetries': [telemetry(status='failed')] * 2},
+    )
+    await async_client.post(
+        f'/telemetries/{second.id}/batch',
+        json={'telemetries': [telemetry()]},
+    )
+
+    await async_client.delete('/telemetries/', params={'status': 'failed'})
+
+    assert boards.top('most_run', SIZE) == [
+        {'rank': 1, 'route_id': second.id, 'value': 1},
+    ]
+
+    await async_client.delete(f'/routes/{second.id}')
+
+    assert boards.top('most_run', SIZE) == []
+    assert await stored(session) == {}
+
+
+@pytest.mark.asyncio
+async def test_track_routes_skips_route_being_deleted(
+    async_client, engine, session, boards, routes
+):
+    (route,) = await routes(1)
+    await async_client.post(
+        f'/telemetries/{route.id}/batch', json={'telemetries': [telemetry()]}
+    )
+    rows = (
+        await session.execute(
+            select(*STATS_COLUMNS).where(RouteStats.route_id == route.id)
+        )
+    ).all()
+    boards.clear()
+
+    # another worker deletes the route, its transaction still open
+    async with engine.connect() as conn:
+        await conn.execute(delete(Route).where(Route.id == route.id))
+        track = asyncio.create_task(track_routes(session, rows))
+        await asyncio.sleep(0.1)
+        await conn.commit()
+
+    await track
+    await session.commit()
+
+    assert await stored(session) == {}
+
+
+@pytest.mark.asyncio
+async def test_rebuild_leaderboards(session, boards, routes):
+    first, second, third = await routes(3)
+    await session.execute(
+        insert(Telemetry),
+        [
+            {**telemetry(energy=energy), 'route_id': route.id}
+            for route, energy in ((first, 300), (second, 100), (third, 200))
+        ],
+    )
+    await rebuild_route_stats(session)
+    await session.commit()
+
+    assert [row['route_id'] for row in boards.top('efficient', 3)] == [
+        second.id,
+        third.id,
+        first.id,
+    ]
+    assert (await stored(session))['efficient'] == [second.id, third.id]
+
+    boards.clear()
+    await rebuild_leaderboards(session)
+
+    assert len(boards.top('efficient', 3)) == len((first, second, third))
+
+
+@pytest.mark.asyncio
+async def test_min_runs(async_client, boards, routes, monkeypatch):
+    monkeypatch.setattr(boards, 'min_runs', 2)
+    (route,) = await routes(1)
+
+    await async_client.post(
+        f'/telemetries/{route.id}', json=telemetry(status='failed')
+    )
+
+    assert boards.top('failure_rate', SIZE) == []
+    assert boards.top('most_run', SIZE)[0]['route_id'] == route.id
+
+
+@pytest.mark.asyncio
+async def test_read_leaderboard(async_client, boards, routes):
+    (route,) = await routes(1)
+    await async_client.post(f'/telemetries/{route.id}', json=telemetry())
+
+    response = await async_client.get(
+        '/leaderboards/most_run', params={'limit': 5}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'board': 'most_run',
+        'routes': [{'rank': 1, 'route_id': route.id, 'value': 1.0}],
+    }
+
+
+@pytest.mark.asyncio
+async def test_read_leaderboard_shared_by_workers(
+    async_client, boards, routes
+):
+    first, second, third = await routes(3)
+    await async_client.post(
+        f'/telemetries/{first.id}/batch',
+        json={'telemetries': [telemetry()] * 3},
+    )
+
+    # another worker, which never saw the first route's runs
+    boards.clear()
+    for route, runs in ((second, 2), (third, 1)):
+        await async_client.post(
+            f'/telemetries/{route.id}/batch',
+            json={'telemetries': [telemetry()] * runs},
+        )
+
+    response = await async_client.get(
+        '/leaderboards/most_run', params={'limit': 5}
+    )
+
+    assert [
+        (row['route_id'], row['value']) for row in response.json()['routes']
+    ] == [(first.id, 3), (second.id, 2)]
+
+
+def test_read_leaderboard_unknown(client, boards):
+    response = client.get('/leaderboards/slowest')
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_read_leaderboard_disabled(client):
+    response = client.get('/leaderboards/most_run')
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json() == {'detail': 'Leaderboards disabled'}
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import time
+from contextlib import ExitStack
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api import broadcast
+from api.broadcast import Broadcaster, get_broadcaster, listen, live_events
+from api.routers.route import live_telemetries
+from api.settings import get_settings
+from benchmarks.payloads import TELEMETRY, telemetry_payload
+
+SUBSCRIBERS = 1_000
+# generous bound for delivering one sample to every subscriber
+FAN_OUT_BUDGET = 0.5
+
+
+@pytest.mark.asyncio
+async def test_broadcast_fan_out_latency():
+    live = Broadcaster(buffer_size=10)
+
+    with ExitStack() as stack:
+        subscriptions = [
+            stack.enter_context(live.subscribe(1)) for _ in range(SUBSCRIBERS)
+        ]
+
+        start = time.perf_counter()
+        live.publish(1, 'sample')
+        messages = await asyncio.gather(*[
+            subscription.get() for subscription in subscriptions
+        ])
+        elapsed = time.perf_counter() - start
+
+    assert messages == ['sample'] * SUBSCRIBERS
+    assert elapsed < FAN_OUT_BUDGET
+    assert live.stats() == {
+        'routes': 0,
+        'subscribers': 0,
+        'published': 1,
+        'delivered': SUBSCRIBERS,
+    }
+
+
+@pytest.mark.asyncio
+async def test_broadcast_slow_subscriber_drops_oldest():
+    live = Broadcaster(buffer_size=2)
+
+    with live.subscribe(1) as slow, live.subscribe(2) as other:
+        for message in ('a', 'b', 'c'):
+            live.publish(1, message)
+
+        assert [await slow.get(), await slow.get()] == ['b', 'c']
+        assert slow.dropped == 1
+        assert not other.dropped
+        assert live.has_subscribers(1)
+
+    assert not live.has_subscribers(1)
+
+
+@pytest.mark.asyncio
+async def test_live_events_keepalive():
+    live = Broadcaster(buffer_size=1)
+
+    with live.subscribe(1) as subscription:
+        events = live_events(subscription, keepalive=0.01)
+
+        assert await anext(events) == ': keepalive\n\n'
+
+        live.publish(1, '{}')
+        assert await anext(events) == 'data: {}\n\n'
+
+
+@pytest.mark.asyncio
+async def test_live_telemetries(async_client, session, route):
+    response = await live_telemetries(route.id, session)
+    events = response.body_iterator
+    event = asyncio.ensure_future(anext(events))
+
+    while not get_broadcaster().has_subscribers(route.id):
+        await asyncio.sleep(0)
+
+    posted = await async_client.post(
+        f'/telemetries/{route.id}', json=TELEMETRY
+    )
+
+    assert response.media_type == 'text/event-stream'
+    assert json.loads((await event).removeprefix('data: ')) == posted.json()
+
+    await events.aclose()
+    assert not get_broadcaster().has_subscribers(route.id)
+
+
+def test_live_telemetries_not_found(client):
+    response = client.get('/routes/1/telemetries/live')
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Route not found'}
+
+
+async def notify(engine, rows, ids):
+    async with AsyncSession(engine) as session:
+        await broadcast.notify_telemetries(session, rows, ids)
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_live_notify_bridge(engine, route, monkeypatch):
+    monkeypatch.setattr(get_settings(), 'LIVE_NOTIFY_ENABLED', True)
+
+    listener = asyncio.create_task(
+        listen(
+            engine.url.render_as_string(hide_password=False),
+            {broadcast.CHANNEL: broadcast.deliver},
+        )
+    )
+
+    with get_broadcaster().subscribe(route.id) as subscription:
+        # the listener may not be subscribed to the channel yet
+        for telemetry_id in range(1, 100):
+            await notify(
+                engine, [telemetry_payload(route_id=route.id)], [telemetry_id]
+            )
+            try:
+                message = await asyncio.wait_for(subscription.get(), 0.1)
+            except TimeoutError:
+                continue
+            break
+
+    listener.cancel()
+
+    assert json.loads(message)['id'] == telemetry_id
+
+
+@pytest.mark.asyncio
+async def test_live_notify_skips_malformed(engine, route, monkeypatch):
+    monkeypatch.setattr(get_settings(), 'LIVE_NOTIFY_ENABLED', True)
+
+    listener = asyncio.create_task(
+        listen(
+            engine.url.render_as_string(hide_password=False),
+            {broadcast.CHANNEL: broadcast.deliver},
+        )
+    )
+
+    with get_broadcaster().subscribe(route.id) as subscription:
+        for telemetry_id in range(1, 100):
+            async with engine.begin() as conn:
+                await conn.exec_driver_sql(
+                    f"NOTIFY {broadcast.CHANNEL}, 'route:{{}}'"
+                )
+            await notify(
+                engine,
+                [telemetry_payload(route_id=route.id)] * 2,
+                [telemetry_id, telemetry_id],
+            )
+            try:
+                message = await asyncio.wait_for(subscription.get(), 0.1)
+            except TimeoutError:
+                continue
+            break
+
+        assert json.loads(message)['id'] == telemetry_id
+        # both rows of the write came in the same notification
+        message = await asyncio.wait_for(subscription.get(), 1)
+        assert json.loads(message)['id'] == telemetry_id
+
+    assert not listener.done()
+    listener.cancel()
+
+
+@pytest.mark.asyncio
+async def test_live_notify_sent_at_commit(
+    async_client, engine, route, monkeypatch
+):
+    monkeypatch.setattr(get_settings(), 'LIVE_NOTIFY_ENABLED', True)
+    payloads = asyncio.Queue()
+    listener = asyncio.create_task(
+        listen(
+            engine.url.render_as_string(hide_password=False),
+            {broadcast.CHANNEL: payloads.put_nowait},
+        )
+    )
+
+    for _ in range(100):
+        response = await async_client.post(
+            f'/telemetries/{route.id}', json=TELEMETRY
+        )
+        try:
+            payload = await asyncio.wait_for(payloads.get(), 0.1)
+        except TimeoutError:
+            continue
+        break
+
+    listener.cancel()
+
+    route_id, _, message = payload.partition(':')
+    assert int(route_id) == route.id
+    assert json.loads(message)['id'] == response.json()['id']
+
+
+@pytest.mark.asyncio
+async def test_listen_survives_failing_handler(engine):
+    payloads = []
+
+    def handle(payload: str):
+        if payload == 'fail':
+            raise RuntimeError
+        payloads.append(payload)
+
+    listener = asyncio.create_task(
+        listen(engine.url.render_as_string(hide_password=False), {'x': handle})
+    )
+
+    for _ in range(100):
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql("NOTIFY x, 'fail'")
+            await conn.exec_driver_sql("NOTIFY x, 'ok'")
+        await asyncio.sleep(0.01)
+        if payloads:
+            break
+
+    assert not listener.done()
+    listener.cancel()
+    assert payloads[0] == 'ok'
+
+
+def test_notify_payloads_fit_limit(monkeypatch):
+    monkeypatch.setattr(broadcast, 'NOTIFY_PAYLOAD_LIMIT', 10)
+
+    assert broadcast._notify_payloads(['1:abc', '2:de', '3:fghij']) == [
+        '1:abc\n2:de',
+        '3:fghij',
+    ]
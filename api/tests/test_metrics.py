@@ -0,0 +1,179 @@
+import asyncio
+import logging
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import text
+
+from api.cache import get_route_cache
+from api.metrics import (
+    LATENCY_BUCKETS,
+    Histogram,
+    MetricsMiddleware,
+    MetricsRegistry,
+    registry,
+)
+from api.settings import get_settings
+from benchmarks.payloads import TELEMETRY
+
+REQUESTS = 5
+# route lookup, telemetry insert and route_stats upsert
+BATCH_STATEMENTS = 3
+# how long the streamed test response keeps sending its body
+STREAM_SECONDS = 0.2
+
+
+def samples(text: str) -> dict[str, float]:
+    return {
+        line.rsplit(' ', 1)[0]: float(line.rsplit(' ', 1)[1])
+        for line in text.splitlines()
+        if not line.startswith('#')
+    }
+
+
+def test_histogram_buckets():
+    histogram = Histogram()
+
+    for value in (0.001, 0.002, 20):
+        histogram.observe(value)
+
+    lines = histogram.lines('latency', 'route="/"')
+
+    assert lines[0] == 'latency_bucket{route="/",le="0.001"} 1'
+    assert lines[1] == 'latency_bucket{route="/",le="0.0025"} 2'
+    assert (
+        lines[len(LATENCY_BUCKETS)] == 'latency_bucket{route="/",le="+Inf"} 3'
+    )
+    assert lines[-1] == 'latency_count{route="/"} 3'
+
+
+def test_metrics_by_route_template(client, route):
+    registry.clear()
+
+    client.get(f'/routes/{route.id}')
+    client.get(f'/routes/{route.id}')
+    client.get('/routes/0')
+    client.get('/unknown')
+
+    response = client.get('/metrics')
+    metrics = samples(response.text)
+    labels = 'method="GET",route="/routes/{route_id}"'
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/plain')
+    assert metrics == {
+        **metrics,
+        f'http_requests_total{{{labels},status="200"}}': 2,
+        f'http_requests_total{{{labels},status="404"}}': 1,
+        f'http_request_duration_seconds_count{{{labels}}}': 3,
+        # the second read is served from the route cache
+        f'http_request_db_statements_total{{{labels}}}': 2,
+        'http_requests_total{method="GET",route="unmatched",status="404"}': 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_metrics_db_time_per_request(async_client, route):
+    registry.clear()
+
+    await asyncio.gather(
+        *[async_client.get('/telemetries/') for _ in range(REQUESTS)],
+        *[
+            async_client.post(
+                f'/telemetries/{route.id}/batch',
+                json={'telemetries': [TELEMETRY]},
+            )
+            for _ in range(REQUESTS)
+        ],
+    )
+
+    metrics = samples((await async_client.get('/metrics')).text)
+    reads = 'method="GET",route="/telemetries/"'
+    writes = 'method="POST",route="/telemetries/{route_id}/batch"'
+
+    assert metrics[f'http_request_db_statements_total{{{reads}}}'] == (
+        REQUESTS
+    )
+    assert metrics[f'http_request_db_statements_total{{{writes}}}'] == (
+        REQUESTS * BATCH_STATEMENTS
+    )
+    assert metrics[f'http_request_db_duration_seconds_sum{{{reads}}}'] > 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_latency_until_response_start():
+    async def streaming(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': HTTPStatus.OK})
+        await asyncio.sleep(STREAM_SECONDS)
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def send(message):
+        pass
+
+    metrics = MetricsRegistry()
+    await MetricsMiddleware(streaming, metrics)(
+        {'type': 'http', 'method': 'GET'}, None, send
+    )
+
+    labels = 'method="GET",route="unmatched"'
+    assert (
+        samples(metrics.render())[
+            f'http_request_duration_seconds_sum{{{labels}}}'
+        ]
+        < STREAM_SECONDS
+    )
+
+
+@pytest.fixture
+def slow_query_log(monkeypatch, caplog):
+    monkeypatch.setattr(get_settings(), 'SLOW_QUERY_THRESHOLD', 1e-9)
+    monkeypatch.setattr(get_settings(), 'SLOW_QUERY_EXPLAIN_RATE', 1)
+    caplog.set_level(logging.WARNING, logger='api.metrics')
+
+    return caplog
+
+
+def test_slow_query_log(client, route, slow_query_log):
+    get_route_cache().clear()
+
+    client.get(f'/routes/{route.id}')
+
+    (record,) = slow_query_log.records
+    message = record.getMessage()
+
+    assert message.startswith('Slow query')
+    assert 'on /routes/{route_id}: SELECT' in message
+    assert "params: {'id_1': 'int'}" in message
+    assert 'Index Scan using routes_pkey on routes' in message
+
+
+@pytest.mark.asyncio
+async def test_slow_query_explain_failure(session, slow_query_log):
+    # EXPLAIN SHOW is invalid, the transaction must survive it
+    await session.execute(text('SHOW statement_timeout'))
+
+    assert await session.scalar(text('SELECT 1')) == 1
+    assert slow_query_log.records[0].getMessage().endswith('plan:\n-')
+
+
+def test_slow_query_log_analytics(client, route, slow_query_log):
+    registry.clear()
+    client.post(f'/telemetries/{route.id}', json=TELEMETRY)
+    slow_query_log.clear()
+
+    response = client.get('/analytics/efficiency')
+
+    messages = [record.getMessage() for record in slow_query_log.records]
+    metrics = samples(client.get('/metrics').text)
+    labels = 'method="GET",route="/analytics/efficiency"'
+
+    assert response.status_code == HTTPStatus.OK
+    # the columns are fetched on a driver cursor, outside the engine events
+    assert any(
+        'on /analytics/efficiency: SELECT string_agg' in message
+        and 'Seq Scan on telemetries' in message
+        for message in messages
+    )
+    assert metrics[f'http_request_db_statements_total{{{labels}}}'] == len(
+        messages
+    )
@@ -0,0 +1,167 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, text
+
+from api import migrate
+from api.commands import commands_hash
+from api.migrate import (
+    ALEMBIC_INI,
+    ROOT,
+    current_revisions,
+    head_revisions,
+    upgrade,
+)
+
+
+@pytest.fixture
+def database_url(engine):
+    url = engine.url.render_as_string(hide_password=False)
+    yield url
+
+    sync_engine = create_engine(url)
+    with sync_engine.begin() as conn:
+        conn.execute(text('DROP TABLE IF EXISTS alembic_version'))
+    sync_engine.dispose()
+
+
+@pytest.fixture
+def upgrades(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        migrate.subprocess,
+        'run',
+        lambda command, **kwargs: calls.append(command[-2:]),
+    )
+    return calls
+
+
+def stamp(url: str, revision: str):
+    sync_engine = create_engine(url)
+    with sync_engine.begin() as conn:
+        conn.execute(
+            text(
+                'CREATE TABLE IF NOT EXISTS alembic_version '
+                '(version_num varchar(32) PRIMARY KEY)'
+            )
+        )
+        conn.execute(text('DELETE FROM alembic_version'))
+        conn.execute(
+            text('INSERT INTO alembic_version VALUES (:revision)'),
+            {'revision': revision},
+        )
+    sync_engine.dispose()
+
+
+def alembic(url: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, '-m', 'alembic', '-c', str(ALEMBIC_INI), *args],
+        cwd=ROOT,
+        env={**os.environ, 'DATABASE_URL': url},
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+
+@pytest.fixture
+def migrated_url(database_url):
+    yield database_url
+
+    alembic(database_url, 'downgrade', 'base')
+    # the first revision's downgrade leaves its enum behind
+    sync_engine = create_engine(database_url)
+    with sync_engine.begin() as conn:
+        conn.execute(text('DROP TYPE IF EXISTS statusstate'))
+    sync_engine.dispose()
+
+
+def test_head_revisions_match_alembic():
+    script = ScriptDirectory.from_config(Config(ALEMBIC_INI))
+
+    assert head_revisions() == set(script.get_heads())
+
+
+def test_head_revisions_branches(tmp_path):
+    for revision, down_revision in [
+        ('a', None),
+        ('b', 'a'),
+        ('c', 'a'),
+        ('d', ('b', 'c')),
+        ('e', 'd'),
+        ('f', 'd'),
+    ]:
+        (tmp_path / f'{revision}.py').write_text(
+            f'revision: str = {revision!r}\n'
+            f'down_revision = {down_revision!r}\n'
+        )
+
+    assert head_revisions(tmp_path) == {'e', 'f'}
+
+
+def test_upgrade_new_database(database_url, upgrades):
+    assert current_revisions(database_url) == set()
+    assert upgrade(database_url)
+    assert upgrades == [['upgrade', 'head']]
+
+
+def test_upgrade_skips_database_at_head(database_url, upgrades):
+    stamp(database_url, *head_revisions())
+
+    assert current_revisions(database_url) == head_revisions()
+    assert not upgrade(database_url)
+    assert not upgrades
+
+
+def test_upgrade_database_behind(database_url, upgrades):
+    stamp(database_url, 'a1f39d76406a')
+
+    assert upgrade(database_url)
+    assert upgrades == [['upgrade', 'head']]
+
+
+def test_commands_hash_collisions(migrated_url):
+    alembic(migrated_url, 'upgrade', '2b7f6e19c8d3').check_returncode()
+    sync_engine = create_engine(migrated_url)
+    with sync_engine.begin() as conn:
+        ids = conn.scalars(
+            text(
+                'INSERT INTO routes (commands) VALUES '
+                "('ANDAR 10 CM, ENTREGAR'), ('andar 10 cm,entregar'), "
+                "('ANDAR 20 CM, ENTREGAR') RETURNING id"
+            )
+        ).all()
+    sync_engine.dispose()
+
+    result = alembic(migrated_url, 'upgrade', '7e3a9c51d2b8')
+
+    assert result.returncode != 0
+    assert f'upgrading: {ids[0]}, {ids[1]}\n' in result.stderr
+    assert current_revisions(migrated_url) == {'2b7f6e19c8d3'}
+
+
+def test_commands_hash_backfill(migrated_url):
+    # a no-break space and ß, which Postgres \s and upper() leave alone
+    commands = ['andar\u00a010 cm, entregar', 'andar 10 cm, straße']
+    alembic(migrated_url, 'upgrade', '2b7f6e19c8d3').check_returncode()
+    sync_engine = create_engine(migrated_url)
+    with sync_engine.begin() as conn:
+        for command in commands:
+            conn.execute(
+                text('INSERT INTO routes (commands) VALUES (:commands)'),
+                {'commands': command},
+            )
+
+    alembic(migrated_url, 'upgrade', '7e3a9c51d2b8').check_returncode()
+
+    with sync_engine.begin() as conn:
+        hashes = conn.scalars(
+            text('SELECT commands_hash FROM routes ORDER BY id')
+        ).all()
+    sync_engine.dispose()
+
+    assert hashes == [commands_hash(command) for command in commands]
@@ -0,0 +1,178 @@
+from datetime import date, datetime
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import func, insert, select, text
+
+from api.models import RouteStats, Telemetry
+from api.partitions import (
+    DEFAULT_PARTITION,
+    add_months,
+    apply_retention,
+    ensure_partitions,
+    partition_month,
+    partition_name,
+    partitions,
+)
+from api.stats import rebuild_route_stats
+from benchmarks.payloads import telemetry_payload
+
+TODAY = date(2025, 3, 15)
+MONTHS = [datetime(2025, 1, 10), datetime(2025, 2, 10), datetime(2025, 3, 10)]
+
+
+async def insert_telemetries(session, route_id: int):
+    await session.execute(
+        insert(Telemetry),
+        [
+            telemetry_payload(route_id=route_id, created_at=created_at)
+            for created_at in MONTHS
+        ],
+    )
+    await rebuild_route_stats(session)
+    await session.commit()
+
+
+async def stats_row(session, route_id: int) -> tuple:
+    row = await session.execute(
+        select(*RouteStats.__table__.c).where(RouteStats.route_id == route_id)
+    )
+    return tuple(row.one())
+
+
+async def rows_by_partition(session) -> dict[str, int]:
+    rows = await session.execute(
+        text(
+            'SELECT tableoid::regclass::text, count(*) FROM telemetries '
+            'GROUP BY 1'
+        )
+    )
+    return dict(rows.all())
+
+
+def test_partition_names():
+    assert partition_name(date(2025, 1, 1)) == 'telemetries_y2025m01'
+    assert partition_month('telemetries_y2025m12') == date(2025, 12, 1)
+    assert partition_month(DEFAULT_PARTITION) is None
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+
+
+@pytest.mark.asyncio
+async def test_ensure_partitions_moves_default_rows(engine, session, route):
+    await insert_telemetries(session, route.id)
+
+    created = await ensure_partitions(engine, 2, today=date(2025, 2, 1))
+
+    assert created == [
+        'telemetries_y2025m02',
+        'telemetries_y2025m03',
+        'telemetries_y2025m04',
+    ]
+    assert await rows_by_partition(session) == {
+        DEFAULT_PARTITION: 1,
+        'telemetries_y2025m02': 1,
+        'telemetries_y2025m03': 1,
+    }
+    assert await ensure_partitions(engine, 2, today=date(2025, 2, 1)) == []
+
+
+@pytest.mark.asyncio
+async def test_retention_drops_old_partitions(engine, session, route):
+    route_id = route.id
+    await insert_telemetries(session, route_id)
+    await ensure_partitions(engine, 0, today=date(2025, 1, 1))
+    await ensure_partitions(engine, 2, today=TODAY)
+
+    removed = await apply_retention(engine, 1, today=TODAY)
+    session.expire_all()
+
+    assert removed == ['telemetries_y2025m01']
+    assert await session.scalar(select(func.count(Telemetry.id))) == len(
+        MONTHS
+    ) - len(removed)
+    assert await session.scalar(
+        select(RouteStats.count).where(RouteStats.route_id == route_id)
+    ) == len(MONTHS) - len(removed)
+
+    # the dropped rows are taken out without rescanning the others
+    stats = await stats_row(session, route_id)
+    await rebuild_route_stats(session)
+    await session.commit()
+    assert await stats_row(session, route_id) == stats
+
+    async with engine.connect() as conn:
+        assert date(2025, 1, 1) not in await partitions(conn)
+        assert (
+            await conn.scalar(
+                text('SELECT to_regclass(:name)'), {'name': removed[0]}
+            )
+            is None
+        )
+
+
+@pytest.mark.asyncio
+async def test_retention_detaches_old_partitions(engine, session, route):
+    await insert_telemetries(session, route.id)
+    await ensure_partitions(engine, 2, today=date(2025, 1, 1))
+
+    removed = await apply_retention(engine, 1, detach=True, today=TODAY)
+
+    assert removed == ['telemetries_y2025m01']
+
+    async with engine.begin() as conn:
+        assert (
+            await conn.scalar(text(f'SELECT count(*) FROM {removed[0]}')) == 1
+        )
+        await conn.execute(text(f'DROP TABLE {removed[0]}'))
+
+
+@pytest.mark.asyncio
+async def test_time_filter_prunes_partitions(engine, session, route):
+    await insert_telemetries(session, route.id)
+    await ensure_partitions(engine, 2, today=date(2025, 1, 1))
+
+    plan = '\n'.join(
+        (
+            await session.scalars(
+                text(
+                    'EXPLAIN SELECT * FROM telemetries '
+                    "WHERE created_at >= '2025-02-01' "
+                    "AND created_at < '2025-02-15'"
+                )
+            )
+        ).all()
+    )
+
+    assert 'telemetries_y2025m02' in plan
+    assert 'telemetries_y2025m01' not in plan
+    assert 'telemetries_y2025m03' not in plan
+    assert DEFAULT_PARTITION not in plan
+
+
+@pytest.mark.asyncio
+async def test_endpoints_read_across_partitions(
+    engine, session, route, async_client
+):
+    await insert_telemetries(session, route.id)
+    await ensure_partitions(engine, 2, today=date(2025, 1, 1))
+
+    response = await async_client.get('/telemetries/')
+    telemetries = response.json()['telemetries']
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(telemetries) == len(MONTHS)
+
+    response = await async_client.get(f'/telemetries/{telemetries[0]["id"]}')
+
+    assert response.status_code == HTTPStatus.OK
+
+    response = await async_client.delete(
+        f'/telemetries/{telemetries[0]["id"]}'
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert (
+        len((await async_client.get('/telemetries/')).json()['telemetries'])
+        == len(MONTHS) - 1
+    )
@@ -0,0 +1,192 @@
+from datetime import datetime
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert, select, text
+
+from api.commands import route_values
+from api.models import Route, Telemetry
+from api.pagination import paginate
+from api.queries import filter_conditions
+from api.schemas import TelemetryFilter
+
+ROUTES = 20
+ROWS = 20_000
+SAMPLES = [
+    # average_current, energy_consumed, status
+    (1, 300, 'failed'),
+    (3, 100, 'failed'),
+    (4, 200, 'failed'),
+    (5, 400, 'success'),
+]
+
+
+@pytest_asyncio.fixture
+async def fleet(session):
+    route_ids = (
+        await session.scalars(
+            insert(Route).returning(Route.id),
+            [route_values(f'ANDAR {n + 1} CM') for n in range(ROUTES)],
+        )
+    ).all()
+    # 10% failed, spread over routes and the last 100 days
+    await session.execute(
+        text(
+            'INSERT INTO telemetries (average_speed, distance_traveled, '
+            'energy_consumed, average_current, status, route_id, created_at) '
+            'SELECT n % 17, n % 101, n % 997, n % 7, '
+            "CASE WHEN n % 10 = 0 THEN 'failed' ELSE 'success' END"
+            '::statusstate, :first + n % :routes, '
+            "now() - n * interval '7 minutes' "
+            'FROM generate_series(1, :rows) AS n'
+        ),
+        {'first': route_ids[0], 'routes': ROUTES, 'rows': ROWS},
+    )
+    await session.commit()
+    await session.execute(text('ANALYZE telemetries'))
+
+    return route_ids
+
+
+async def explain(session, filter: TelemetryFilter) -> str:
+    query = paginate(
+        filter_conditions(select(Telemetry.id), filter),
+        Telemetry,
+        filter,
+        filter.sort,
+    )
+    compiled = query.compile(dialect=session.bind.dialect)
+    connection = await session.connection()
+    rows = await connection.exec_driver_sql(
+        f'EXPLAIN {compiled}', compiled.params
+    )
+    return '\n'.join(row[0] for row in rows)
+
+
+async def partition_indexes(session, index: str) -> set[str]:
+    names = await session.scalars(
+        text(
+            'SELECT c.relname FROM pg_inherits i '
+            'JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = CAST(:index AS regclass)'
+        ),
+        {'index': index},
+    )
+    return set(names)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'case',
+    [
+        (
+            {'route_id': 0, 'status': 'failed', 'min_average_current': 2},
+            'ix_telemetries_failed_route_id_created_at',
+        ),
+        ({'status': 'failed'}, 'ix_telemetries_failed_created_at_id'),
+        (
+            {'route_id': 0, 'sort': '-energy_consumed'},
+            'ix_telemetries_route_id_energy_consumed_id',
+        ),
+        (
+            {'route_id': 0, 'from': '2025-01-01T00:00:00'},
+            'ix_telemetries_route_id_created_at',
+        ),
+    ],
+)
+async def test_filter_uses_index(session, fleet, case):
+    params, index = case
+    if 'route_id' in params:
+        params = {**params, 'route_id': fleet[0]}
+
+    plan = await explain(session, TelemetryFilter(**params))
+
+    assert any(
+        name in plan for name in await partition_indexes(session, index)
+    ), plan
+
+
+@pytest.mark.asyncio
+async def test_read_telemetries_filtered(client, session, route):
+    for current, energy, status in SAMPLES:
+        session.add(
+            Telemetry(
+                average_speed=10,
+                distance_traveled=200,
+                energy_consumed=energy,
+                average_current=current,
+                status=status,
+                route_id=route.id,
+            )
+        )
+    await session.commit()
+
+    response = client.get(
+        '/telemetries/',
+        params={
+            'route_id': route.id,
+            'status': 'failed',
+            'min_average_current': 2,
+            'from': datetime(2025, 1, 1).isoformat(),
+            'sort': '-energy_consumed',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [
+        telemetry['energy_consumed']
+        for telemetry in response.json()['telemetries']
+    ] == [200, 100]
+
+    response = client.get(
+        '/telemetries/',
+        params={'max_energy_consumed': 250, 'min_energy_consumed': 150},
+    )
+
+    assert [
+        telemetry['energy_consumed']
+        for telemetry in response.json()['telemetries']
+    ] == [200]
+
+
+@pytest.mark.asyncio
+async def test_read_telemetries_sorted_cursor(client, session, route):
+    for current, energy, status in SAMPLES * 2:
+        session.add(
+            Telemetry(
+                average_speed=10,
+                distance_traveled=200,
+                energy_consumed=energy,
+                average_current=current,
+                status=status,
+                route_id=route.id,
+            )
+        )
+    await session.commit()
+
+    energies, cursor = [], None
+    for _ in range(len(SAMPLES)):
+        params = {'sort': '-energy_consumed', 'limit': 2}
+        if cursor:
+            params['cursor'] = cursor
+        page = client.get('/telemetries/', params=params).json()
+        energies += [row['energy_consumed'] for row in page['telemetries']]
+        cursor = page['next_cursor']
+
+    assert energies == sorted(
+        [energy for _, energy, _ in SAMPLES * 2], reverse=True
+    )
+
+    response = client.get(
+        '/telemetries/', params={'sort': 'average_speed', 'cursor': cursor}
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
+
+
+def test_read_telemetries_invalid_sort(client):
+    response = client.get('/telemetries/', params={'sort': 'route_id'})
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
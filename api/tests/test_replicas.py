@@ -0,0 +1,282 @@
+import asyncio
+import os
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, insert, make_url, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from testcontainers.core.container import DockerContainer
+from testcontainers.core.network import Network
+from testcontainers.core.waiting_utils import wait_for_logs
+from testcontainers.postgres import PostgresContainer
+
+from api import database
+from api.app import app
+from api.cache import get_route_cache
+from api.database import STICKY_COOKIE, ReplicaSet, create_replica_engine
+from api.models import Route, table_registry
+from api.settings import get_settings
+
+# nothing listens on port 1, connecting fails right away
+UNREACHABLE = 'postgresql+psycopg://postgres@127.0.0.1:1/postgres'
+REPLICATION = pytest.mark.skipif(
+    not os.environ.get('REPLICATION_TESTS'),
+    reason='set REPLICATION_TESTS=1 to start a primary and a standby',
+)
+# the standby is a base backup of the primary, then follows its WAL
+STANDBY_COMMAND = (
+    'set -e; '
+    'gosu postgres pg_basebackup -h primary -U test -D "$PGDATA" '
+    '-R -X stream; '
+    'exec gosu postgres postgres'
+)
+
+
+def use_replicas(monkeypatch, engines) -> ReplicaSet:
+    replicas = ReplicaSet(engines, 30)
+    monkeypatch.setattr(database, 'get_replicas', lambda: replicas)
+    return replicas
+
+
+def statements_on(engine) -> list[str]:
+    statements = []
+
+    @event.listens_for(engine.sync_engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    return statements
+
+
+@pytest_asyncio.fixture
+async def routed_client(monkeypatch, engine):
+    """Client going through the real session dependencies.
+
+    The replicas are whatever the test passes to `use_replicas`.
+    """
+    monkeypatch.setattr(database, 'get_engine', lambda: engine)
+    use_replicas(monkeypatch, [])
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url='http://test'
+    ) as client:
+        yield client
+
+
+@pytest_asyncio.fixture
+async def replica_engine(engine):
+    # the test database standing in for a replica, with its own pool
+    replica = create_replica_engine(
+        get_settings(), engine.url.render_as_string(hide_password=False)
+    )
+    yield replica
+    await replica.dispose()
+
+
+def test_replica_set_round_robin():
+    engines = [create_async_engine(UNREACHABLE) for _ in range(3)]
+    replicas = ReplicaSet(engines, 30)
+
+    assert [replicas.candidates()[0] for _ in range(4)] == [
+        engines[0],
+        engines[1],
+        engines[2],
+        engines[0],
+    ]
+
+    replicas.mark_down(engines[1])
+
+    assert replicas.candidates() == [engines[0], engines[2]]
+    assert [replica['healthy'] for replica in replicas.stats()] == [
+        True,
+        False,
+        True,
+    ]
+
+
+def test_replica_set_retries_after_interval():
+    engines = [create_async_engine(UNREACHABLE)]
+    replicas = ReplicaSet(engines, 0)
+
+    replicas.mark_down(engines[0])
+
+    assert replicas.candidates() == engines
+
+
+@pytest.mark.asyncio
+async def test_replica_set_fails_over(replica_engine):
+    down = create_replica_engine(get_settings(), UNREACHABLE)
+    replicas = ReplicaSet([down, replica_engine], 30)
+
+    connection = await replicas.connect()
+    await connection.close()
+
+    assert connection.engine is replica_engine
+    assert replicas.healthy() == [replica_engine]
+
+    replicas.mark_down(replica_engine)
+
+    assert await replicas.connect() is None
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica(
+    monkeypatch, routed_client, session, route, replica_engine
+):
+    use_replicas(monkeypatch, [replica_engine])
+    statements = statements_on(replica_engine)
+
+    response = await routed_client.get(f'/routes/{route.id}')
+
+    assert response.status_code == HTTPStatus.OK
+    assert statements
+    # replica reads may lag, they are not cached
+    assert get_route_cache().get(route.id) is None
+
+
+@pytest.mark.asyncio
+async def test_reads_fall_back_to_primary(
+    monkeypatch, routed_client, session, route
+):
+    down = create_replica_engine(get_settings(), UNREACHABLE)
+    replicas = use_replicas(monkeypatch, [down])
+
+    response = await routed_client.get('/routes/')
+
+    assert response.status_code == HTTPStatus.OK
+    assert [row['id'] for row in response.json()['routes']] == [route.id]
+    assert replicas.healthy() == []
+
+
+@pytest.mark.asyncio
+async def test_reads_stick_to_primary_after_write(
+    monkeypatch, routed_client, session, replica_engine
+):
+    use_replicas(monkeypatch, [replica_engine])
+    statements = statements_on(replica_engine)
+
+    response = await routed_client.post(
+        '/routes/', json={'commands': 'ANDAR 10 CM, ENTREGAR'}
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert STICKY_COOKIE in response.cookies
+
+    response = await routed_client.get(f'/routes/{response.json()["id"]}')
+
+    assert response.status_code == HTTPStatus.OK
+    assert not statements
+
+    routed_client.cookies.clear()
+    await routed_client.get('/routes/')
+
+    assert statements
+
+
+@pytest.mark.asyncio
+async def test_no_sticky_cookie_without_replicas(routed_client, session):
+    response = await routed_client.post(
+        '/routes/', json={'commands': 'ANDAR 10 CM, ENTREGAR'}
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert STICKY_COOKIE not in response.cookies
+
+
+def test_read_replicas_stats(client):
+    response = client.get('/system/replicas')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == []
+
+
+@pytest.fixture(scope='module')
+def replication():
+    with Network() as network:
+        primary = (
+            PostgresContainer('postgres:18', driver='psycopg')
+            .with_network(network)
+            .with_network_aliases('primary')
+            .with_command('postgres -c wal_level=replica')
+        )
+        with primary:
+            primary.exec([
+                'bash',
+                '-c',
+                'echo "host replication all all trust" '
+                '>> "$PGDATA/pg_hba.conf"',
+            ])
+            primary.exec([
+                'psql',
+                '-U',
+                'test',
+                '-c',
+                'SELECT pg_reload_conf()',
+            ])
+
+            standby = (
+                DockerContainer('postgres:18')
+                .with_network(network)
+                .with_exposed_ports(5432)
+                .with_kwargs(entrypoint=['bash', '-c'])
+                .with_command([STANDBY_COMMAND])
+            )
+            with standby:
+                wait_for_logs(standby, 'ready to accept read-only connections')
+                url = primary.get_connection_url()
+                yield (
+                    url,
+                    make_url(url)
+                    .set(
+                        host=standby.get_container_host_ip(),
+                        port=int(standby.get_exposed_port(5432)),
+                    )
+                    .render_as_string(hide_password=False),
+                )
+
+
+@REPLICATION
+@pytest.mark.asyncio
+async def test_streaming_replica(monkeypatch, replication):
+    primary_url, standby_url = replication
+    primary = create_async_engine(primary_url)
+    standby = create_replica_engine(get_settings(), standby_url)
+    monkeypatch.setattr(database, 'get_engine', lambda: primary)
+    use_replicas(monkeypatch, [standby])
+
+    async with primary.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+        route_id = await conn.scalar(
+            insert(Route)
+            .values(commands='ANDAR 10 CM, ENTREGAR')
+            .returning(Route.id)
+        )
+
+    async with AsyncSession(standby) as session:
+        while not await session.scalar(select(Route.id)):
+            await session.rollback()
+            await asyncio.sleep(0.1)
+        assert await session.scalar(text('SELECT pg_is_in_recovery()'))
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url='http://test'
+    ) as client:
+        response = await client.get(f'/routes/{route_id}')
+
+        assert response.status_code == HTTPStatus.OK
+
+        response = await client.post(
+            '/routes/', json={'commands': 'ANDAR 20 CM, ENTREGAR'}
+        )
+        # read-your-writes even before the standby replays the insert
+        response = await client.get(f'/routes/{response.json()["id"]}')
+
+        assert response.status_code == HTTPStatus.OK
+
+    get_route_cache().clear()
+    async with primary.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+    await primary.dispose()
+    await standby.dispose()
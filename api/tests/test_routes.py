@@ -1,6 +1,21 @@
+import asyncio
 from http import HTTPStatus
 
-from api.schemas import RoutePublic
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.broadcast import listen
+from api.cache import (
+    INVALIDATION_CHANNEL,
+    forget_notified_route,
+    get_route_cache,
+    notify_route_change,
+)
+from api.models import Route, Telemetry
+from api.schemas import RoutePublic, TelemetryPublic
+from api.settings import get_settings
+from benchmarks.payloads import TELEMETRY
 
 
 def test_create_route(client):
@@ -19,6 +34,14 @@ def test_create_route(client):
     assert response.json() == {
         'id': 1,
         'commands': commands,
+        'opcodes': [1, 2, 1, 2, 1, 2, 1, 3],
+        'arguments': [50, 90, 20, 90, 35, -45, 20, 0],
+        'step_count': 8,
+        'total_distance': 125,
+        'total_rotation': 225,
+        'final_x': 34.142,
+        'final_y': 0.858,
+        'final_heading': 135,
     }
 
 
@@ -26,7 +49,10 @@ def test_read_routes(client, route):
     route_public = RoutePublic.model_validate(route).model_dump()
     response = client.get('/routes/')
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'routes': [route_public]}
+    assert response.json() == {
+        'routes': [route_public],
+        'next_cursor': None,
+    }
 
 
 def test_read_route(client, route):
@@ -112,3 +138,305 @@ def test_delete_route_correct(client, route):
     response = client.delete(f'/routes/{route.id}')
     assert response.status_code == HTTPStatus.OK
     assert response.json() == {'message': 'Route deleted'}
+
+
+def test_read_routes_cursor(client):
+    for distance in range(1, 4):
+        client.post('/routes/', json={'commands': f'ANDAR {distance} CM'})
+
+    response = client.get('/routes/', params={'limit': 2})
+    page = response.json()
+    assert [route['id'] for route in page['routes']] == [1, 2]
+
+    response = client.get(
+        '/routes/', params={'limit': 2, 'cursor': page['next_cursor']}
+    )
+    page = response.json()
+    assert [route['id'] for route in page['routes']] == [3]
+    assert page['next_cursor'] is None
+
+
+def test_read_routes_invalid_cursor(client):
+    response = client.get('/routes/', params={'cursor': 'bm90IGpzb24'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
+
+
+def test_read_route_include_telemetries(client, route, telemetry):
+    route_public = RoutePublic.model_validate(route).model_dump()
+    telemetry_public = TelemetryPublic.model_validate(telemetry).model_dump()
+
+    response = client.get(
+        f'/routes/{route.id}', params={'include': 'telemetries'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        **route_public,
+        'telemetries': [telemetry_public],
+        'next_cursor': None,
+    }
+
+
+def test_read_route_include_telemetries_paginated(client, route, telemetry):
+    telemetry_public = TelemetryPublic.model_validate(telemetry).model_dump(
+        exclude={'id'}
+    )
+    client.post(
+        f'/telemetries/{route.id}/batch',
+        json={'telemetries': [telemetry_public] * 2},
+    )
+
+    response = client.get(
+        f'/routes/{route.id}', params={'include': 'telemetries', 'limit': 2}
+    )
+    page = response.json()
+    assert [item['id'] for item in page['telemetries']] == [1, 2]
+
+    response = client.get(
+        f'/routes/{route.id}',
+        params={'include': 'telemetries', 'cursor': page['next_cursor']},
+    )
+    page = response.json()
+    assert [item['id'] for item in page['telemetries']] == [3]
+    assert page['next_cursor'] is None
+
+
+def test_read_routes_independent_of_telemetries(
+    client, session, route, count_queries
+):
+    route_id = route.id
+
+    def read_routes():
+        session.expire_all()
+        get_route_cache().clear()
+        with count_queries() as statements:
+            client.get('/routes/')
+            client.get(f'/routes/{route_id}')
+        return len(statements)
+
+    queries_without_history = read_routes()
+
+    client.post(
+        f'/telemetries/{route_id}/batch',
+        json={'telemetries': [TELEMETRY] * 1_000},
+    )
+
+    assert read_routes() == queries_without_history
+    assert not any(
+        isinstance(instance, Telemetry)
+        for instance in session.identity_map.values()
+    )
+
+
+def test_delete_route_with_telemetries(client, route, telemetry):
+    response = client.delete(f'/routes/{route.id}')
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.get(f'/telemetries/{telemetry.id}')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_create_route_conflict_normalized(client, route):
+    commands = f'  {route.commands.lower().replace(",", " ,  ")}  '
+
+    response = client.post('/routes/', json={'commands': commands})
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json() == {'detail': 'Route already exists'}
+
+
+@pytest.mark.asyncio
+async def test_create_route_concurrent(async_client):
+    commands = 'ANDAR 50 CM, GIRAR 90 GRAUS DIREITA, ENTREGAR'
+    variants = [commands, commands.lower(), commands.replace(', ', ',')]
+
+    responses = await asyncio.gather(*[
+        async_client.post(
+            '/routes/', json={'commands': variants[i % len(variants)]}
+        )
+        for i in range(30)
+    ])
+
+    statuses = [response.status_code for response in responses]
+    assert statuses.count(HTTPStatus.CREATED) == 1
+    assert statuses.count(HTTPStatus.CONFLICT) == len(responses) - 1
+
+    response = await async_client.get('/routes/')
+    assert len(response.json()['routes']) == 1
+
+
+def test_create_route_invalid_commands(client):
+    response = client.post(
+        '/routes/', json={'commands': 'ANDAR 50 CM, PULAR 10 CM, ENTREGAR'}
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {'detail': 'Invalid commands'}
+
+
+def test_update_route_invalid_commands(client, route):
+    response = client.put(f'/routes/{route.id}', json={'commands': 'GIRAR'})
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {'detail': 'Invalid commands'}
+
+
+def test_update_route_parses_commands(client, route):
+    response = client.put(
+        f'/routes/{route.id}',
+        json={'commands': 'andar -30 cm, girar 90 graus esquerda, entregar'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'id': route.id,
+        'commands': 'andar -30 cm, girar 90 graus esquerda, entregar',
+        'opcodes': [1, 2, 3],
+        'arguments': [-30, -90, 0],
+        'step_count': 3,
+        'total_distance': 30,
+        'total_rotation': 90,
+        'final_x': 0,
+        'final_y': -30,
+        'final_heading': 270,
+    }
+
+
+def test_read_route_etag(client, route):
+    response = client.get(f'/routes/{route.id}')
+    etag = response.headers['ETag']
+
+    response = client.get(
+        f'/routes/{route.id}', headers={'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['ETag'] == etag
+    assert not response.content
+
+
+def test_read_route_etag_changes_on_update(client, route):
+    etag = client.get(f'/routes/{route.id}').headers['ETag']
+
+    client.put(f'/routes/{route.id}', json={'commands': 'ANDAR 1 CM'})
+    response = client.get(
+        f'/routes/{route.id}', headers={'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['ETag'] != etag
+    assert response.json()['commands'] == 'ANDAR 1 CM'
+
+
+def test_read_route_served_from_cache(client, route, count_queries):
+    client.get(f'/routes/{route.id}')
+
+    with count_queries() as statements:
+        response = client.get(f'/routes/{route.id}')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['id'] == route.id
+    assert not statements
+
+
+def test_read_route_cache_invalidated_on_delete(client, route):
+    client.get(f'/routes/{route.id}')
+    client.delete(f'/routes/{route.id}')
+
+    response = client.get(f'/routes/{route.id}')
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+    response = client.post('/routes/', json={'commands': route.commands})
+
+    assert response.status_code == HTTPStatus.CREATED
+
+
+@pytest.mark.asyncio
+async def test_read_route_cache_skips_stale_load(
+    async_client, route, monkeypatch
+):
+    get_route_cache().clear()
+    scalar = AsyncSession.scalar
+    updates = []
+
+    async def load_then_update(self, *args, **kwargs):
+        loaded = await scalar(self, *args, **kwargs)
+        if not updates:
+            # the update commits between the read's load and its store
+            updates.append(None)
+            updates[0] = await async_client.put(
+                f'/routes/{route.id}', json={'commands': 'ANDAR 1 CM'}
+            )
+        return loaded
+
+    monkeypatch.setattr(AsyncSession, 'scalar', load_then_update)
+    stale = await async_client.get(f'/routes/{route.id}')
+    monkeypatch.undo()
+
+    fresh = await async_client.get(f'/routes/{route.id}')
+
+    assert updates[0].status_code == HTTPStatus.OK
+    assert stale.json()['commands'] == route.commands
+    assert fresh.json()['commands'] == 'ANDAR 1 CM'
+    assert fresh.headers['ETag'] != stale.headers['ETag']
+
+
+@pytest.mark.asyncio
+async def test_route_cache_invalidated_by_other_worker(
+    async_client, engine, route, monkeypatch
+):
+    monkeypatch.setattr(get_settings(), 'WORKERS', 0)
+    listener = asyncio.create_task(
+        listen(
+            engine.url.render_as_string(hide_password=False),
+            {INVALIDATION_CHANNEL: forget_notified_route},
+        )
+    )
+    await async_client.get(f'/routes/{route.id}')
+
+    # another worker deletes the route, only its own cache is popped
+    async with AsyncSession(engine) as other:
+        await other.execute(delete(Route).where(Route.id == route.id))
+        await notify_route_change(other, route.id, route.commands_hash)
+        await other.commit()
+
+    for _ in range(100):
+        if get_route_cache().get(route.id) is None:
+            break
+        await asyncio.sleep(0.01)
+    listener.cancel()
+
+    response = await async_client.get(f'/routes/{route.id}')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+    response = await async_client.post(
+        '/routes/', json={'commands': route.commands}
+    )
+    assert response.status_code == HTTPStatus.CREATED
+
+
+@pytest.mark.parametrize('size', [1, 25])
+@pytest.mark.parametrize(
+    'case',
+    [
+        ('GET', '/routes/', None, 1),
+        ('GET', '/routes/stats', None, 1),
+        ('GET', '/routes/{id}/stats', None, 1),
+        ('GET', '/routes/{id}', None, 1),
+        ('GET', '/routes/{id}?include=telemetries', None, 2),
+        ('POST', '/routes/', {'commands': 'GIRAR 90 GRAUS DIREITA'}, 1),
+        ('PUT', '/routes/{id}', {'commands': 'GIRAR 90 GRAUS DIREITA'}, 3),
+        ('DELETE', '/routes/{id}', None, 2),
+    ],
+)
+def test_routes_query_budget(client, populate, query_budget, size, case):
+    method, url, body, budget = case
+    route_id = populate(size, size)[-1]
+    get_route_cache().clear()
+
+    with query_budget(budget):
+        response = client.request(method, url.format(id=route_id), json=body)
+
+    assert response.is_success
@@ -0,0 +1,82 @@
+import pytest
+from fastapi.responses import JSONResponse
+
+from api.models import StatusState
+from api.schemas import RoutePublicList, TelemetryPublicList
+from api.serialization import route_page, telemetry_page
+
+FLOATS = [
+    0.0,
+    -0.0,
+    0.1,
+    12.5,
+    123456789.123,
+    0.0001,
+    1e15,
+]
+EXPONENT_FLOATS = [1e-05, -6.373695902106569e-05, 1e16, 1.5e300]
+
+
+def fastapi_body(model, content) -> bytes:
+    return JSONResponse(
+        model.model_validate(content).model_dump(mode='json')
+    ).body
+
+
+def telemetry_rows(values):
+    return [
+        (value, value, -value, value, StatusState.success, index)
+        for index, value in enumerate(values)
+    ]
+
+
+@pytest.mark.parametrize('values', [FLOATS, FLOATS + EXPONENT_FLOATS])
+def test_telemetry_page_matches_response_model(values):
+    rows = telemetry_rows(values)
+    content = {
+        'telemetries': [dict(zip(telemetry_page.fields, row)) for row in rows],
+        'next_cursor': 'abc',
+    }
+
+    assert telemetry_page.dump_json(rows, 'abc') == fastapi_body(
+        TelemetryPublicList, content
+    )
+
+
+def test_telemetry_page_rejects_nan():
+    with pytest.raises(ValueError, match='Out of range float'):
+        telemetry_page.dump_json(telemetry_rows([float('nan')]), None)
+
+
+def test_route_page_matches_response_model():
+    commands = 'ANDAR 10 CM, GIRAR 90 GRAUS ESQUERDA, ANDAR 5 CM, ENTREGAR'
+    row = (
+        commands,
+        1,
+        [1, 2, 1, 3],
+        [10, -90, 5, 0],
+        4,
+        15,
+        90,
+        -5.0,
+        10.0,
+        90,
+    )
+    content = {
+        'routes': [dict(zip(route_page.fields, row))],
+        'next_cursor': None,
+    }
+
+    assert route_page.dump_json([row], None) == fastapi_body(
+        RoutePublicList, content
+    )
+
+
+def test_read_telemetries_body(client, route, telemetry):
+    response = client.get('/telemetries/')
+
+    assert response.headers['content-type'] == 'application/json'
+    assert response.content == fastapi_body(
+        TelemetryPublicList,
+        {'telemetries': [telemetry], 'next_cursor': None},
+    )
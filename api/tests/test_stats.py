@@ -0,0 +1,166 @@
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import select
+
+from api.models import RouteStats
+from api.stats import rebuild_route_stats
+from benchmarks.payloads import telemetry_payload
+
+TELEMETRIES = [
+    telemetry_payload(average_current=2),
+    telemetry_payload(
+        average_speed=20,
+        distance_traveled=100,
+        energy_consumed=50,
+        average_current=4,
+        status='failed',
+    ),
+]
+
+
+def test_read_route_stats_empty(client, route):
+    response = client.get(f'/routes/{route.id}/stats')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'route_id': route.id,
+        'count': 0,
+        'success_count': 0,
+        'failed_count': 0,
+        'success_rate': None,
+        **{
+            metric: {
+                'total': 0.0,
+                'mean': None,
+                'std': None,
+                'min': None,
+                'max': None,
+            }
+            for metric in TELEMETRIES[0]
+            if metric != 'status'
+        },
+    }
+
+
+def test_read_route_stats(client, route):
+    client.post(
+        f'/telemetries/{route.id}/batch', json={'telemetries': TELEMETRIES}
+    )
+    client.post(f'/telemetries/{route.id}', json=TELEMETRIES[0])
+
+    response = client.get(f'/routes/{route.id}/stats')
+    stats = response.json()
+
+    assert stats['count'] == len(TELEMETRIES) + 1
+    assert stats['success_count'] == len(TELEMETRIES)
+    assert stats['failed_count'] == 1
+    assert stats['success_rate'] == pytest.approx(2 / 3)
+    assert stats['distance_traveled'] == {
+        'total': 500.0,
+        'mean': pytest.approx(500 / 3),
+        'std': pytest.approx(47.1404520791),
+        'min': 100.0,
+        'max': 200.0,
+    }
+
+
+def test_read_route_stats_incorrect_id(client):
+    response = client.get('/routes/10/stats')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Route not found'}
+
+
+def test_delete_telemetry_updates_stats(client, route):
+    response = client.post(
+        f'/telemetries/{route.id}/batch', json={'telemetries': TELEMETRIES}
+    )
+    first_id, second_id = response.json()['ids']
+
+    client.delete(f'/telemetries/{second_id}')
+    stats = client.get(f'/routes/{route.id}/stats').json()
+
+    assert stats['count'] == 1
+    assert stats['failed_count'] == 0
+    assert stats['average_speed'] == {
+        'total': 10.0,
+        'mean': 10.0,
+        'std': 0.0,
+        'min': 10.0,
+        'max': 10.0,
+    }
+
+    client.delete(f'/telemetries/{first_id}')
+    stats = client.get(f'/routes/{route.id}/stats').json()
+
+    assert stats['count'] == 0
+    assert stats['average_speed']['max'] is None
+
+
+def test_read_routes_stats(client, route):
+    client.post(
+        f'/telemetries/{route.id}/batch', json={'telemetries': TELEMETRIES}
+    )
+    client.post('/routes/', json={'commands': 'ENTREGAR'})
+
+    response = client.get('/routes/stats')
+
+    assert response.status_code == HTTPStatus.OK
+    assert [
+        (stats['route_id'], stats['count'])
+        for stats in response.json()['stats']
+    ] == [(route.id, len(TELEMETRIES)), (route.id + 1, 0)]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_route_stats(client, session, route):
+    client.post(
+        f'/telemetries/{route.id}/batch',
+        json={'telemetries': TELEMETRIES * 3},
+    )
+    client.delete('/telemetries/1')
+    incremental = client.get(f'/routes/{route.id}/stats').json()
+
+    await rebuild_route_stats(session)
+    await session.commit()
+    rebuilt = client.get(f'/routes/{route.id}/stats').json()
+
+    for key, value in incremental.items():
+        if isinstance(value, dict):
+            assert rebuilt[key] == pytest.approx(value)
+        else:
+            assert rebuilt[key] == value
+    assert await session.scalar(select(RouteStats.count)) == rebuilt['count']
+
+
+@pytest.mark.asyncio
+async def test_delete_telemetries_updates_stats(client, session, route):
+    client.post(
+        f'/telemetries/{route.id}/batch',
+        json={'telemetries': TELEMETRIES * 3},
+    )
+
+    response = client.delete(
+        '/telemetries/', params={'route_id': route.id, 'status': 'failed'}
+    )
+    incremental = client.get(f'/routes/{route.id}/stats').json()
+
+    assert response.json() == {'deleted': 3}
+    assert incremental['failed_count'] == 0
+    assert (
+        incremental['average_speed']['max'] == TELEMETRIES[0]['average_speed']
+    )
+
+    await rebuild_route_stats(session)
+    await session.commit()
+    rebuilt = client.get(f'/routes/{route.id}/stats').json()
+
+    for key, value in incremental.items():
+        if isinstance(value, dict):
+            assert rebuilt[key] == pytest.approx(value)
+        else:
+            assert rebuilt[key] == value
+
+    client.delete('/telemetries/', params={'route_id': route.id})
+
+    assert await session.scalar(select(RouteStats.count)) is None
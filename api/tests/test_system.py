@@ -0,0 +1,24 @@
+from http import HTTPStatus
+
+
+def test_read_pool(client):
+    response = client.get('/system/pool')
+
+    assert response.status_code == HTTPStatus.OK
+    assert set(response.json()) == {
+        'size',
+        'checked_in',
+        'checked_out',
+        'overflow',
+    }
+
+
+def test_read_cache_stats(client, route):
+    client.get(f'/routes/{route.id}')
+    client.get(f'/routes/{route.id}')
+
+    response = client.get('/system/cache')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['routes']['size'] == 1
+    assert response.json()['routes']['hits'] >= 1
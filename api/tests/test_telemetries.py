@@ -1,6 +1,14 @@
+import csv
+import io
+import json
+from datetime import datetime
 from http import HTTPStatus
 
+import pytest
+
+from api.models import Telemetry
 from api.schemas import TelemetryPublic
+from benchmarks.payloads import TELEMETRY, telemetry_payload
 
 
 def test_create_telemetry(client, route):
@@ -24,14 +32,7 @@ def test_create_telemetry(client, route):
     )
 
     assert response.status_code == HTTPStatus.CREATED
-    assert response.json() == {
-        'id': 1,
-        'average_speed': 10,
-        'distance_traveled': 200,
-        'energy_consumed': 100,
-        'average_current': 100,
-        'status': 'success',
-    }
+    assert response.json() == {'id': 1, **TELEMETRY}
 
 
 def test_create_telemetry_incorrect_route_id(client, route):
@@ -74,7 +75,10 @@ def test_read_telemetries(client, telemetry):
     telemetry_public = TelemetryPublic.model_validate(telemetry).model_dump()
     response = client.get('/telemetries/')
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'telemetries': [telemetry_public]}
+    assert response.json() == {
+        'telemetries': [telemetry_public],
+        'next_cursor': None,
+    }
 
 
 def test_read_telemetry(client, telemetry):
@@ -88,3 +92,331 @@ def test_read_telemetry_incorrect_id(client, telemetry):
     response = client.get(f'/telemetries/{telemetry.id + 1}')
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert response.json() == {'detail': 'Telemetry not found'}
+
+
+def test_create_route_telemetries(client, route):
+    telemetry = TELEMETRY
+
+    response = client.post(
+        f'/telemetries/{route.id}/batch',
+        json={'telemetries': [telemetry, {**telemetry, 'status': 'failed'}]},
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json() == {'count': 2, 'ids': [1, 2]}
+
+    response = client.get('/telemetries/')
+    assert [item['status'] for item in response.json()['telemetries']] == [
+        'success',
+        'failed',
+    ]
+
+
+def test_create_route_telemetries_incorrect_route_id(client):
+    response = client.post(
+        '/telemetries/2/batch',
+        json={'telemetries': [TELEMETRY]},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Route not found'}
+
+
+def test_create_route_telemetries_empty(client, route):
+    response = client.post(
+        f'/telemetries/{route.id}/batch', json={'telemetries': []}
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_create_telemetries(client, route):
+    telemetry = telemetry_payload(route_id=route.id)
+
+    response = client.post(
+        '/telemetries/batch',
+        json={'telemetries': [telemetry] * 3},
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json() == {'count': 3, 'ids': [1, 2, 3]}
+
+
+def test_create_telemetries_incorrect_route_id(client, route):
+    telemetry = telemetry_payload(route_id=route.id)
+
+    response = client.post(
+        '/telemetries/batch',
+        json={'telemetries': [telemetry, {**telemetry, 'route_id': 2}]},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Route not found'}
+
+    response = client.get('/telemetries/')
+    assert response.json() == {'telemetries': [], 'next_cursor': None}
+
+
+def test_read_telemetries_cursor(client, route):
+    telemetry = TELEMETRY
+    client.post(
+        f'/telemetries/{route.id}/batch',
+        json={'telemetries': [telemetry] * 5},
+    )
+
+    pages = []
+    params = {'limit': 2}
+    while True:
+        response = client.get('/telemetries/', params=params)
+        assert response.status_code == HTTPStatus.OK
+        page = response.json()
+        pages.append([item['id'] for item in page['telemetries']])
+        if page['next_cursor'] is None:
+            break
+        params['cursor'] = page['next_cursor']
+
+    assert pages == [[1, 2], [3, 4], [5]]
+
+
+def test_read_telemetries_offset(client, route):
+    telemetry = TELEMETRY
+    client.post(
+        f'/telemetries/{route.id}/batch',
+        json={'telemetries': [telemetry] * 5},
+    )
+
+    response = client.get('/telemetries/', params={'offset': 2, 'limit': 2})
+
+    assert [item['id'] for item in response.json()['telemetries']] == [3, 4]
+
+
+def test_read_telemetries_invalid_cursor(client):
+    response = client.get('/telemetries/', params={'cursor': 'invalid'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
+
+
+def test_export_telemetries_ndjson(client, telemetry):
+    response = client.get('/telemetries/export')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {
+            'id': telemetry.id,
+            'route_id': telemetry.route_id,
+            **TELEMETRY,
+            'created_at': telemetry.created_at.isoformat(),
+        }
+    ]
+
+
+def test_export_telemetries_csv(client, telemetry):
+    response = client.get('/telemetries/export', params={'format': 'csv'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/csv')
+    assert list(csv.reader(io.StringIO(response.text))) == [
+        [
+            'id',
+            'route_id',
+            'average_speed',
+            'distance_traveled',
+            'energy_consumed',
+            'average_current',
+            'status',
+            'created_at',
+        ],
+        [
+            str(telemetry.id),
+            str(telemetry.route_id),
+            '10.0',
+            '200.0',
+            '100.0',
+            '100.0',
+            'success',
+            telemetry.created_at.isoformat(),
+        ],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_export_telemetries_filtered(
+    client, session, route, mock_db_time
+):
+    for day in (1, 2, 3):
+        with mock_db_time(model=Telemetry, time=datetime(2025, 1, day)):
+            session.add(
+                Telemetry(
+                    average_speed=10,
+                    distance_traveled=200,
+                    energy_consumed=100,
+                    average_current=100,
+                    status='success',
+                    route_id=route.id,
+                )
+            )
+            await session.commit()
+
+    response = client.get(
+        '/telemetries/export',
+        params={
+            'route_id': route.id,
+            'from': '2025-01-02T00:00:00',
+            'to': '2025-01-03T00:00:00',
+        },
+    )
+
+    assert [json.loads(line)['id'] for line in response.text.splitlines()] == [
+        2
+    ]
+
+    response = client.get(
+        '/telemetries/export', params={'route_id': route.id + 1}
+    )
+    assert not response.text
+
+
+@pytest.mark.asyncio
+async def test_aggregate_telemetries(client, session, route, mock_db_time):
+    samples = [
+        (datetime(2025, 1, 1, 8), 100),
+        (datetime(2025, 1, 1, 9), 300),
+        (datetime(2025, 1, 2, 8), 50),
+    ]
+    for time, energy in samples:
+        with mock_db_time(model=Telemetry, time=time):
+            session.add(
+                Telemetry(
+                    average_speed=10,
+                    distance_traveled=200,
+                    energy_consumed=energy,
+                    average_current=2,
+                    status='success',
+                    route_id=route.id,
+                )
+            )
+            await session.commit()
+
+    response = client.get(
+        '/telemetries/aggregate',
+        params={'bucket': 'day', 'route_id': route.id},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    buckets = response.json()['buckets']
+    assert [(bucket['bucket'], bucket['count']) for bucket in buckets] == [
+        ('2025-01-01T00:00:00', 2),
+        ('2025-01-02T00:00:00', 1),
+    ]
+    assert buckets[0]['energy_consumed'] == {
+        'total': 400.0,
+        'mean': 200.0,
+        'min': 100.0,
+        'max': 300.0,
+    }
+
+    response = client.get(
+        '/telemetries/aggregate',
+        params={'bucket': 'hour', 'to': '2025-01-02T00:00:00'},
+    )
+    assert [bucket['bucket'] for bucket in response.json()['buckets']] == [
+        '2025-01-01T08:00:00',
+        '2025-01-01T09:00:00',
+    ]
+
+    response = client.get('/telemetries/aggregate', params={'bucket': 'week'})
+    assert [
+        (bucket['bucket'], bucket['count'])
+        for bucket in response.json()['buckets']
+    ] == [('2024-12-30T00:00:00', 3)]
+
+
+@pytest.mark.asyncio
+async def test_delete_telemetries(client, session, route, mock_db_time):
+    for day, status in ((1, 'success'), (2, 'failed'), (3, 'failed')):
+        with mock_db_time(model=Telemetry, time=datetime(2025, 1, day)):
+            session.add(
+                Telemetry(
+                    average_speed=10,
+                    distance_traveled=200,
+                    energy_consumed=100,
+                    average_current=100,
+                    status=status,
+                    route_id=route.id,
+                )
+            )
+            await session.commit()
+
+    response = client.delete(
+        '/telemetries/',
+        params={'status': 'failed', 'from': '2025-01-03T00:00:00'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'deleted': 1}
+
+    response = client.delete('/telemetries/', params={'route_id': route.id})
+
+    assert response.json() == {'deleted': 2}
+    assert not client.get('/telemetries/').json()['telemetries']
+
+    response = client.delete('/telemetries/', params={'route_id': route.id})
+
+    assert response.json() == {'deleted': 0}
+
+
+def test_delete_telemetries_without_filter(client, telemetry):
+    response = client.delete('/telemetries/')
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'At least one filter is required'}
+
+
+def test_aggregate_telemetries_invalid_bucket(client):
+    response = client.get('/telemetries/aggregate', params={'bucket': 'year'})
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def _budget_body(kind: str | None, route_id: int) -> dict | None:
+    return {
+        None: None,
+        'telemetry': TELEMETRY,
+        'route_batch': {'telemetries': [TELEMETRY] * 100},
+        'batch': {'telemetries': [telemetry_payload(route_id=route_id)] * 100},
+    }[kind]
+
+
+@pytest.mark.parametrize('size', [1, 25])
+@pytest.mark.parametrize(
+    'case',
+    [
+        ('GET', '/telemetries/', None, 1),
+        ('GET', '/telemetries/?limit=1000', None, 1),
+        ('GET', '/telemetries/export', None, 1),
+        ('GET', '/telemetries/export?format=csv', None, 1),
+        ('GET', '/telemetries/aggregate?route_id={route_id}', None, 1),
+        ('GET', '/telemetries/{id}', None, 1),
+        ('POST', '/telemetries/{route_id}', 'telemetry', 4),
+        ('POST', '/telemetries/{route_id}/batch', 'route_batch', 3),
+        ('POST', '/telemetries/batch', 'batch', 3),
+        ('DELETE', '/telemetries/{id}', None, 4),
+        ('DELETE', '/telemetries/?route_id={route_id}', None, 5),
+    ],
+)
+def test_telemetries_query_budget(client, populate, query_budget, size, case):
+    method, url, body, budget = case
+    route_id = populate(size, size)[-1]
+    response = client.get(
+        f'/routes/{route_id}', params={'include': 'telemetries', 'limit': 1}
+    )
+    telemetry_id = response.json()['telemetries'][0]['id']
+
+    with query_budget(budget):
+        response = client.request(
+            method,
+            url.format(id=telemetry_id, route_id=route_id),
+            json=_budget_body(body, route_id),
+        )
+
+    assert response.is_success
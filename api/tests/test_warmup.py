@@ -0,0 +1,101 @@
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+
+import api.app as app_module
+from api import database
+from api.app import app
+from api.cache import get_route_cache
+from api.database import create_engine, pool_status
+from api.server import worker_count
+from api.settings import get_settings
+from api.warmup import hot_queries, warm_pool, warm_up
+
+WARM_CONNECTIONS = 3
+
+
+async def prepared_statements(engine) -> int:
+    async with engine.connect() as conn:
+        return await conn.scalar(
+            text(
+                'SELECT count(*) FROM pg_prepared_statements '
+                "WHERE statement NOT LIKE '%pg_prepared_statements%'"
+            )
+        )
+
+
+@pytest.fixture
+def warm_settings(engine):
+    return get_settings().model_copy(
+        update={
+            'DATABASE_URL': engine.url.render_as_string(hide_password=False),
+            'DATABASE_POOL_SIZE': 4,
+            'DATABASE_PREPARE_THRESHOLD': 0,
+            'DATABASE_POOL_WARMUP': WARM_CONNECTIONS,
+            'ROUTE_CACHE_WARMUP': 10,
+        }
+    )
+
+
+@pytest_asyncio.fixture
+async def warm_engine(warm_settings):
+    engine = create_engine(warm_settings)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_warm_pool(session, warm_engine):
+    assert await warm_pool(warm_engine, WARM_CONNECTIONS) == WARM_CONNECTIONS
+    assert pool_status(warm_engine)['checked_in'] == WARM_CONNECTIONS
+
+    assert await prepared_statements(warm_engine) == len(hot_queries())
+
+
+@pytest.mark.asyncio
+async def test_reads_keep_prepared_statements(
+    monkeypatch, session, warm_engine
+):
+    monkeypatch.setattr(database, 'get_engine', lambda: warm_engine)
+    await warm_pool(warm_engine, 1)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url='http://test'
+    ) as client:
+        response = await client.get('/routes/')
+
+    assert response.status_code == HTTPStatus.OK
+
+    assert await prepared_statements(warm_engine) == len(hot_queries())
+
+
+@pytest.mark.asyncio
+async def test_warm_up_primes_route_cache(
+    session, route, warm_engine, warm_settings
+):
+    warmed = await warm_up(warm_engine, warm_settings)
+
+    assert warmed == {'connections': WARM_CONNECTIONS, 'routes': 1}
+    assert get_route_cache().get(route.id)[0].id == route.id
+
+
+def test_lifespan_warms_up_and_disposes(
+    monkeypatch, session, route, warm_engine, warm_settings
+):
+    monkeypatch.setattr(app_module, 'get_engine', lambda: warm_engine)
+    monkeypatch.setattr(app_module, 'get_settings', lambda: warm_settings)
+
+    with TestClient(app):
+        assert get_route_cache().get(route.id) is not None
+        assert pool_status(warm_engine)['checked_in'] == WARM_CONNECTIONS
+
+    assert pool_status(warm_engine)['checked_in'] == 0
+
+
+def test_worker_count():
+    assert worker_count(WARM_CONNECTIONS) == WARM_CONNECTIONS
+    assert worker_count(0) >= 1